@@ -1,20 +1,21 @@
 """
 Corporate Announcements API endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request, Response
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
+import asyncio
 import logging
 import requests
-import io
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, run_db
 from app.core.auth.permissions import get_current_user, get_admin_user
 from app.models.user import User
 from app.services.announcements_service import get_announcements_service
-from app.providers.truedata_api import get_truedata_api_service
+from app.services.attachment_prefetcher import get_attachment_prefetcher
 from pydantic import BaseModel
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -39,32 +40,38 @@ async def get_announcements(
     offset: int = Query(0, description="Offset for pagination (legacy)"),
     page: Optional[int] = Query(None, description="Page number (1-indexed)"),
     page_size: Optional[int] = Query(None, description="Number of records per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; takes precedence over page/offset"),
+    include_total: bool = Query(True, description="Compute the total row count"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get corporate announcements from database with pagination"""
     try:
-        service = get_announcements_service()
+        service = await run_db("announcements", get_announcements_service)
         
-        # Use page/page_size if provided, otherwise use limit/offset
-        announcements, total = service.get_announcements(
-            from_date=from_date,
-            to_date=to_date,
-            symbol=symbol,
-            search=search,
-            limit=limit,
-            offset=offset,
-            page=page,
-            page_size=page_size
-        )
+        try:
+            result = await run_db("announcements", service.get_announcements_page,
+                page=page,
+                page_size=page_size,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                include_total=include_total,
+                from_date=from_date,
+                to_date=to_date,
+                symbol=symbol,
+                search=search
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        announcements = result.pop("announcements")
+        total = result["total"]
         
         logger.info(f"Retrieved {len(announcements)} announcements from DB, total: {total}")
         
-        # Batch fetch descriptor metadata to avoid N+1 queries
+        # Descriptor metadata is held in memory by the service
         descriptor_ids = [ann.get("descriptor_id") for ann in announcements if ann.get("descriptor_id")]
-        descriptor_metadata = {}
-        if descriptor_ids:
-            descriptor_metadata = service.get_descriptor_metadata_batch(descriptor_ids)
+        descriptor_metadata = service.get_descriptor_metadata_batch(descriptor_ids)
         
         # Enrich with descriptor metadata
         enriched = []
@@ -87,20 +94,9 @@ async def get_announcements(
                 logger.warning(f"Error enriching announcement {ann.get('id', 'unknown')}: {e}")
                 if ann.get("id"): enriched.append(AnnouncementResponse(**ann))
         
-        # Calculate pagination info
-        current_page = page if page else (offset // (page_size or limit or 25)) + 1
-        current_page_size = page_size if page_size else (limit or 25)
-        total_pages = (total + current_page_size - 1) // current_page_size if total > 0 else 1
-        
-        return AnnouncementListResponse(
-            announcements=enriched,
-            total=total,
-            limit=current_page_size,
-            offset=offset if not page else (current_page - 1) * current_page_size,
-            page=current_page,
-            page_size=current_page_size,
-            total_pages=total_pages
-        )
+        return AnnouncementListResponse(announcements=enriched, **result)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting announcements: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -153,15 +149,15 @@ async def get_database_status(
 ):
     """Get database status and recent announcements count"""
     try:
-        service = get_announcements_service()
+        service = await run_db("announcements", get_announcements_service)
         
         # Get total count
-        _, total = service.get_announcements(limit=1, offset=0)
+        _, total = await run_db("announcements", service.get_announcements, limit=1, offset=0)
         
         # Get recent announcements count (last 24 hours)
         from datetime import datetime, timedelta, timezone
         yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
-        recent_announcements, _ = service.get_announcements(from_date=yesterday.split('T')[0])
+        recent_announcements, _ = await run_db("announcements", service.get_announcements, from_date=yesterday.split('T')[0])
         
         # Get WebSocket status
         from app.providers.truedata_websocket import get_announcements_websocket_service
@@ -175,7 +171,7 @@ async def get_database_status(
                 ws_connected = ws_running
         
         # Get most recent announcement timestamp
-        recent_ann, _ = service.get_announcements(limit=1, offset=0)
+        recent_ann, _ = await run_db("announcements", service.get_announcements, limit=1, offset=0)
         last_announcement_time = None
         if recent_ann and len(recent_ann) > 0:
             last_announcement_time = recent_ann[0].get('created_at') or recent_ann[0].get('trade_date')
@@ -209,8 +205,8 @@ async def get_announcement(
 ):
     """Get a single announcement by ID"""
     try:
-        service = get_announcements_service()
-        announcement = service.get_announcement_by_id(announcement_id)
+        service = await run_db("announcements", get_announcements_service)
+        announcement = await run_db("announcements", service.get_announcement_by_id, announcement_id)
         
         if not announcement:
             raise HTTPException(status_code=404, detail="Announcement not found")
@@ -241,9 +237,9 @@ async def fetch_announcements(
 ):
     """Fetch announcements from TrueData REST API"""
     try:
-        service = get_announcements_service()
+        service = await run_db("announcements", get_announcements_service)
         
-        inserted_count = service.fetch_from_truedata_rest(
+        inserted_count = await run_db("announcements", service.fetch_from_truedata_rest,
             connection_id=request.connection_id,
             from_date=request.from_date,
             to_date=request.to_date,
@@ -267,30 +263,42 @@ async def fetch_announcements(
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+def _attachment_response(request: Request, announcement_id: str, attachment: Dict[str, Any]) -> Response:
+    """
+    Serve a stored attachment file. Files are content-addressed, so the sha256 is a
+    strong ETag; FileResponse sends the file with sendfile and answers Range requests.
+    """
+    headers = {"ETag": f'"{attachment["sha256"]}"', "Cache-Control": "private, max-age=86400"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or headers["ETag"] in if_none_match):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        attachment['path'],
+        media_type=attachment['content_type'] or 'application/pdf',
+        filename=f"announcement-{announcement_id}.pdf",
+        headers=headers
+    )
+
+
 @router.get("/{announcement_id}/attachment")
 async def get_announcement_attachment(
     announcement_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     try:
-        service = get_announcements_service()
+        service = await run_db("announcements", get_announcements_service)
         
-        # Check database first
-        attachment = service.get_attachment(announcement_id)
+        # Check the attachment store first
+        attachment = await run_db("announcements", service.get_attachment, announcement_id)
         
         if attachment:
-            logger.info(f"Returning attachment for {announcement_id} from database")
-            return StreamingResponse(
-                io.BytesIO(attachment['data']),
-                media_type=attachment['content_type'],
-                headers={
-                    "Content-Disposition": f'attachment; filename="announcement-{announcement_id}.pdf"'
-                }
-            )
+            logger.info(f"Returning attachment for {announcement_id} from the attachment store")
+            return _attachment_response(request, announcement_id, attachment)
         
-        # Not in database, fetch from TrueData
-        logger.info(f"Attachment not in database for {announcement_id}, fetching from TrueData")
+        # Not stored yet, fetch from TrueData
+        logger.info(f"Attachment not stored for {announcement_id}, fetching from TrueData")
         
         from app.models.connection import Connection
         truedata_conn = db.query(Connection).filter(
@@ -301,23 +309,25 @@ async def get_announcement_attachment(
         if not truedata_conn:
             raise HTTPException(status_code=404, detail="TrueData connection not found")
         
-        api_service = get_truedata_api_service(truedata_conn.id, db_session=db)
-        
         try:
-            response = api_service.get_announcement_attachment(announcement_id)
-            attachment_data = response.content
-            content_type = response.headers.get('Content-Type', 'application/pdf')
-            
-            # Store in database
-            service.store_attachment(announcement_id, attachment_data, content_type)
+            # Download and store; joins the prefetch or another viewer's download if one is running
+            attachment = await asyncio.wait_for(
+                asyncio.wrap_future(get_attachment_prefetcher().fetch(truedata_conn.id, announcement_id)),
+                timeout=settings.ATTACHMENT_FETCH_TIMEOUT_SECONDS
+            )
+            if attachment.get('path'):
+                return _attachment_response(request, announcement_id, attachment)
             
-            return StreamingResponse(
-                io.BytesIO(attachment_data),
-                media_type=content_type,
+            return Response(
+                content=attachment['data'],
+                media_type=attachment['content_type'],
                 headers={
                     "Content-Disposition": f'attachment; filename="announcement-{announcement_id}.pdf"'
                 }
             )
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out waiting for attachment {announcement_id}")
+            raise HTTPException(status_code=504, detail="Timed out fetching attachment from TrueData")
         except Exception as e:
             # Handle API errors similar to original
             error_msg = str(e)
@@ -341,8 +351,8 @@ async def refresh_descriptors(
 ):
     """Refresh descriptor metadata from TrueData"""
     try:
-        service = get_announcements_service()
-        service.fetch_descriptors_from_truedata(request.connection_id)
+        service = await run_db("announcements", get_announcements_service)
+        await run_db("announcements", service.fetch_descriptors_from_truedata, request.connection_id)
         return {"message": "Descriptor metadata refreshed successfully"}
     except Exception as e:
         logger.error(f"Error refreshing descriptors: {e}")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.core.auth.permissions import get_current_user
 from app.models.user import User
@@ -18,13 +18,18 @@ def get_news(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Records per page"),
     search: Optional[str] = Query(None, description="Search keyword"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; takes precedence over page"),
+    include_total: bool = Query(True, description="Compute the total row count"),
     current_user: User = Depends(get_current_user),
     service: NewsService = Depends(get_news_service)
 ):
     """
     Get AI-enriched news from the final database with pagination and search.
     """
-    return service.get_news(page=page, page_size=page_size, search=search)
+    try:
+        return service.get_news(page=page, page_size=page_size, search=search, cursor=cursor, include_total=include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/status", response_model=dict)
 def get_news_status(
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Response
 from typing import List, Optional
 import uuid
 
-from app.core.auth.permissions import get_admin_user
+from app.core.auth.permissions import get_admin_user, get_current_user
+from app.core.database import run_db
 from app.models.user import User
 from app.services.screener_service import ScreenerService
 
@@ -24,7 +25,8 @@ async def start_scraping(
     job_id = f"job_{uuid.uuid4().hex[:8]}"
     trigger_user = f"user:{current_user.username}" if triggered_by == "manual" else triggered_by
     
-    # Start the job in background (handled by Service thread management)
+    # Start the job in background (handled by Service thread management).
+    # Only starts a thread, so it is not queued behind database work in run_db.
     service.start_scraping(job_id, trigger_user, connection_id)
     
     return {"job_id": job_id, "status": "STARTED", "message": "Scraping job started in background"}
@@ -36,6 +38,7 @@ async def stop_scraping(
     service: ScreenerService = Depends(get_screener_service)
 ):
     """Stop a running scraping job for a connection"""
+    # Sets a flag; must not wait behind slow screener queries in run_db
     service.stop_scraping(connection_id)
     return {"message": f"Stop signal sent for connection {connection_id}"}
 
@@ -46,7 +49,7 @@ async def get_scraping_status(
     service: ScreenerService = Depends(get_screener_service)
 ):
     """Get status of a scraping job"""
-    status = service.get_status(job_id)
+    status = await run_db("screener", service.get_status, job_id)
     if not status:
         raise HTTPException(status_code=404, detail="Job not found")
     return status
@@ -57,7 +60,7 @@ async def get_screener_status(
     service: ScreenerService = Depends(get_screener_service)
 ):
     """Get overall screener status and last run info"""
-    stats = service.get_stats()
+    stats = await run_db("screener", service.get_stats)
     is_running = any(t.is_alive() for t in service._active_threads.values())
     return {
         "is_running": is_running,
@@ -72,7 +75,7 @@ async def get_scraping_history(
     service: ScreenerService = Depends(get_screener_service)
 ):
     """Get history of scraping jobs"""
-    return service.get_scraping_history(limit)
+    return await run_db("screener", service.get_scraping_history, limit)
 
 @router.get("/stats")
 async def get_stats(
@@ -80,7 +83,7 @@ async def get_stats(
     service: ScreenerService = Depends(get_screener_service)
 ):
     """Get Screener statistics"""
-    return service.get_stats()
+    return await run_db("screener", service.get_stats)
 
 @router.get("/connections")
 async def get_connections(
@@ -88,7 +91,7 @@ async def get_connections(
     service: ScreenerService = Depends(get_screener_service)
 ):
     """Get all screener connections"""
-    return service.get_connections()
+    return await run_db("screener", service.get_connections)
 
 @router.patch("/connections/{connection_id}")
 async def update_connection(
@@ -98,5 +101,51 @@ async def update_connection(
     service: ScreenerService = Depends(get_screener_service)
 ):
     """Update a screener connection"""
-    service.update_connection(connection_id, data)
+    await run_db("screener", service.update_connection, connection_id, data)
     return {"message": "Connection updated successfully"}
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+def _split_csv(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+def _columnar_response(payload, output_format: str):
+    if output_format == "arrow":
+        return Response(content=payload, media_type=ARROW_STREAM_MEDIA_TYPE)
+    return payload
+
+@router.get("/fundamentals")
+async def get_fundamentals(
+    symbols: str = Query(..., description="Comma-separated screener symbols"),
+    statement_group: Optional[str] = None,
+    period_type: Optional[str] = None,
+    metrics: Optional[str] = Query(None, description="Comma-separated metric names"),
+    format: str = Query("json", pattern="^(json|arrow)$"),
+    current_user: User = Depends(get_current_user),
+    service: ScreenerService = Depends(get_screener_service)
+):
+    """Stored metrics pivoted to one row per period and one column per metric"""
+    symbol_list = _split_csv(symbols)
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    try:
+        payload = await run_db("screener", service.get_fundamentals, symbol_list, statement_group, period_type, _split_csv(metrics) or None, format)
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Arrow output requires pyarrow to be installed")
+    return _columnar_response(payload, format)
+
+@router.get("/fundamentals/cross-section")
+async def get_cross_section(
+    metric: str,
+    statement_group: Optional[str] = None,
+    period_type: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|arrow)$"),
+    current_user: User = Depends(get_current_user),
+    service: ScreenerService = Depends(get_screener_service)
+):
+    """Latest value of one metric for every symbol"""
+    try:
+        payload = await run_db("screener", service.get_cross_section, metric, statement_group, period_type, format)
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Arrow output requires pyarrow to be installed")
+    return _columnar_response(payload, format)
@@ -3,7 +3,7 @@ from typing import List, Optional
 import logging
 
 from app.core.auth.permissions import get_admin_user
-from app.core.database import get_db
+from app.core.database import get_db, run_db
 from app.models.user import User
 from app.schemas.symbol import SymbolResponse, PaginatedSymbolResponse, PreviewResponse, ScriptResponse, ScriptCreate, ScriptUpdate, AutoUploadRequest, SchedulerCreate, SchedulerUpdate, SchedulerResponse, SchedulerSource, BulkDeleteRequest, BulkStatusRequest
 from app.services.symbols_service import SymbolsService
@@ -33,7 +33,6 @@ async def upload_manual(
 ):
     """Upload symbols from CSV/Excel file - returns preview"""
     try:
-        contents = await file.read()
         s_id = int(script_id) if script_id and str(script_id).strip() else None
         
         user_info = {
@@ -42,7 +41,8 @@ async def upload_manual(
             "username": current_user.username
         }
         
-        return service.process_manual_upload_preview(contents, file.filename, s_id, user_info)
+        # Pass the spooled upload through as a stream so the body is never held in memory
+        return await run_db("symbols", service.process_manual_upload_preview, file.file, file.filename, s_id, user_info)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -62,7 +62,7 @@ async def upload_auto(
             "name": current_user.name,
             "username": current_user.username
         }
-        return service.process_auto_upload_preview(
+        return await run_db("symbols", service.process_auto_upload_preview,
             request_data.url, 
             request_data.file_type, 
             request_data.headers, 
@@ -84,7 +84,7 @@ async def confirm_upload(
     try:
         preview_id = data.get("preview_id")
         if not preview_id: raise HTTPException(status_code=400, detail="preview_id is required")
-        return service.confirm_upload(preview_id)
+        return await run_db("symbols", service.confirm_upload, preview_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -95,7 +95,7 @@ async def get_upload_status(
     service: SymbolsService = Depends(get_symbols_service)
 ):
     """Get upload status by job ID"""
-    return service.get_upload_status(job_id)
+    return await run_db("symbols", service.get_upload_status, job_id)
 
 @router.get("/upload/logs")
 async def get_upload_logs(
@@ -105,7 +105,7 @@ async def get_upload_logs(
     service: SymbolsService = Depends(get_symbols_service)
 ):
     """Get upload logs"""
-    return service.get_upload_logs(limit, page)
+    return await run_db("symbols", service.get_upload_logs, limit, page)
 
 # --- Symbol Management Endpoints ---
 
@@ -118,11 +118,16 @@ async def get_symbols(
     sort_by: Optional[str] = None,
     page_size: int = 25,
     page: int = 1,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; takes precedence over page"),
+    include_total: bool = Query(True, description="Compute the total row count"),
     current_user: User = Depends(get_admin_user),
     service: SymbolsService = Depends(get_symbols_service)
 ):
     """Get symbols with pagination and filtering"""
-    return service.get_symbols(search, exchange, status, expiry, sort_by, page_size, page)
+    try:
+        return await run_db("symbols", service.get_symbols, search, exchange, status, expiry, sort_by, page_size, page, cursor, include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/series-lookup/reload")
 async def reload_series_lookup_endpoint(
@@ -131,7 +136,7 @@ async def reload_series_lookup_endpoint(
     service: SymbolsService = Depends(get_symbols_service)
 ):
     """Reload series lookup data"""
-    res = service.reload_series_lookup(force)
+    res = await run_db("symbols", service.reload_series_lookup, force)
     if not res["success"]:
         raise HTTPException(status_code=500, detail=res.get("message"))
     return res
@@ -142,7 +147,7 @@ async def delete_all_symbols(
     service: SymbolsService = Depends(get_symbols_service)
 ):
     """Delete all symbols"""
-    return service.delete_all_symbols({"id": current_user.id})
+    return await run_db("symbols", service.delete_all_symbols, {"id": current_user.id})
 
 
 @router.post("/delete/bulk")
@@ -152,7 +157,7 @@ async def bulk_delete_symbols(
     service: SymbolsService = Depends(get_symbols_service)
 ):
     """Delete multiple symbols"""
-    return service.bulk_delete(request.ids)
+    return await run_db("symbols", service.bulk_delete, request.ids)
 
 @router.patch("/status/bulk")
 async def bulk_update_status(
@@ -163,7 +168,7 @@ async def bulk_update_status(
     """Update status for multiple symbols"""
     if request.status.upper() not in ["ACTIVE", "INACTIVE"]:
          raise HTTPException(status_code=400, detail="Invalid status")
-    return service.bulk_update_status(request.ids, request.status.upper())
+    return await run_db("symbols", service.bulk_update_status, request.ids, request.status.upper())
 
 @router.get("/stats")
 async def get_stats(
@@ -171,7 +176,7 @@ async def get_stats(
     service: SymbolsService = Depends(get_symbols_service)
 ):
     """Get symbols statistics"""
-    return service.get_stats()
+    return await run_db("symbols", service.get_stats)
 
 @router.get("/template")
 async def get_template(current_user: User = Depends(get_admin_user)):
@@ -191,58 +196,66 @@ async def get_template(current_user: User = Depends(get_admin_user)):
 
 # --- Script Endpoints ---
 
+def _script_response(r) -> ScriptResponse:
+    run_count = r[9] or 0
+    return ScriptResponse(
+        id=r[0], name=r[1], description=r[2], content=r[3], version=r[4], created_by=r[5], created_at=r[6],
+        updated_at=r[7], last_used_at=r[8], run_count=run_count,
+        avg_run_ms=(r[10] or 0) / run_count if run_count else None, last_run_ms=r[11], max_run_ms=r[12]
+    )
+
 @router.get("/scripts", response_model=List[ScriptResponse])
 async def get_scripts(service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
     return [
-        ScriptResponse(id=r[0], name=r[1], description=r[2], content=r[3], version=r[4], created_by=r[5], created_at=r[6], updated_at=r[7], last_used_at=r[8])
-        for r in service.get_scripts()
+        _script_response(r)
+        for r in await run_db("symbols", service.get_scripts)
     ]
 
 @router.get("/scripts/{script_id}", response_model=ScriptResponse)
 async def get_script(script_id: int, service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
-    r = service.get_script(script_id)
+    r = await run_db("symbols", service.get_script, script_id)
     if not r: raise HTTPException(status_code=404, detail="Script not found")
-    return ScriptResponse(id=r[0], name=r[1], description=r[2], content=r[3], version=r[4], created_by=r[5], created_at=r[6], updated_at=r[7], last_used_at=r[8])
+    return _script_response(r)
 
 @router.post("/scripts", response_model=ScriptResponse)
 async def create_script(script_data: ScriptCreate, service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
     try:
-        r = service.create_script(script_data.dict(), current_user.id)
-        return ScriptResponse(id=r[0], name=r[1], description=r[2], content=r[3], version=r[4], created_by=r[5], created_at=r[6], updated_at=r[7], last_used_at=r[8])
+        r = await run_db("symbols", service.create_script, script_data.dict(), current_user.id)
+        return _script_response(r)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/scripts/{script_id}", response_model=ScriptResponse)
 async def update_script(script_id: int, script_data: ScriptUpdate, service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
     try:
-        r = service.update_script(script_id, script_data.dict(exclude_unset=True))
-        return ScriptResponse(id=r[0], name=r[1], description=r[2], content=r[3], version=r[4], created_by=r[5], created_at=r[6], updated_at=r[7], last_used_at=r[8])
+        r = await run_db("symbols", service.update_script, script_id, script_data.dict(exclude_unset=True))
+        return _script_response(r)
     except ValueError as e:
         raise HTTPException(status_code=404 if "not found" in str(e) else 400, detail=str(e))
 
 @router.delete("/scripts/{script_id}")
 async def delete_script(script_id: int, service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
-    service.delete_script(script_id)
+    await run_db("symbols", service.delete_script, script_id)
     return {"message": "Script deleted"}
 
 # --- Scheduler Endpoints ---
 
 @router.get("/schedulers", response_model=List[SchedulerResponse])
 async def get_schedulers(service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
-    return service.get_schedulers()
+    return await run_db("symbols", service.get_schedulers)
 
 @router.post("/schedulers", response_model=SchedulerResponse)
 async def create_scheduler(data: SchedulerCreate, service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
-    r = service.create_scheduler(data.dict(), current_user.id)
+    r = await run_db("symbols", service.create_scheduler, data.dict(), current_user.id)
     return r
 
 @router.put("/schedulers/{scheduler_id}", response_model=SchedulerResponse)
 async def update_scheduler(scheduler_id: int, data: SchedulerUpdate, service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
-    r = service.update_scheduler(scheduler_id, data.dict(exclude_unset=True))
+    r = await run_db("symbols", service.update_scheduler, scheduler_id, data.dict(exclude_unset=True))
     if not r: raise HTTPException(status_code=404, detail="Scheduler not found")
     return r
 
 @router.delete("/schedulers/{scheduler_id}")
 async def delete_scheduler(scheduler_id: int, service: SymbolsService = Depends(get_symbols_service), current_user: User = Depends(get_admin_user)):
-    service.delete_scheduler(scheduler_id)
+    await run_db("symbols", service.delete_scheduler, scheduler_id)
     return {"message": "Scheduler deleted"}
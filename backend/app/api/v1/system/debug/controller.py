@@ -5,7 +5,7 @@ import os
 import logging
 import json
 
-from app.core.database import get_db
+from app.core.database import get_db, get_duckdb_registry
 from app.core.config import settings
 from app.models.connection import Connection
 from app.core.auth.security import decrypt_data
@@ -25,6 +25,7 @@ async def db_diagnostic(db: Session = Depends(get_db)):
         
         result = {
             "data_dir": settings.DATA_DIR,
+            "duckdb_registry": get_duckdb_registry().get_stats(),
             "user_connections": []
         }
         
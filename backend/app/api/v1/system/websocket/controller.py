@@ -13,6 +13,7 @@ from app.core.websocket.manager import manager
 from app.core.database import get_db
 from app.core.auth.permissions import get_current_user_from_token
 from app.models.user import User
+from app.services.presence_service import get_presence_service
 
 router = APIRouter()
 
@@ -70,6 +71,8 @@ async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
     
     # Connect user
     await manager.connect(websocket, user_id)
+    presence = get_presence_service()
+    presence.record(user_id)
     
     try:
         # Send welcome message
@@ -85,6 +88,7 @@ async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
             try:
                 # Wait for messages (with timeout to allow periodic checks)
                 data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
+                presence.record(user_id)
                 
                 try:
                     message = json.loads(data)
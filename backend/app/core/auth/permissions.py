@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import List
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.user import User
 from app.core.auth.security import decode_access_token
+from app.core.auth.user_cache import get_user_cache
+from app.services.presence_service import get_presence_service
 from datetime import datetime, timezone, timedelta
 
 security = HTTPBearer()
@@ -13,22 +15,7 @@ security = HTTPBearer()
 _last_permission_log = {}
 PERMISSION_LOG_THROTTLE_SECONDS = 60  # Only log once per minute per user
 
-def _ensure_aware(dt: Optional[datetime]) -> Optional[datetime]:
-    if dt and dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    return dt
-
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-    
+def _resolve_user(token: str, db: Session, log_label: str) -> User:
     payload = decode_access_token(token)
     if not payload:
         raise HTTPException(
@@ -43,20 +30,25 @@ def get_current_user(
             detail="Invalid token"
         )
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+    cache = get_user_cache()
+    cache_key = (username, payload.get("iat"))
+    user = cache.get(db, cache_key)
+    cached = user is not None
+    if not cached:
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
     
     # CRITICAL: Check for Super User FIRST - bypass ALL status checks
     user_role_lower = user.role.lower() if user.role else ""
     is_super_admin = user_role_lower == "super_admin"
+    now = datetime.now(timezone.utc)
     
     if is_super_admin:
         # Throttle permission logs to avoid spam on every API call
-        now = datetime.now(timezone.utc)
         should_log = True
         if user.username in _last_permission_log:
             time_since_log = now - _last_permission_log[user.username]
@@ -65,56 +57,49 @@ def get_current_user(
         
         if should_log:
             _last_permission_log[user.username] = now
-            print(f"[PERMISSIONS] [SUPER_USER] Access granted for: {user.username}")
+            print(f"[PERMISSIONS] [SUPER_USER] {log_label} granted for: {user.username}")
         
         # Force activate and normalize role (safety mechanism)
+        needs_commit = False
         if not user.is_active:
             print(f"[PERMISSIONS] [SUPER_USER] WARNING: User was inactive - auto-activating")
             user.is_active = True
+            needs_commit = True
         
         if user.role.lower() != "super_admin":
             print(f"[PERMISSIONS] [SUPER_USER] WARNING: Role mismatch - normalizing to super_admin")
             user.role = "super_admin"
+            needs_commit = True
         
-        # Update last_active_at (throttled: only if last update was > 1 minute ago)
-        now = datetime.now(timezone.utc)
-        should_update = True
-        if user.last_active_at:
-            last_active = _ensure_aware(user.last_active_at)
-            time_since_update = now - last_active
-            if time_since_update < timedelta(minutes=1):
-                should_update = False
-        
-        if should_update:
-            user.last_active_at = now
+        if needs_commit:
             db.commit()
-        else:
-            db.commit()  # Still commit role/is_active changes
-        
-        return user
     
     # For non-Super Users: Check is_active status
-    if not user.is_active:
+    elif not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User is inactive"
         )
     
-    # Update last_active_at for authenticated API calls (throttled: only if last update was > 1 minute ago)
-    now = datetime.now(timezone.utc)
-    should_update = True
-    if user.last_active_at:
-        last_active = _ensure_aware(user.last_active_at)
-        time_since_update = now - last_active
-        if time_since_update < timedelta(minutes=1):
-            should_update = False
-    
-    if should_update:
-        user.last_active_at = now
-        db.commit()
+    if not cached:
+        cache.put(cache_key, user)
     
+    # Written by the presence flusher instead of a COMMIT per request
+    get_presence_service().record_activity(user, now)
     return user
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return _resolve_user(token, db, "Access")
+
 def require_roles(allowed_roles: List[str]):
     def role_checker(current_user: User = Depends(get_current_user)) -> User:
         # Normalize roles for case-insensitive comparison
@@ -137,88 +122,4 @@ def get_super_admin(current_user: User = Depends(require_roles(["super_admin"]))
 
 # Helper function for token-based auth (used in auth endpoints)
 def get_current_user_from_token(token: str, db: Session) -> User:
-    payload = decode_access_token(token)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    username: str = payload.get("sub")
-    if username is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    
-    # CRITICAL: Check for Super User FIRST - bypass ALL status checks
-    user_role_lower = user.role.lower() if user.role else ""
-    is_super_admin = user_role_lower == "super_admin"
-    
-    if is_super_admin:
-        # Throttle permission logs to avoid spam
-        now = datetime.now(timezone.utc)
-        should_log = True
-        if user.username in _last_permission_log:
-            time_since_log = now - _last_permission_log[user.username]
-            if time_since_log < timedelta(seconds=PERMISSION_LOG_THROTTLE_SECONDS):
-                should_log = False
-        
-        if should_log:
-            _last_permission_log[user.username] = now
-            print(f"[PERMISSIONS] [SUPER_USER] Token access granted for: {user.username}")
-        
-        # Force activate and normalize role (safety mechanism)
-        if not user.is_active:
-            print(f"[PERMISSIONS] [SUPER_USER] WARNING: User was inactive - auto-activating")
-            user.is_active = True
-        
-        if user.role.lower() != "super_admin":
-            print(f"[PERMISSIONS] [SUPER_USER] WARNING: Role mismatch - normalizing to super_admin")
-            user.role = "super_admin"
-        
-        # Update last_active_at (throttled: only if last update was > 1 minute ago)
-        now = datetime.now(timezone.utc)
-        should_update = True
-        if user.last_active_at:
-            last_active = _ensure_aware(user.last_active_at)
-            time_since_update = now - last_active
-            if time_since_update < timedelta(minutes=1):
-                should_update = False
-        
-        if should_update:
-            user.last_active_at = now
-            db.commit()
-        else:
-            db.commit()  # Still commit role/is_active changes
-        
-        return user
-    
-    # For non-Super Users: Check is_active status
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="User is inactive"
-        )
-    
-    # Update last_active_at for authenticated API calls (throttled: only if last update was > 1 minute ago)
-    now = datetime.now(timezone.utc)
-    should_update = True
-    if user.last_active_at:
-        last_active = _ensure_aware(user.last_active_at)
-        time_since_update = now - last_active
-        if time_since_update < timedelta(minutes=1):
-            should_update = False
-    
-    if should_update:
-        user.last_active_at = now
-        db.commit()
-    
-    return user
+    return _resolve_user(token, db, "Token access")
@@ -51,11 +51,13 @@ def get_password_hash(password: str) -> str:
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, is_system: bool = False) -> str:
     """Create JWT access token for users or system services"""
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # iat keys the authenticated-user cache per token
+    to_encode.update({"exp": expire, "iat": now})
     
     # Use different secret for system tokens
     secret_key = settings.JWT_SYSTEM_SECRET_KEY if is_system else settings.JWT_SECRET_KEY
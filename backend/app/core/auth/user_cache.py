@@ -0,0 +1,73 @@
+"""
+Cache of authenticated users for get_current_user
+
+Every authenticated request used to SELECT its user. Resolved users are kept for
+USER_CACHE_TTL_SECONDS, keyed by (username, token iat), as detached
+snapshots that are merged into the request's session without a query.
+Services that change a user (profile, role, status, password, Telegram
+link, deletion) call invalidate_user() so the next request reads the row
+again. Activity (last_active_at) is tracked by the presence service.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+
+class UserCache:
+    """TTL cache of users by (username, token iat)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, Any], Tuple[float, User]] = {}
+
+    def get(self, db: Session, key: Tuple[str, Any]) -> Optional[User]:
+        """The cached user attached to db (no SELECT), or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] >= settings.USER_CACHE_TTL_SECONDS:
+                del self._entries[key]
+                entry = None
+        if entry is None:
+            return None
+        return db.merge(entry[1], load=False)
+
+    def put(self, key: Tuple[str, Any], user: User):
+        """Cache a detached copy of a freshly loaded user"""
+        values = {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+        snapshot = User(**values)
+        make_transient_to_detached(snapshot)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) > 1000:
+                ttl = settings.USER_CACHE_TTL_SECONDS
+                self._entries = {k: v for k, v in self._entries.items() if now - v[0] < ttl}
+            self._entries[key] = (now, snapshot)
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token of a user"""
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if v[1].id != user_id}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_user_cache = UserCache()
+
+
+def get_user_cache() -> UserCache:
+    """Get the process-wide user cache"""
+    return _user_cache
+
+
+def invalidate_user(user_id: Optional[int]):
+    """Make the next request of this user read it from the database again"""
+    if user_id is not None:
+        _user_cache.invalidate_user(user_id)
@@ -46,6 +46,68 @@ class Settings(BaseSettings):
     RATE_LIMIT_ADMIN_CREATE_REQUEST: str = "200/minute"
     RATE_LIMIT_ADMIN_CREATE_AI_CONFIG: str = "200/minute"
     
+    # Screener scraping engine
+    # Fetch workers share a per-host token bucket, so throughput follows the allowed request rate
+    SCREENER_FETCH_WORKERS: int = 4
+    SCREENER_REQUESTS_PER_SECOND: float = 1.0
+    SCREENER_RATE_BURST: int = 4
+    # Conditional requests + body hash; unchanged pages skip parsing and DB writes
+    SCREENER_PAGE_CACHE_ENABLED: bool = True
+    # Metrics are upserted on their natural key; optionally keep old/new values when a value changes
+    SCREENER_TRACK_VALUE_CHANGES: bool = False
+    # Per-symbol detailed logs are buffered and written in batches
+    SCREENER_LOG_FLUSH_EVENTS: int = 50
+    SCREENER_LOG_FLUSH_INTERVAL_MS: int = 1000
+    
+    # Admin symbol search is served from an in-memory trigram/prefix index rebuilt after writes
+    SYMBOL_SEARCH_INDEX_ENABLED: bool = True
+    
+    # List endpoints page with keyset cursors; totals are cached for this long
+    LIST_COUNT_CACHE_TTL_SECONDS: int = 30
+    
+    # Symbol schedulers: how many schedulers run at once, and default concurrent source
+    # downloads per scheduler (overridable per scheduler). Uploads are always applied one at a time.
+    SCHEDULER_MAX_CONCURRENT_RUNS: int = 2
+    SCHEDULER_MAX_PARALLEL_DOWNLOADS: int = 4
+    # Conditional GET (ETag/Last-Modified) + content hash per source; unchanged files log NO_CHANGE and skip the upsert
+    SCHEDULER_CONDITIONAL_DOWNLOADS: bool = True
+    
+    # Transformation scripts run in this many worker processes (0 = in the API process)
+    SCRIPT_WORKER_PROCESSES: int = 2
+    # A script running longer is stopped by terminating the worker pool (worker processes only)
+    SCRIPT_TIMEOUT_SECONDS: int = 60
+    
+    # Auth database (SQLite/PostgreSQL) connection pool; a connection's config can override these
+    AUTH_DB_POOL_SIZE: int = 10
+    AUTH_DB_MAX_OVERFLOW: int = 20
+    AUTH_DB_POOL_TIMEOUT: int = 30
+    AUTH_DB_POOL_RECYCLE: int = 1800
+    AUTH_DB_POOL_PRE_PING: bool = True
+    # SQLite auth database: WAL journal, synchronous level and lock wait (ms)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    
+    # Authenticated users are cached per token for this long
+    USER_CACHE_TTL_SECONDS: int = 30
+    # User activity is kept in memory and written every PRESENCE_FLUSH_SECONDS;
+    # users active within PRESENCE_ONLINE_SECONDS count as online
+    PRESENCE_FLUSH_SECONDS: int = 5
+    PRESENCE_ONLINE_SECONDS: int = 300
+    
+    # Blocking DB calls from async handlers go through run_db(): this many threads per database.
+    # DB_LOOP_GUARD reports DuckDB checkouts on the event loop thread: off | warn | raise
+    DB_EXECUTOR_WORKERS_PER_DATABASE: int = 4
+    DB_LOOP_GUARD: str = "warn"
+    
+    # Attachments of new announcements are prefetched by this many threads from a bounded
+    # queue; on-demand downloads (first view) have their own threads
+    ATTACHMENT_PREFETCH_WORKERS: int = 2
+    ATTACHMENT_PREFETCH_QUEUE_SIZE: int = 1000
+    ATTACHMENT_FETCH_WORKERS: int = 4
+    # The attachment endpoint gives up waiting on a download after this long
+    ATTACHMENT_FETCH_TIMEOUT_SECONDS: int = 180
+    
     # TrueData Connection Defaults
     TRUEDATA_DEFAULT_AUTH_URL: str = "https://auth.truedata.in/token"
     TRUEDATA_DEFAULT_WEBSOCKET_PORT: str = "8086"
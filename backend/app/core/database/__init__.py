@@ -5,6 +5,8 @@ from typing import Optional, Generator
 from sqlalchemy.orm import declarative_base, Session
 from .connection_manager import ConnectionManager
 from .router import DatabaseRouter
+from .duckdb_registry import DuckDBConnectionRegistry, get_duckdb_registry
+from .db_executor import get_db_executor, run_db, allow_blocking_db
 from app.core.config import settings
 
 # SQLAlchemy Base for models
@@ -79,4 +81,9 @@ __all__ = [
     "reset_connection_manager",
     "ConnectionManager",
     "DatabaseRouter",
+    "DuckDBConnectionRegistry",
+    "get_duckdb_registry",
+    "get_db_executor",
+    "run_db",
+    "allow_blocking_db",
 ]
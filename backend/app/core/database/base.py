@@ -1,9 +1,27 @@
 """
 Abstract base class for database clients
 """
+import threading
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
+from app.core.config import settings
+
+
+def pool_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    SQLAlchemy QueuePool settings for a client; a connection's config can
+    override the AUTH_DB_POOL_* defaults (pool_size, max_overflow, ...).
+    """
+    return {
+        "pool_size": int(config.get("pool_size", settings.AUTH_DB_POOL_SIZE)),
+        "max_overflow": int(config.get("max_overflow", settings.AUTH_DB_MAX_OVERFLOW)),
+        "pool_timeout": float(config.get("pool_timeout", settings.AUTH_DB_POOL_TIMEOUT)),
+        "pool_recycle": int(config.get("pool_recycle", settings.AUTH_DB_POOL_RECYCLE)),
+        "pool_pre_ping": bool(config.get("pool_pre_ping", settings.AUTH_DB_POOL_PRE_PING)),
+    }
 
 class DatabaseClient(ABC):
     """Base interface for all database clients"""
@@ -12,6 +30,37 @@ class DatabaseClient(ABC):
         self.config = config
         self.connection = None
         self.is_connected = False
+        self._pool_counters = {"connects": 0, "checkouts": 0, "invalidated": 0}
+        self._pool_lock = threading.Lock()
+    
+    def _track_pool(self, engine: Engine):
+        """Count new connections, checkouts and invalidations of an engine's pool"""
+        def count(name):
+            def listener(*args):
+                with self._pool_lock:
+                    self._pool_counters[name] += 1
+            return listener
+        event.listen(engine, "connect", count("connects"))
+        event.listen(engine, "checkout", count("checkouts"))
+        event.listen(engine, "invalidate", count("invalidated"))
+    
+    def pool_stats(self) -> Optional[Dict[str, Any]]:
+        """Connection pool usage of the client's SQLAlchemy engine, if it has one"""
+        engine = getattr(self, "engine", None)
+        if engine is None:
+            return None
+        pool = engine.pool
+        stats: Dict[str, Any] = {"pool": type(pool).__name__}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            value = getattr(pool, name, None)
+            if callable(value):
+                stats[name] = value()
+        timeout = getattr(pool, "timeout", None)
+        if callable(timeout):
+            stats["timeout"] = timeout()
+        with self._pool_lock:
+            stats.update(self._pool_counters)
+        return stats
     
     @abstractmethod
     def connect(self) -> bool:
@@ -0,0 +1,166 @@
+"""
+Execution layer for blocking database work called from async code
+
+DuckDB repositories are synchronous. Calling them straight from an async
+FastAPI handler blocks the event loop for the whole query, stalling every
+WebSocket served by the same worker. Async handlers run repository/service
+calls through run_db() instead, which uses a small bounded thread pool per
+database: a slow screener query queues behind other screener work but never
+delays symbols or announcements requests, and none of them block the loop.
+
+check_not_on_event_loop() is called by the DuckDB registry on every checkout
+and reports database work done on the event loop thread (DB_LOOP_GUARD:
+"off", "warn" logs each call site once, "raise" fails the call; the test
+suite runs with "raise"). Application startup and shutdown run inside
+allow_blocking_db(), since no requests are being served then.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_GUARD_SKIP_DIRS = (
+    os.path.join("app", "core", "database"),
+    os.path.join("app", "repositories"),
+)
+
+
+class BlockingDatabaseCallError(RuntimeError):
+    """A synchronous database call was made on the event loop thread"""
+
+
+class DBExecutor:
+    """Bounded thread pools for blocking database calls, one pool per database"""
+
+    def __init__(self, workers_per_database: int):
+        self.workers_per_database = max(1, workers_per_database)
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, database: str) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(database)
+            if pool is None:
+                pool = self._pools[database] = ThreadPoolExecutor(
+                    max_workers=self.workers_per_database,
+                    thread_name_prefix=f"db-{database}"
+                )
+                self._stats[database] = {"calls": 0, "queued": 0, "running": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+            return pool
+
+    async def run(self, database: str, func: Callable[..., T], *args, **kwargs) -> T:
+        """Run func(*args, **kwargs) on the database's pool and await the result"""
+        pool = self._pool(database)
+        stats = self._stats[database]
+        submitted = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def call():
+            wait_ms = (time.perf_counter() - submitted) * 1000
+            with self._lock:
+                stats["queued"] -= 1
+                stats["running"] += 1
+                stats["total_wait_ms"] += wait_ms
+                if wait_ms > stats["max_wait_ms"]:
+                    stats["max_wait_ms"] = wait_ms
+            try:
+                return context.run(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    stats["running"] -= 1
+
+        with self._lock:
+            stats["calls"] += 1
+            stats["queued"] += 1
+        return await asyncio.get_running_loop().run_in_executor(pool, call)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                database: {
+                    **stats,
+                    "workers": self.workers_per_database,
+                    "avg_wait_ms": round(stats["total_wait_ms"] / stats["calls"], 2) if stats["calls"] else 0.0,
+                    "total_wait_ms": round(stats["total_wait_ms"], 2),
+                    "max_wait_ms": round(stats["max_wait_ms"], 2),
+                }
+                for database, stats in self._stats.items()
+            }
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[DBExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> DBExecutor:
+    """Get the process-wide database executor"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DBExecutor(settings.DB_EXECUTOR_WORKERS_PER_DATABASE)
+        return _executor
+
+
+async def run_db(database: str, func: Callable[..., T], *args, **kwargs) -> T:
+    """Await a blocking repository/service call on the pool of the given database"""
+    return await get_db_executor().run(database, func, *args, **kwargs)
+
+
+_reported_sites = set()
+_blocking_allowed = 0
+
+
+@contextmanager
+def allow_blocking_db() -> Iterator[None]:
+    """Permit database work on the event loop (startup/shutdown, before and after serving requests)"""
+    global _blocking_allowed
+    _blocking_allowed += 1
+    try:
+        yield
+    finally:
+        _blocking_allowed -= 1
+
+
+def check_not_on_event_loop(what: str):
+    """Report (or refuse) blocking database work on a thread that runs an event loop"""
+    mode = settings.DB_LOOP_GUARD
+    if mode == "off" or _blocking_allowed:
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    # The first frame outside the database layer is the offending call site
+    stack = traceback.extract_stack()[:-1]
+    site = next(
+        (frame for frame in reversed(stack) if not any(d in frame.filename for d in _GUARD_SKIP_DIRS)),
+        stack[-1]
+    )
+    message = f"Blocking database call ({what}) on the event loop at {site.filename}:{site.lineno} in {site.name}; use run_db()"
+    if mode == "raise":
+        raise BlockingDatabaseCallError(message)
+    key = (site.filename, site.lineno)
+    if key not in _reported_sites:
+        _reported_sites.add(key)
+        logger.warning(message)
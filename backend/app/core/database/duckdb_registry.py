@@ -0,0 +1,251 @@
+"""
+Process-wide DuckDB connection registry
+
+Opening a DuckDB file is expensive (file open, WAL replay, catalog load), so
+repositories should not call duckdb.connect() per request. The registry keeps a
+single long-lived writer connection per database file and hands out cheap
+.cursor() children to callers. Closing a checked-out cursor only closes the
+child; the parent stays open until close()/close_all() is called.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import duckdb
+
+from app.core.database.db_executor import check_not_on_event_loop
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {'allow_unsigned_extensions': True}
+
+LOCK_ERROR_SIGNALS = (
+    "lock",
+    "resource temporarily unavailable",
+    "permission denied",
+    "being used by another process",
+    "cannot open file",
+)
+
+
+def is_lock_error(error: Exception) -> bool:
+    """Return True if a DuckDB error was caused by another process holding the file"""
+    err_msg = str(error).lower()
+    return any(signal in err_msg for signal in LOCK_ERROR_SIGNALS)
+
+
+class DuckDBConnectionRegistry:
+    """Long-lived DuckDB connections shared by all repositories in the process"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, max_retries: int = 3, retry_delay: float = 0.5, health_check_interval: float = 30.0):
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.health_check_interval = health_check_interval
+        self._parents: Dict[str, duckdb.DuckDBPyConnection] = {}
+        self._last_health_check: Dict[str, float] = {}
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._registry_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "DuckDBConnectionRegistry":
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    def _key(self, db_path: str) -> str:
+        return os.path.abspath(db_path)
+
+    def _path_lock(self, key: str) -> threading.Lock:
+        with self._registry_lock:
+            if key not in self._path_locks:
+                self._path_locks[key] = threading.Lock()
+                self._stats[key] = {
+                    "checkouts": 0,
+                    "opens": 0,
+                    "reopens": 0,
+                    "lock_retries": 0,
+                    "read_only_fallbacks": 0,
+                    "failures": 0,
+                    "total_checkout_ms": 0.0,
+                    "max_checkout_ms": 0.0,
+                }
+            return self._path_locks[key]
+
+    def _open_parent(self, key: str, on_open: Optional[Callable[[duckdb.DuckDBPyConnection], None]]) -> duckdb.DuckDBPyConnection:
+        """Open the writer connection for a file, retrying while another process holds the lock"""
+        stats = self._stats[key]
+        retry_delay = self.retry_delay
+        for attempt in range(self.max_retries):
+            try:
+                db_dir = os.path.dirname(key)
+                if db_dir:
+                    os.makedirs(db_dir, exist_ok=True)
+                conn = duckdb.connect(key, read_only=False, config=DEFAULT_CONFIG)
+                conn.execute("PRAGMA enable_progress_bar=false")
+                if on_open:
+                    on_open(conn)
+                stats["opens"] += 1
+                logger.info(f"[DuckDBRegistry] Opened shared connection to {key}")
+                return conn
+            except Exception as e:
+                if is_lock_error(e) and attempt < self.max_retries - 1:
+                    stats["lock_retries"] += 1
+                    logger.warning(f"[DuckDBRegistry] {key} is locked (attempt {attempt + 1}/{self.max_retries}), retrying in {retry_delay}s...")
+                    time.sleep(retry_delay)
+                    retry_delay *= 2
+                    continue
+                raise
+
+    def _is_healthy(self, cursor: duckdb.DuckDBPyConnection) -> bool:
+        try:
+            cursor.execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            return False
+
+    def get_connection(
+        self,
+        db_path: str,
+        on_open: Optional[Callable[[duckdb.DuckDBPyConnection], None]] = None,
+        read_only_fallback: bool = False,
+    ) -> duckdb.DuckDBPyConnection:
+        """
+        Check out a cursor on the shared connection for db_path.
+
+        on_open runs once on the parent connection whenever it is (re)opened, so
+        per-database setup (PRAGMAs, default rows) is not repeated per checkout.
+        If read_only_fallback is set and the file is locked by another process,
+        a standalone read-only connection is returned instead; it is not pooled,
+        so the next checkout tries the writer connection again.
+        The caller must close() the returned connection.
+        """
+        check_not_on_event_loop(f"DuckDB {os.path.basename(db_path)}")
+        key = self._key(db_path)
+        started = time.perf_counter()
+        with self._path_lock(key):
+            stats = self._stats[key]
+            try:
+                cursor = None
+                parent = self._parents.get(key)
+                if parent is not None:
+                    try:
+                        cursor = parent.cursor()
+                    except Exception:
+                        cursor = None
+                    now = time.monotonic()
+                    if cursor is not None and now - self._last_health_check.get(key, 0.0) >= self.health_check_interval:
+                        if self._is_healthy(cursor):
+                            self._last_health_check[key] = now
+                        else:
+                            cursor.close()
+                            cursor = None
+                    if cursor is None:
+                        logger.warning(f"[DuckDBRegistry] Shared connection to {key} is unhealthy, reopening")
+                        self._close_parent(key)
+                        stats["reopens"] += 1
+
+                if cursor is None:
+                    try:
+                        parent = self._open_parent(key, on_open)
+                    except Exception as e:
+                        if read_only_fallback and is_lock_error(e):
+                            stats["read_only_fallbacks"] += 1
+                            logger.warning(f"[DuckDBRegistry] {key} is locked by another process. Falling back to READ-ONLY mode.")
+                            conn = duckdb.connect(key, read_only=True, config=DEFAULT_CONFIG)
+                            conn.execute("PRAGMA enable_progress_bar=false")
+                            return conn
+                        raise
+                    self._parents[key] = parent
+                    self._last_health_check[key] = time.monotonic()
+                    cursor = parent.cursor()
+                return cursor
+            except Exception as e:
+                stats["failures"] += 1
+                logger.error(f"[DuckDBRegistry] Failed to check out connection to {key}: {e}")
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                stats["checkouts"] += 1
+                stats["total_checkout_ms"] += elapsed_ms
+                if elapsed_ms > stats["max_checkout_ms"]:
+                    stats["max_checkout_ms"] = elapsed_ms
+
+    @contextmanager
+    def connection(self, db_path: str, **kwargs) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Context manager that checks out a cursor and closes it afterwards"""
+        conn = self.get_connection(db_path, **kwargs)
+        try:
+            yield conn
+        finally:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _close_parent(self, key: str):
+        parent = self._parents.pop(key, None)
+        self._last_health_check.pop(key, None)
+        if parent is not None:
+            try:
+                parent.close()
+            except Exception:
+                pass
+
+    def close(self, db_path: str):
+        """Close the shared connection for a single database file"""
+        key = self._key(db_path)
+        with self._path_lock(key):
+            self._close_parent(key)
+
+    def close_all(self):
+        """Close every shared connection (call on shutdown)"""
+        for key in list(self._parents.keys()):
+            with self._path_lock(key):
+                self._close_parent(key)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Checkout latency and connection lifecycle counters per database file"""
+        with self._registry_lock:
+            result = {}
+            for key, stats in self._stats.items():
+                checkouts = stats["checkouts"]
+                result[key] = {
+                    **stats,
+                    "open": key in self._parents,
+                    "avg_checkout_ms": round(stats["total_checkout_ms"] / checkouts, 3) if checkouts else 0.0,
+                }
+            return result
+
+    def health_check(self) -> Dict[str, Any]:
+        """Run SELECT 1 on every open shared connection"""
+        databases = {}
+        for key in list(self._parents.keys()):
+            with self._path_lock(key):
+                parent = self._parents.get(key)
+                if parent is None:
+                    continue
+                try:
+                    cursor = parent.cursor()
+                    healthy = self._is_healthy(cursor)
+                    cursor.close()
+                except Exception:
+                    healthy = False
+                databases[key] = "healthy" if healthy else "unhealthy"
+        return {
+            "type": "duckdb_registry",
+            "databases": databases,
+            "status": "healthy" if all(s == "healthy" for s in databases.values()) else "unhealthy",
+        }
+
+
+def get_duckdb_registry() -> DuckDBConnectionRegistry:
+    """Get the process-wide DuckDB connection registry"""
+    return DuckDBConnectionRegistry.get_instance()
@@ -1,10 +1,10 @@
 """
 PostgreSQL database client
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Dict, Any, Optional
-from app.core.database.base import DatabaseClient
+from app.core.database.base import DatabaseClient, pool_options
 
 class PostgreSQLClient(DatabaseClient):
     """PostgreSQL database client implementation"""
@@ -26,11 +26,12 @@ class PostgreSQLClient(DatabaseClient):
                 f"postgresql://{self.username}:{self.password}"
                 f"@{self.host}:{self.port}/{self.database}"
             )
-            self.engine = create_engine(connection_string)
+            self.engine = create_engine(connection_string, **pool_options(self.config))
+            self._track_pool(self.engine)
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
             # Test connection
             with self.engine.connect() as conn:
-                conn.execute("SELECT 1")
+                conn.execute(text("SELECT 1"))
             self.is_connected = True
             return True
         except Exception as e:
@@ -56,7 +57,6 @@ class PostgreSQLClient(DatabaseClient):
                 if not self.connect():
                     return False
             with self.SessionLocal() as session:
-                from sqlalchemy import text
                 session.execute(text("SELECT 1"))
             return True
         except Exception:
@@ -88,5 +88,6 @@ class PostgreSQLClient(DatabaseClient):
             "connected": self.is_connected,
             "host": self.host,
             "database": self.database,
-            "status": "healthy" if self.test_connection() else "unhealthy"
+            "status": "healthy" if self.test_connection() else "unhealthy",
+            "pool": self.pool_stats()
         }
@@ -2,10 +2,11 @@
 SQLite database client
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Dict, Any, Optional
-from app.core.database.base import DatabaseClient
+from app.core.config import settings
+from app.core.database.base import DatabaseClient, pool_options
 
 class SQLiteClient(DatabaseClient):
     """SQLite database client implementation"""
@@ -30,10 +31,27 @@ class SQLiteClient(DatabaseClient):
             if db_dir:  # Only create directory if path has a directory component
                 os.makedirs(db_dir, exist_ok=True)
             
+            busy_timeout_ms = int(self.config.get("busy_timeout_ms", settings.SQLITE_BUSY_TIMEOUT_MS))
+            journal_mode = self.config.get("journal_mode", settings.SQLITE_JOURNAL_MODE)
+            synchronous = self.config.get("synchronous", settings.SQLITE_SYNCHRONOUS)
             self.engine = create_engine(
                 f"sqlite:///{self.db_path}",
-                connect_args={"check_same_thread": False}
+                connect_args={"check_same_thread": False, "timeout": busy_timeout_ms / 1000},
+                **pool_options(self.config)
             )
+            
+            @event.listens_for(self.engine, "connect")
+            def _configure_connection(dbapi_connection, connection_record):
+                # WAL lets readers run alongside the single writer; NORMAL is durable in WAL mode
+                # except for the last transactions on power loss. busy_timeout makes writers wait
+                # for the lock instead of failing with "database is locked".
+                cursor = dbapi_connection.cursor()
+                cursor.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+                cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+                cursor.execute(f"PRAGMA synchronous = {synchronous}")
+                cursor.close()
+            
+            self._track_pool(self.engine)
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
             self.is_connected = True
             return True
@@ -99,9 +117,20 @@ class SQLiteClient(DatabaseClient):
     
     def health_check(self) -> Dict[str, Any]:
         """Check SQLite health"""
+        status = "healthy" if self.test_connection() else "unhealthy"
         return {
             "type": "sqlite",
             "connected": self.is_connected,
             "path": self.db_path,
-            "status": "healthy" if self.test_connection() else "unhealthy"
+            "status": status,
+            "journal_mode": self._pragma("journal_mode") if status == "healthy" else None,
+            "pool": self.pool_stats()
         }
+    
+    def _pragma(self, name: str) -> Optional[str]:
+        try:
+            with self.engine.connect() as conn:
+                from sqlalchemy import text
+                return str(conn.execute(text(f"PRAGMA {name}")).scalar())
+        except Exception:
+            return None
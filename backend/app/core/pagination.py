@@ -0,0 +1,104 @@
+"""
+Keyset (cursor) pagination helpers
+
+List endpoints page with an opaque cursor holding the sort key of the last row
+returned, so page N costs the same as page 1 instead of scanning and skipping
+OFFSET rows. Exact totals are optional and cached for a short time, so paging
+through a large result set doesn't repeat the COUNT(*) on every request.
+"""
+import base64
+import json
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort key of the last row on a page"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort key values from a cursor; raises ValueError for cursors this API did not issue"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        return [_decode_value(v) for v in values]
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def keyset_predicate(sort_column: str, tiebreak_column: str, sort_value: Any, tiebreak_value: Any,
+                     descending: bool = True) -> Tuple[str, List[Any]]:
+    """
+    WHERE clause selecting rows after (sort_value, tiebreak_value) for
+    ORDER BY sort_column [DESC] NULLS LAST, tiebreak_column [DESC].
+    """
+    op = "<" if descending else ">"
+    if sort_value is None:
+        return f"({sort_column} IS NULL AND {tiebreak_column} {op} ?)", [tiebreak_value]
+    return (
+        f"({sort_column} {op} ? OR ({sort_column} = ? AND {tiebreak_column} {op} ?) OR {sort_column} IS NULL)",
+        [sort_value, sort_value, tiebreak_value],
+    )
+
+
+class CountCache:
+    """Short-lived cache of list totals keyed by query and parameters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple, Tuple[float, int]] = {}
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], int]) -> int:
+        now = time.monotonic()
+        ttl = settings.LIST_COUNT_CACHE_TTL_SECONDS
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] < ttl:
+                return entry[1]
+        count = compute()
+        with self._lock:
+            if len(self._entries) > 1000:
+                self._entries = {k: v for k, v in self._entries.items() if now - v[0] < ttl}
+            self._entries[key] = (now, count)
+        return count
+
+    def invalidate(self, namespace: Optional[str] = None):
+        """Drop cached totals, optionally only those of one namespace (first element of the key)"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                self._entries = {k: v for k, v in self._entries.items() if k[0] != namespace}
+
+
+_count_cache = CountCache()
+
+
+def get_count_cache() -> CountCache:
+    """Get the process-wide list count cache"""
+    return _count_cache
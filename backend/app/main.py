@@ -15,7 +15,8 @@ import sys
 from app.api.v1 import auth, users, admin, symbols, screener, announcements, news
 from app.api.v1.system import connections, websocket, processors, debug
 from app.core.config import settings
-from app.core.database import get_connection_manager, get_db_router
+from app.core.database import get_connection_manager, get_db_router, get_db_executor, allow_blocking_db
+from app.services.attachment_prefetcher import get_attachment_prefetcher
 
 # IST timezone (UTC+5:30)
 IST = timezone(timedelta(hours=5, minutes=30))
@@ -68,12 +69,15 @@ async def lifespan(app: FastAPI):
     """Lifespan event handler for FastAPI"""
     # Startup
     await configure_logging()
-    await startup_event()
+    # Nothing is served yet, so startup may query the databases directly
+    with allow_blocking_db():
+        await startup_event()
     
     yield
     
     # Shutdown
-    await shutdown_event()
+    with allow_blocking_db():
+        await shutdown_event()
 
 # Import rate limiter from dedicated module to avoid circular imports
 from app.core.limiter import limiter
@@ -326,6 +330,12 @@ async def startup_event():
             print(f"  Listening         : /api/v1/ws")
         except Exception as e:
             print(f"  Service Status    : ERROR - {str(e)}")
+        try:
+            from app.services.presence_service import get_presence_service
+            get_presence_service().start()
+            print(f"  Presence Flusher  : STARTED (every {settings.PRESENCE_FLUSH_SECONDS}s)")
+        except Exception as e:
+            print(f"  Presence Flusher  : ERROR - {str(e)}")
         print("="*70)
         
         # ============================================
@@ -399,6 +409,13 @@ async def startup_event():
         except Exception as e:
             print(f"  Announcements DB   : ERROR - {str(e)}")
         
+        # Start attachment prefetch workers (fed by announcement inserts)
+        try:
+            get_attachment_prefetcher().start()
+            print(f"  Attachment Prefetch: STARTED ({settings.ATTACHMENT_PREFETCH_WORKERS} workers)")
+        except Exception as e:
+            print(f"  Attachment Prefetch: ERROR - {str(e)}")
+        
         # Start Corporate Announcements WebSocket Service
         try:
             from app.providers.truedata_websocket import get_announcements_websocket_service
@@ -581,7 +598,15 @@ async def shutdown_event():
         print("[INFO] Shutting down server gracefully...")
         # Symbols module has been removed
         pass
-        
+
+        # Stop presence tracking and write buffered user activity
+        try:
+            from app.services.presence_service import get_presence_service
+            get_presence_service().stop()
+            print("[OK] Presence service stopped")
+        except Exception as e:
+            print(f"[WARNING] Error stopping presence service: {e}")
+
         # Stop Scheduler (Global)
         try:
             from app.services.scheduler import stop_scheduler
@@ -598,6 +623,21 @@ async def shutdown_event():
         except Exception as e:
             print(f"[WARNING] Error stopping scheduler service: {e}")
         
+        # Stop database executor pools
+        try:
+            get_db_executor().shutdown()
+            print("[OK] Database executor stopped")
+        except Exception as e:
+            print(f"[WARNING] Error stopping database executor: {e}")
+        
+        # Stop transformation script workers
+        try:
+            from app.services.script_runner import get_script_runner
+            get_script_runner().shutdown()
+            print("[OK] Script workers stopped")
+        except Exception as e:
+            print(f"[WARNING] Error stopping script workers: {e}")
+        
         # Stop Corporate Announcements WebSocket Service
         try:
             from app.providers.truedata_websocket import get_announcements_websocket_service
@@ -607,6 +647,13 @@ async def shutdown_event():
         except Exception as e:
             print(f"[WARNING] Error stopping announcements WebSocket service: {e}")
         
+        # Stop attachment prefetch workers
+        try:
+            get_attachment_prefetcher().stop()
+            print("[OK] Attachment prefetcher stopped")
+        except Exception as e:
+            print(f"[WARNING] Error stopping attachment prefetcher: {e}")
+        
         # Stop Worker Manager
         try:
             from app.providers.worker_manager import worker_manager
@@ -631,6 +678,14 @@ async def shutdown_event():
         except Exception as e:
             print(f"[WARNING] Error closing Shared DB: {e}")
 
+        # Close pooled repository DuckDB connections
+        try:
+            from app.core.database.duckdb_registry import get_duckdb_registry
+            get_duckdb_registry().close_all()
+            print("[OK] DuckDB registry connections closed")
+        except Exception as e:
+            print(f"[WARNING] Error closing DuckDB registry: {e}")
+
         # Remove PID file
         try:
             import os
@@ -696,6 +751,9 @@ async def health_check():
             "database": db_status,
             "api_version": "v1",
             "script_endpoints": script_routes,
+            "auth_db_pool": auth_client.pool_stats() if auth_client else None,
+            "db_executor": get_db_executor().get_stats(),
+            "attachment_prefetch": get_attachment_prefetcher().get_stats(),
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
     except Exception as e:
@@ -43,7 +43,8 @@ def init_screener_database():
     db_path = get_screener_db_path()
     
     try:
-        conn = duckdb.connect(db_path, config={'allow_unsigned_extensions': True})
+        # Shared connection set up by ScreenerRepository (natural key migration, default connection)
+        conn = get_db_connection()
         
         # Create unified time-series table
         conn.execute("""
@@ -243,39 +244,9 @@ def ensure_default_connection(conn: duckdb.DuckDBPyConnection):
         logger.warning(f"Could not ensure default connection: {e}")
 
 def get_db_connection():
-    """Get a DuckDB connection to the Screener database with proper configuration"""
-    db_path = get_screener_db_path()
-    if not os.path.exists(db_path):
-        init_screener_database()
-    
-    max_retries = 3
-    retry_delay = 0.5
-    
-    for attempt in range(max_retries):
-        try:
-            conn = duckdb.connect(db_path, read_only=False, config={'allow_unsigned_extensions': True})
-            conn.execute("SET enable_progress_bar=false")
-            conn.execute("SET threads=1")
-            try:
-                ensure_default_connection(conn)
-            except Exception as e:
-                logger.warning(f"Could not ensure default connection: {e}")
-            return conn
-        except Exception as e:
-            if attempt < max_retries - 1:
-                error_msg = str(e)
-                if "being used by another process" in error_msg or "Cannot open file" in error_msg:
-                    logger.warning(f"[DB] Database file is locked (attempt {attempt + 1}/{max_retries}), retrying in {retry_delay}s...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    # For other errors, don't retry
-                    logger.error(f"Failed to connect to Screener database at {db_path}: {e}", exc_info=True)
-                    raise
-            else:
-                # Last attempt failed
-                logger.error(f"Failed to connect to Screener database at {db_path} after {max_retries} attempts: {e}", exc_info=True)
-                raise
+    """Get a cursor on the shared Screener DuckDB connection (caller closes it)"""
+    from app.repositories.screener_repository import ScreenerRepository
+    return ScreenerRepository().get_db_connection()
 
 # Create a session for connection pooling and faster requests
 _session = None
@@ -454,10 +425,12 @@ def insert_metric(
     consolidated_flag: str = "CONSOLIDATED",
     metadata: Optional[str] = None
 ):
-    """Insert a single metric into the unified table"""
+    """Insert or update a single metric in the unified table"""
     if metric_value is None and period_type != "EVENT":
         return
     
+    from app.repositories.screener_repository import ScreenerRepository
+    
     try:
         # Get next ID from sequence or use MAX
         try:
@@ -472,9 +445,9 @@ def insert_metric(
             INSERT INTO screener_data (
                 id, entity_type, parent_company_symbol, symbol, exchange,
                 period_type, period_key, statement_group, metric_name,
-                metric_value, unit, consolidated_flag, source, metadata
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, [
+                metric_value, unit, consolidated_flag, source, metadata, parent_key
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, ''))
+        """ + ScreenerRepository.UPSERT_CLAUSE, [
             next_id,
             entity_type,
             parent_company_symbol,
@@ -488,7 +461,8 @@ def insert_metric(
             unit,
             consolidated_flag,
             "screener.in",
-            metadata
+            metadata,
+            parent_company_symbol
         ])
     except Exception as e:
         logger.warning(f"Failed to insert metric {metric_name} for {symbol}: {e}")
@@ -2,6 +2,7 @@
 import duckdb
 import logging
 import os
+from app.core.database.duckdb_registry import get_duckdb_registry
 from .config import IPO_DB_PATH, IPO_TABLE, IPO_DATA_DIR, BSE_IPO_DB_PATH, BSE_TABLE, GMP_IPO_DB_PATH, GMP_TABLE
 
 # ... (keep existing functions) ...
@@ -13,7 +14,7 @@ def ensure_gmp_schema():
     Ensures the GMP IPO data directory and table exist.
     """
     try:
-        with duckdb.connect(GMP_IPO_DB_PATH) as conn:
+        with get_duckdb_registry().connection(GMP_IPO_DB_PATH) as conn:
              conn.execute(f"CREATE SEQUENCE IF NOT EXISTS seq_gmp_id START 1;")
              
              # Create Table
@@ -44,7 +45,7 @@ def insert_gmp_data(data_list):
         return
 
     try:
-        with duckdb.connect(GMP_IPO_DB_PATH) as conn:
+        with get_duckdb_registry().connection(GMP_IPO_DB_PATH) as conn:
             for item in data_list:
                 # Upsert Logic based on IPO Name
                 ipo_name = item.get("ipo_name")
@@ -107,7 +108,7 @@ def get_gmp_stats():
         if not os.path.exists(GMP_IPO_DB_PATH):
              return {"total": 0}
 
-        with duckdb.connect(GMP_IPO_DB_PATH, read_only=True) as conn:
+        with get_duckdb_registry().connection(GMP_IPO_DB_PATH) as conn:
             try:
                 total_count = conn.execute(f"SELECT COUNT(*) FROM {GMP_TABLE}").fetchone()[0]
             except duckdb.CatalogException:
@@ -128,7 +129,7 @@ def get_gmp_data(limit=100):
         if not os.path.exists(GMP_IPO_DB_PATH):
              return []
 
-        with duckdb.connect(GMP_IPO_DB_PATH, read_only=True) as conn:
+        with get_duckdb_registry().connection(GMP_IPO_DB_PATH) as conn:
             query = f"""
             SELECT 
                 ipo_name, gmp, ipo_price, expected_listing_gain,
@@ -163,7 +164,7 @@ def ensure_bse_schema():
     Ensures the BSE IPO data directory and table exist.
     """
     try:
-        with duckdb.connect(BSE_IPO_DB_PATH) as conn:
+        with get_duckdb_registry().connection(BSE_IPO_DB_PATH) as conn:
              conn.execute(f"CREATE SEQUENCE IF NOT EXISTS seq_bse_id START 1;")
              
              # Create Table
@@ -195,7 +196,7 @@ def insert_bse_data(data_list):
         return
 
     try:
-        with duckdb.connect(BSE_IPO_DB_PATH) as conn:
+        with get_duckdb_registry().connection(BSE_IPO_DB_PATH) as conn:
             for item in data_list:
                 # Upsert Logic based on Security Name
                 security_name = item.get("Security Name")
@@ -260,7 +261,7 @@ def get_bse_stats():
         if not os.path.exists(BSE_IPO_DB_PATH):
              return {"total": 0, "open": 0}
 
-        with duckdb.connect(BSE_IPO_DB_PATH, read_only=True) as conn:
+        with get_duckdb_registry().connection(BSE_IPO_DB_PATH) as conn:
             try:
                 total_count = conn.execute(f"SELECT COUNT(*) FROM {BSE_TABLE}").fetchone()[0]
                 # Maybe count open ones? Status based.
@@ -284,7 +285,7 @@ def get_bse_data(limit=100):
         if not os.path.exists(BSE_IPO_DB_PATH):
              return []
 
-        with duckdb.connect(BSE_IPO_DB_PATH, read_only=True) as conn:
+        with get_duckdb_registry().connection(BSE_IPO_DB_PATH) as conn:
             query = f"""
             SELECT 
                 security_name, exchange_platform, start_date, end_date,
@@ -344,8 +345,8 @@ def ensure_schema():
         # BETTER: Use shared_db logic if possible or just standard duckdb connect for this isolated file 
         # since it's not the main system DB.
         
-        # Let's use a standard connection for this specific file to keep it isolated as requested.
-        with duckdb.connect(IPO_DB_PATH) as conn:
+        # The file stays isolated, but its connection is pooled by the DuckDB registry.
+        with get_duckdb_registry().connection(IPO_DB_PATH) as conn:
              conn.execute(f"CREATE SEQUENCE IF NOT EXISTS seq_ipo_id START 1;")
              
              # Create Table
@@ -381,7 +382,7 @@ def insert_ipo_data(data_list):
         return
 
     try:
-        with duckdb.connect(IPO_DB_PATH) as conn:
+        with get_duckdb_registry().connection(IPO_DB_PATH) as conn:
             for item in data_list:
                 # Upsert Logic based on Symbol or Company Name (if Symbol missing)
                 symbol = item.get("Symbol")
@@ -482,7 +483,7 @@ def get_ipo_stats():
         if not os.path.exists(IPO_DB_PATH):
              return {"current": 0, "upcoming": 0, "total": 0}
 
-        with duckdb.connect(IPO_DB_PATH, read_only=True) as conn:
+        with get_duckdb_registry().connection(IPO_DB_PATH) as conn:
             # simple count
             try:
                 current_count = conn.execute(f"SELECT COUNT(*) FROM {IPO_TABLE} WHERE type='CURRENT'").fetchone()[0]
@@ -508,7 +509,7 @@ def get_ipo_data(limit=100):
         if not os.path.exists(IPO_DB_PATH):
              return []
 
-        with duckdb.connect(IPO_DB_PATH, read_only=True) as conn:
+        with get_duckdb_registry().connection(IPO_DB_PATH) as conn:
             query = f"""
             SELECT 
                 type, company_name, symbol, security_type, 
@@ -551,7 +552,7 @@ def cleanup_old_data():
     try:
         # 1. Clean IPO Scraper Data (NSE)
         if os.path.exists(IPO_DB_PATH):
-            with duckdb.connect(IPO_DB_PATH) as conn:
+            with get_duckdb_registry().connection(IPO_DB_PATH) as conn:
                 try:
                     # Check if table exists first to avoid errors if DB exists but table doesn't
                     table_exists = conn.execute(f"SELECT count(*) FROM information_schema.tables WHERE table_name = '{IPO_TABLE}'").fetchone()[0] > 0
@@ -565,7 +566,7 @@ def cleanup_old_data():
 
         # 2. Clean BSE IPO Data
         if os.path.exists(BSE_IPO_DB_PATH):
-            with duckdb.connect(BSE_IPO_DB_PATH) as conn:
+            with get_duckdb_registry().connection(BSE_IPO_DB_PATH) as conn:
                 try:
                     table_exists = conn.execute(f"SELECT count(*) FROM information_schema.tables WHERE table_name = '{BSE_TABLE}'").fetchone()[0] > 0
                     if table_exists:
@@ -577,7 +578,7 @@ def cleanup_old_data():
 
         # 3. Clean GMP IPO Data
         if os.path.exists(GMP_IPO_DB_PATH):
-            with duckdb.connect(GMP_IPO_DB_PATH) as conn:
+            with get_duckdb_registry().connection(GMP_IPO_DB_PATH) as conn:
                 try:
                     table_exists = conn.execute(f"SELECT count(*) FROM information_schema.tables WHERE table_name = '{GMP_TABLE}'").fetchone()[0] > 0
                     if table_exists:
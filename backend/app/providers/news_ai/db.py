@@ -6,6 +6,7 @@ from typing import Optional, Tuple, Dict, List, Any
 from datetime import datetime, timedelta, timezone
 from .config import SCORING_DB_PATH, SCORING_TABLE, AI_DB_PATH, AI_TABLE, FINAL_TABLE
 from app.providers.shared_db import get_shared_db
+from app.core.pagination import decode_cursor, encode_cursor, get_count_cache, keyset_predicate
 from app.core.websocket.manager import manager
 from .similarity import is_duplicate, calculate_combined_similarity
 
@@ -594,8 +595,15 @@ def get_recent_enrichments(limit=50):
         logger.error(f"Error fetching recent enrichments: {e}")
         return []
 
-def get_final_news(limit=20, offset=0, search: Optional[str] = None):
-    """Fetch AI-enriched news from final database with pagination and fuzzy search."""
+def get_final_news(limit=20, offset=0, search: Optional[str] = None, cursor: Optional[str] = None, include_total: bool = True):
+    """
+    Fetch AI-enriched news from final database with pagination and fuzzy search.
+    Ordered by (created_at DESC, news_id DESC); with a cursor the page starts after
+    the cursor's key and offset is ignored. Returns (items, total, next_cursor);
+    total is None when include_total is False. Invalid cursors raise ValueError.
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, 2)
     db = get_shared_db()
     try:
         where_parts = ["(is_duplicate IS NULL OR is_duplicate = FALSE)"]  # Exclude duplicates
@@ -620,13 +628,23 @@ def get_final_news(limit=20, offset=0, search: Optional[str] = None):
         
         where_clause = "WHERE " + " AND ".join(where_parts)
 
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM {FINAL_TABLE} {where_clause}"
-        total_count = db.run_final_query(count_query, params, fetch='one')[0]
+        # Get total count (cached briefly so paging doesn't repeat it)
+        total_count = None
+        if include_total:
+            count_query = f"SELECT COUNT(*) FROM {FINAL_TABLE} {where_clause}"
+            total_count = get_count_cache().get_or_compute(
+                ("news", where_clause, tuple(params)),
+                lambda: db.run_final_query(count_query, params, fetch='one')[0]
+            )
         
         # Get paginated data
-        # Get paginated data
-        data_params = params + [limit, offset]
+        data_params = list(params)
+        if cursor:
+            predicate, predicate_params = keyset_predicate("created_at", "news_id", created_at, last_id)
+            where_clause += f" AND {predicate}"
+            data_params += predicate_params
+            offset = 0
+        data_params += [limit + 1, offset]
         query = f"""
             SELECT 
                 news_id, received_date, headline, summary, company_name,
@@ -634,10 +652,14 @@ def get_final_news(limit=20, offset=0, search: Optional[str] = None):
                 source_count, additional_sources, source_handle
             FROM {FINAL_TABLE}
             {where_clause}
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC NULLS LAST, news_id DESC
             LIMIT ? OFFSET ?
         """
         rows = db.run_final_query(query, data_params, fetch='all')
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][11], rows[-1][0]])
         
         result = []
         for row in rows:
@@ -667,10 +689,10 @@ def get_final_news(limit=20, offset=0, search: Optional[str] = None):
                 "additional_sources": additional_sources,
                 "source_handle": row[14]
             })
-        return result, total_count
+        return result, total_count, next_cursor
     except Exception as e:
         logger.error(f"Error fetching final news with pagination: {e}")
-        return [], 0
+        return [], 0, None
 def get_system_setting(key, default=None):
     """Retrieve a system setting."""
     db = get_db()
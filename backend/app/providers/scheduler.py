@@ -10,23 +10,18 @@ import queue
 import requests
 import tempfile
 import os
-import pandas as pd
-import io
 import json
+import hashlib
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from urllib.parse import urlparse
 from croniter import croniter
 
 from app.core.config import settings
-from app.api.v1.symbols import (
-    get_db_connection,
-    apply_transformation_script,
-    process_upload_async,
-    _preview_cache,
-    _upload_status_cache
-)
+from app.api.v1.symbols import get_db_connection
+from app.services.symbols_service import SymbolsService
 
 logger = logging.getLogger(__name__)
 
@@ -41,10 +36,15 @@ class SchedulerService:
         self._active_executions: set = set()  # Track active executions to prevent duplicates
         self._execution_lock = threading.Lock()  # Lock for active_executions set
         
-        # Queue system for serial execution
+        # Queue of schedulers waiting to run, drained by a bounded pool of workers
         self.scheduler_queue = queue.Queue()  # Queue to hold schedulers waiting to run
-        self.queue_worker_thread: Optional[threading.Thread] = None
+        self.queue_worker_threads: List[threading.Thread] = []
         self.queue_running = False
+        
+        # Uploads into symbols.duckdb go through one writer thread, one job at a time
+        self.upload_queue = queue.Queue()
+        self.upload_writer_thread: Optional[threading.Thread] = None
+        self._upload_writer_lock = threading.Lock()
     
     def start(self):
         """Start the scheduler service"""
@@ -56,11 +56,15 @@ class SchedulerService:
         self.thread = threading.Thread(target=self._run_loop, daemon=True, name="SchedulerService")
         self.thread.start()
         
-        # Start queue worker thread for serial execution
+        # Start queue workers; different schedulers may run concurrently
         self.queue_running = True
-        self.queue_worker_thread = threading.Thread(target=self._queue_worker_loop, daemon=True, name="SchedulerQueueWorker")
-        self.queue_worker_thread.start()
-        logger.info("Scheduler queue worker thread started")
+        worker_count = max(1, settings.SCHEDULER_MAX_CONCURRENT_RUNS)
+        self.queue_worker_threads = []
+        for i in range(worker_count):
+            worker = threading.Thread(target=self._queue_worker_loop, daemon=True, name=f"SchedulerQueueWorker-{i + 1}")
+            worker.start()
+            self.queue_worker_threads.append(worker)
+        logger.info(f"Started {worker_count} scheduler queue worker thread(s)")
         logger.info("Scheduler service started")
     
     def stop(self):
@@ -68,14 +72,21 @@ class SchedulerService:
         self.running = False
         self.queue_running = False
         
-        # Signal queue worker to stop
-        try:
-            self.scheduler_queue.put(None)  # Sentinel value to stop worker
-        except:
-            pass
+        # Signal queue workers to stop (one sentinel per worker)
+        for _ in self.queue_worker_threads:
+            self.scheduler_queue.put(None)
+        for worker in self.queue_worker_threads:
+            worker.join(timeout=5)
+        self.queue_worker_threads = []
         
-        if self.queue_worker_thread:
-            self.queue_worker_thread.join(timeout=5)
+        # Let the upload writer finish queued uploads, then stop it
+        with self._upload_writer_lock:
+            writer = self.upload_writer_thread
+            self.upload_writer_thread = None
+            if writer and writer.is_alive():
+                self.upload_queue.put(None)
+        if writer:
+            writer.join(timeout=30)
         
         if self.thread:
             self.thread.join(timeout=10)
@@ -97,7 +108,7 @@ class SchedulerService:
                 time.sleep(1)
     
     def _queue_worker_loop(self):
-        """Worker thread that processes scheduler queue serially (one at a time)"""
+        """Worker thread that takes schedulers off the queue; each worker runs one scheduler at a time"""
         logger.info("Scheduler queue worker started")
         while self.queue_running:
             try:
@@ -110,7 +121,8 @@ class SchedulerService:
                     break
                 
                 # Execute the scheduler
-                scheduler_id, name, sources_json, script_id, mode, interval_value, interval_unit, cron_expression = scheduler_task
+                (scheduler_id, name, sources_json, script_id, mode, interval_value, interval_unit,
+                 cron_expression, max_parallel_downloads) = scheduler_task
                 
                 print(f"[QUEUE] Processing scheduler {name} (ID: {scheduler_id}) from queue")
                 logger.info(f"[QUEUE] Processing scheduler {name} (ID: {scheduler_id}) from queue")
@@ -119,7 +131,8 @@ class SchedulerService:
                 self._execute_scheduler(
                     scheduler_id, name, sources_json, script_id, mode,
                     interval_value, interval_unit, cron_expression,
-                    triggered_by_user=None, manual_trigger_lock=None
+                    triggered_by_user=None, manual_trigger_lock=None,
+                    max_parallel_downloads=max_parallel_downloads
                 )
                 
                 print(f"[QUEUE] Completed scheduler {name} (ID: {scheduler_id})")
@@ -217,7 +230,7 @@ class SchedulerService:
             # Get all active schedulers
             schedulers = conn.execute("""
                 SELECT id, name, mode, interval_value, interval_unit, cron_expression,
-                       script_id, sources, is_active, next_run_at, last_run_at
+                       script_id, sources, is_active, next_run_at, last_run_at, max_parallel_downloads
                 FROM schedulers
                 WHERE is_active = TRUE
             """).fetchall()
@@ -237,6 +250,7 @@ class SchedulerService:
                 is_active = bool(sched[8])
                 next_run_at = sched[9]
                 last_run_at = sched[10]
+                max_parallel_downloads = sched[11]
                 
                 if not is_active:
                     continue
@@ -331,10 +345,9 @@ class SchedulerService:
                     # Also check if manual trigger lock is held
                     manual_lock_held = False
                     try:
-                        from app.api.v1.symbols import _scheduler_manual_locks, _scheduler_locks_lock
-                        with _scheduler_locks_lock:
-                            if scheduler_id in _scheduler_manual_locks:
-                                manual_lock = _scheduler_manual_locks[scheduler_id]
+                        with SymbolsService._scheduler_locks_lock:
+                            if scheduler_id in SymbolsService._scheduler_manual_locks:
+                                manual_lock = SymbolsService._scheduler_manual_locks[scheduler_id]
                                 manual_lock_held = manual_lock.locked()
                     except Exception:
                         pass  # If import fails, continue anyway
@@ -358,10 +371,10 @@ class SchedulerService:
                     print(f"[AUTO-SCHEDULER] Queueing scheduler: {name} (ID: {scheduler_id}, Mode: {mode})")
                     logger.info(f"[AUTO-SCHEDULER] Queueing scheduler: {name} (ID: {scheduler_id}, Mode: {mode}, Next run was: {next_run_at})")
                     
-                    # Add to queue for serial execution instead of starting immediately
+                    # Add to queue; a free queue worker picks it up
                     scheduler_task = (
                         scheduler_id, name, sources_json, script_id, mode,
-                        interval_value, interval_unit, cron_expression
+                        interval_value, interval_unit, cron_expression, max_parallel_downloads
                     )
                     try:
                         self.scheduler_queue.put(scheduler_task, block=False)
@@ -448,15 +461,20 @@ class SchedulerService:
                           script_id: Optional[int], mode: str, interval_value: Optional[int],
                           interval_unit: Optional[str], cron_expression: Optional[str],
                           triggered_by_user: Optional[Dict[str, Any]] = None,
-                          manual_trigger_lock: Optional[threading.Lock] = None):
+                          manual_trigger_lock: Optional[threading.Lock] = None,
+                          max_parallel_downloads: Optional[int] = None):
         """Execute a scheduler: download, process, preview, upload
         
+        Sources are downloaded and previewed concurrently (up to max_parallel_downloads,
+        default settings.SCHEDULER_MAX_PARALLEL_DOWNLOADS); each finished preview is queued
+        for the upload writer, which applies uploads to symbols.duckdb one at a time.
+        
         Args:
             triggered_by_user: Optional dict with user info (name, username, email, id) when manually triggered
             manual_trigger_lock: Optional threading.Lock that will be released after execution completes
+            max_parallel_downloads: Optional per-scheduler limit on concurrent source downloads
         """
         conn = None
-        temp_file_path = None
         
         try:
             # Parse sources
@@ -513,106 +531,67 @@ class SchedulerService:
                     logger.warning(f"[SCHEDULER] No unique sources to process after deduplication")
                     return
                 
-                # Process each unique source
-                print(f"[SCHEDULER] ===== STARTING EXECUTION: Scheduler {name} (ID: {scheduler_id}) will process {len(unique_sources)} unique source(s) (from {len(sources)} total) ===== ")
-                logger.info(f"[SCHEDULER] Starting execution: Scheduler {name} (ID: {scheduler_id}) will process {len(unique_sources)} unique source(s) (from {len(sources)} total)")
-                for idx, source in enumerate(unique_sources):
-                    source_name = source.get('name', f'Source {idx + 1}')
-                    print(f"[SCHEDULER] >>> Processing source {idx + 1}/{len(unique_sources)}: {source_name} for scheduler {name}")
-                    logger.info(f"[SCHEDULER] Processing source {idx + 1}/{len(unique_sources)}: {source_name} for scheduler {name}")
-                    try:
-                        # Download file from URL/API (temporary)
-                        print(f"[SCHEDULER] Downloading file for source {idx + 1} from {source.get('url', 'N/A')}")
-                        logger.info(f"Downloading file for scheduler {name} from {source.get('url', 'N/A')}")
-                        temp_file_path = self._download_file(source)
-                        
-                        if not temp_file_path or not os.path.exists(temp_file_path):
-                            logger.error(f"Failed to download file for scheduler {name}")
+                symbols_service = SymbolsService()
+                
+                # Determine user_name: if manually triggered, use user's name; otherwise use scheduler name
+                if triggered_by_user:
+                    # Manually triggered - use the user who clicked the play button
+                    user_name = (triggered_by_user.get('name') or 
+                               triggered_by_user.get('username') or 
+                               triggered_by_user.get('email') or 
+                               f"User-{triggered_by_user.get('id', 'unknown')}")
+                    user_id = triggered_by_user.get('id')
+                else:
+                    # Auto-triggered by scheduler - use scheduler name
+                    user_name = name
+                    user_id = None
+                preview_extra = {
+                    'scheduler_id': scheduler_id,  # Store scheduler ID for linking
+                    'scheduler_mode': mode,  # Store scheduler timing info
+                    'scheduler_interval_value': interval_value,
+                    'scheduler_interval_unit': interval_unit,
+                    'scheduler_cron_expression': cron_expression,
+                    'manually_triggered': triggered_by_user is not None  # Flag to indicate manual trigger
+                }
+                
+                # Download and preview sources concurrently; uploads start as soon as each source is ready
+                workers = min(len(unique_sources), max(1, max_parallel_downloads or settings.SCHEDULER_MAX_PARALLEL_DOWNLOADS))
+                print(f"[SCHEDULER] ===== STARTING EXECUTION: Scheduler {name} (ID: {scheduler_id}) will process {len(unique_sources)} unique source(s) (from {len(sources)} total), {workers} at a time ===== ")
+                logger.info(f"[SCHEDULER] Starting execution: Scheduler {name} (ID: {scheduler_id}) will process {len(unique_sources)} unique source(s) (from {len(sources)} total), {workers} at a time")
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"SchedulerDownload-{scheduler_id}") as pool:
+                    futures = {
+                        pool.submit(
+                            self._prepare_source, symbols_service, source, f"{idx + 1}/{len(unique_sources)}",
+                            name, scheduler_id, script_id, {'id': user_id, 'name': user_name}, preview_extra
+                        ): idx
+                        for idx, source in enumerate(unique_sources)
+                    }
+                    for future in as_completed(futures):
+                        label = f"{futures[future] + 1}/{len(unique_sources)}"
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.error(f"Error processing source {label} for scheduler {name}: {e}", exc_info=True)
+                            continue
+                        if not result:
                             continue
                         
-                        # Load file to script (same as manual)
-                        df = self._load_file(temp_file_path, source.get('file_type', 'AUTO'))
-                        
-                        # Apply transformation script if provided
-                        script_name = None
-                        script_loaded = False
-                        transformed = False
-                        original_rows = len(df)
-                        original_cols = len(df.columns)
-                        
-                        if script_id:
-                            df, script_name = self._apply_script(df, script_id)
-                            script_loaded = True
-                            transformed = True
-                        
-                        new_rows = len(df)
-                        new_cols = len(df.columns)
-                        
-                        # Preview (same as manual) - cache for upload
-                        preview_id = f"preview_{uuid.uuid4().hex[:16]}"
-                        filename = os.path.basename(urlparse(source.get('url', '')).path) or f"scheduled_{scheduler_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                        
-                        # Determine user_name: if manually triggered, use user's name; otherwise use scheduler name
-                        if triggered_by_user:
-                            # Manually triggered - use the user who clicked the play button
-                            user_name = (triggered_by_user.get('name') or 
-                                       triggered_by_user.get('username') or 
-                                       triggered_by_user.get('email') or 
-                                       f"User-{triggered_by_user.get('id', 'unknown')}")
-                            user_id = triggered_by_user.get('id')
-                        else:
-                            # Auto-triggered by scheduler - use scheduler name
-                            user_name = name
-                            user_id = None
-                        
-                        _preview_cache[preview_id] = {
-                            'df': df,
-                            'filename': filename,
-                            'script_id': script_id,
-                            'script_name': script_name,
-                            'script_loaded': script_loaded,
-                            'transformed': transformed,
-                            'original_rows': original_rows,
-                            'original_cols': original_cols,
-                            'new_rows': new_rows,
-                            'new_cols': new_cols,
-                            'user_id': user_id,
-                            'user_name': user_name,  # User name if manually triggered, scheduler name if auto
-                            'upload_type': 'AUTO',  # Always AUTO for scheduler runs
-                            'scheduler_id': scheduler_id,  # Store scheduler ID for linking
-                            'scheduler_mode': mode,  # Store scheduler timing info
-                            'scheduler_interval_value': interval_value,
-                            'scheduler_interval_unit': interval_unit,
-                            'scheduler_cron_expression': cron_expression,
-                            'manually_triggered': triggered_by_user is not None  # Flag to indicate manual trigger
-                        }
-                        
-                        # Upload (same as manual) - use the same process_upload_async function
                         job_id = f"job_{uuid.uuid4().hex[:16]}"
-                        print(f"[SCHEDULER] >>> Starting upload for source {idx + 1}/{len(unique_sources)} (job_id: {job_id})")
-                        logger.info(f"Starting upload for scheduler {name}, source {idx + 1}/{len(unique_sources)}, job_id: {job_id}")
-                        
-                        # Process upload in background thread
-                        upload_thread = threading.Thread(
-                            target=process_upload_async,
-                            args=(preview_id, job_id),
-                            daemon=True,
-                            name=f"Upload-{job_id}"
-                        )
-                        upload_thread.start()
-                        
-                        print(f"[SCHEDULER] >>> Upload thread started for source {idx + 1}/{len(unique_sources)} (job_id: {job_id})")
-                        logger.info(f"Scheduler {name} execution started for source {idx + 1}/{len(unique_sources)}, job_id: {job_id}")
+                        if result["unchanged"]:
+                            # Remote file unchanged since the last applied run - log it, skip transform and upsert
+                            self._submit_write(
+                                symbols_service.record_no_change_run, job_id, result["filename"], user_name,
+                                scheduler_id, result["url"], result["state"]
+                            )
+                            print(f"[SCHEDULER] >>> Source {label} unchanged, skipping upload (job_id: {job_id})")
+                            logger.info(f"Scheduler {name} source {label} unchanged, recorded NO_CHANGE, job_id: {job_id}")
+                            continue
                         
-                    except Exception as e:
-                        logger.error(f"Error processing source for scheduler {name}: {e}", exc_info=True)
-                    finally:
-                        # Clean up temporary file
-                        if 'temp_file_path' in locals() and temp_file_path and os.path.exists(temp_file_path):
-                            try:
-                                os.remove(temp_file_path)
-                            except Exception as e:
-                                logger.warning(f"Failed to remove temp file {temp_file_path}: {e}")
+                        # Upload (same as manual) - queued for the single upload writer; nobody
+                        # retries a scheduled preview, so it is dropped even if the upload fails
+                        self._submit_write(symbols_service.process_upload_async, result["preview_id"], job_id, False)
+                        print(f"[SCHEDULER] >>> Upload queued for source {label} (job_id: {job_id})")
+                        logger.info(f"Scheduler {name} upload queued for source {label}, job_id: {job_id}")
                 
                 # Update last_run_at and calculate next_run_at
                 # Note: next_run_at is already updated in _check_and_queue_schedulers to prevent race conditions
@@ -693,10 +672,9 @@ class SchedulerService:
             
             # Release the manual trigger lock on error
             try:
-                from app.api.v1.symbols import _scheduler_manual_locks, _scheduler_locks_lock
-                with _scheduler_locks_lock:
-                    if scheduler_id in _scheduler_manual_locks:
-                        manual_lock = _scheduler_manual_locks[scheduler_id]
+                with SymbolsService._scheduler_locks_lock:
+                    if scheduler_id in SymbolsService._scheduler_manual_locks:
+                        manual_lock = SymbolsService._scheduler_manual_locks[scheduler_id]
                         if manual_lock.locked():
                             manual_lock.release()
                             logger.info(f"[SCHEDULER] Released manual trigger lock for scheduler {scheduler_id} (after outer error)")
@@ -726,14 +704,86 @@ class SchedulerService:
                     conn.close()
                 except:
                     pass
+    
+    def _prepare_source(self, symbols_service: SymbolsService, source: Dict[str, Any], label: str,
+                        name: str, scheduler_id: int, script_id: Optional[int],
+                        user_info: Dict[str, Any], preview_extra: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Download one source and create its upload preview.
+        Returns {"unchanged": False, "preview_id": ...}, or {"unchanged": True, ...} when the
+        remote file matches the last one applied (304 or same content hash).
+        """
+        url = source.get('url', '')
+        filename = os.path.basename(urlparse(url).path) or f"scheduled_{scheduler_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        previous = symbols_service.repo.get_source_state(scheduler_id, url) if settings.SCHEDULER_CONDITIONAL_DOWNLOADS else None
+        
+        temp_file_path = None
+        try:
+            # Download file from URL/API (temporary)
+            print(f"[SCHEDULER] Downloading file for source {label} from {url or 'N/A'}")
+            logger.info(f"Downloading file for scheduler {name} from {url or 'N/A'}")
+            download = self._download_file(source, previous)
+            temp_file_path = download["path"]
+            
+            if download["unchanged"]:
+                return {"unchanged": True, "url": url, "filename": filename, "state": download["state"]}
+            
+            if not temp_file_path or not os.path.exists(temp_file_path):
+                logger.error(f"Failed to download file for scheduler {name}")
+                return None
+            
+            # Preview (same as manual) - the preview takes ownership of the
+            # downloaded file and the upload job removes it when done.
+            # The source state is saved by the upload once the rows are applied.
+            file_ext = os.path.splitext(temp_file_path)[1].lower()
+            preview = symbols_service.create_upload_preview(
+                temp_file_path,
+                filename,
+                symbols_service.resolve_file_type(file_ext, source.get('file_type', 'AUTO')),
+                script_id,
+                user_info,
+                'AUTO',  # Always AUTO for scheduler runs
+                extra={**preview_extra, 'source_url': url, 'source_state': download["state"]}
+            )
+            temp_file_path = None
+            return {"unchanged": False, "preview_id": preview["preview_id"]}
+        finally:
+            # Clean up the download if no preview took ownership of it
             if temp_file_path and os.path.exists(temp_file_path):
                 try:
                     os.remove(temp_file_path)
-                except:
-                    pass
+                except Exception as e:
+                    logger.warning(f"Failed to remove temp file {temp_file_path}: {e}")
+    
+    def _submit_write(self, func, *args):
+        """Queue a symbols.duckdb write (upload or run log) for the writer thread, starting it if needed"""
+        with self._upload_writer_lock:
+            if not (self.upload_writer_thread and self.upload_writer_thread.is_alive()):
+                self.upload_writer_thread = threading.Thread(target=self._upload_writer_loop, daemon=True, name="SymbolsUploadWriter")
+                self.upload_writer_thread.start()
+            self.upload_queue.put((func, args))
+    
+    def _upload_writer_loop(self):
+        """Apply queued writes one at a time so concurrent sources never contend for the symbols database"""
+        while True:
+            task = self.upload_queue.get()
+            try:
+                if task is None:
+                    break
+                func, args = task
+                logger.info(f"[SCHEDULER] Upload writer running {func.__name__} ({self.upload_queue.qsize()} waiting)")
+                func(*args)
+            except Exception as e:
+                logger.error(f"Error in upload writer: {e}", exc_info=True)
+            finally:
+                self.upload_queue.task_done()
     
-    def _download_file(self, source: Dict[str, Any]) -> Optional[str]:
-        """Download file from URL/API to temporary location"""
+    def _download_file(self, source: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Download file from URL/API to temporary location.
+        With the previous source state, sends a conditional GET and compares the content hash.
+        Returns {"path": temp file or None, "unchanged": bool, "state": etag/last_modified/content_hash}.
+        """
         url = source.get('url')
         if not url:
             raise ValueError("Source URL is required")
@@ -754,9 +804,15 @@ class SchedulerService:
                 # Default to X-API-Key if not specified
                 api_key_header = source.get('api_key_header', 'X-API-Key')
                 headers[api_key_header] = auth_value
+        if previous:
+            if previous.get('etag'): headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'): headers['If-Modified-Since'] = previous['last_modified']
         
         # Download file
         response = requests.get(url, headers=headers, timeout=300, stream=True)
+        if previous and response.status_code == 304:
+            response.close()
+            return {"path": None, "unchanged": True, "state": previous}
         response.raise_for_status()
         
         # Create temporary file
@@ -786,68 +842,25 @@ class SchedulerService:
         )
         temp_file_path = temp_file.name
         
-        # Write downloaded content
-        for chunk in response.iter_content(chunk_size=8192):
-            temp_file.write(chunk)
-        temp_file.close()
-        
-        return temp_file_path
-    
-    def _load_file(self, file_path: str, file_type: str) -> pd.DataFrame:
-        """Load file into DataFrame (same as manual upload)"""
-        # Determine file type
-        if file_type == 'AUTO':
-            file_ext = os.path.splitext(file_path)[1].lower()
-            if file_ext == '.csv':
-                file_type = 'CSV'
-            elif file_ext in ['.xlsx', '.xls']:
-                file_type = 'XLSX'
-            else:
-                file_type = 'CSV'  # Default
-        
-        # Read file
-        with open(file_path, 'rb') as f:
-            contents = f.read()
-        
-        if file_type == 'CSV':
-            df = pd.read_csv(io.BytesIO(contents), low_memory=False)
-        elif file_type == 'XLSX':
-            df = pd.read_excel(io.BytesIO(contents))
-        else:
-            raise ValueError(f"Unsupported file type: {file_type}")
-        
-        return df
-    
-    def _apply_script(self, df: pd.DataFrame, script_id: int):
-        # Returns: (pd.DataFrame, Optional[str])
-        """Apply transformation script to dataframe. Returns (df, script_name)"""
-        conn = None
-        script_name = None
+        # Write downloaded content, hashing it on the way
+        content_hash = hashlib.sha256()
         try:
-            conn = get_db_connection()
-            script = conn.execute("""
-                SELECT name, content FROM transformation_scripts WHERE id = ?
-            """, [script_id]).fetchone()
-            
-            if script:
-                script_name = script[0]
-                script_content = script[1]
-                df = apply_transformation_script(df, script_content)
-                logger.info(f"Applied transformation script {script_name} (ID: {script_id})")
-            else:
-                logger.warning(f"Transformation script {script_id} not found")
-                raise ValueError(f"Transformation script {script_id} not found")
-        except Exception as e:
-            logger.error(f"Error applying transformation script {script_id}: {e}")
-            raise
+            for chunk in response.iter_content(chunk_size=65536):
+                temp_file.write(chunk)
+                content_hash.update(chunk)
         finally:
-            if conn:
-                try:
-                    conn.close()
-                except:
-                    pass
+            temp_file.close()
         
-        return df, script_name
+        state = {
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified'),
+            "content_hash": content_hash.hexdigest()
+        }
+        if previous and previous.get('content_hash') == state["content_hash"]:
+            # Server ignored the validators but the bytes are the same
+            os.remove(temp_file_path)
+            return {"path": None, "unchanged": True, "state": state}
+        return {"path": temp_file_path, "unchanged": False, "state": state}
 
 # Global scheduler service instance
 _scheduler_service: Optional[SchedulerService] = None
@@ -0,0 +1,115 @@
+"""
+Single-pass parser for screener.in company pages
+
+The page is parsed into one lxml tree and every piece the scraper needs
+(company name, header ratios, peer table, financial statement tables) is
+read from that tree. Tables come back as plain columnar records:
+{"columns": [...], "rows": [[...], ...]} with whitespace-normalised cell text.
+"""
+import re
+import logging
+from typing import Any, Dict, List, Optional
+
+from lxml import etree, html
+
+logger = logging.getLogger(__name__)
+
+SECTION_HEADINGS = ["Profit & Loss", "Balance Sheet", "Cash Flows", "Ratios"]
+
+HEADER_PATTERNS = {
+    "Market Cap (Cr)": r"Market Cap\s*₹\s*([0-9,\.]+)\s*Cr",
+    "Current Price": r"Current Price\s*₹\s*([0-9,\.]+)",
+    "High / Low": r"High\s*/\s*Low\s*₹\s*([0-9,\. /]+)",
+    "Stock P/E": r"Stock P/E\s*([0-9\.]+)",
+    "Book Value": r"Book Value\s*₹\s*([0-9,\.]+)",
+    "Dividend Yield %": r"Dividend Yield\s*([0-9\.]+)\s*%",
+    "ROCE %": r"ROCE\s*([0-9\.]+)\s*%",
+    "ROE %": r"ROE\s*([0-9\.]+)\s*%",
+    "Face Value": r"Face Value\s*₹\s*([0-9,\.]+)",
+}
+
+_COMPANY_TITLE_RE = re.compile(r'^([^|]+?)\s+share\s+price', re.IGNORECASE)
+
+
+def _clean_text(value: str) -> str:
+    # Collapse ASCII whitespace only; &nbsp; inside labels (e.g. "Sales\xa0+") is kept
+    # so metric names match what pd.read_html produced for previously stored rows
+    return re.sub(r"[ \t\n\r\f\v]+", " ", value).strip(" ")
+
+
+def _table_records(table: etree._Element) -> Dict[str, List[Any]]:
+    """Convert a <table> into {"columns": [...], "rows": [[...]]}; the first row with <th> cells is the header"""
+    columns: List[str] = []
+    rows: List[List[str]] = []
+    for tr in table.iter("tr"):
+        cells = tr.xpath("./th|./td")
+        if not cells:
+            continue
+        values = [_clean_text(cell.text_content()) for cell in cells]
+        if not columns and all(cell.tag == "th" for cell in cells):
+            columns = values
+            continue
+        rows.append(values)
+    if not columns and rows:
+        columns = rows.pop(0)
+    width = len(columns)
+    rows = [(r + [""] * width)[:width] for r in rows]
+    return {"columns": columns, "rows": rows}
+
+
+def parse_company_name(tree: etree._Element) -> Optional[str]:
+    title = tree.findtext(".//title")
+    if title:
+        match = _COMPANY_TITLE_RE.search(title)
+        if match:
+            return match.group(1).strip()
+
+    h1 = tree.find(".//h1")
+    if h1 is not None:
+        company_name = h1.text_content().strip()
+        if company_name and len(company_name) > 2:
+            return company_name
+
+    meta = tree.xpath("//meta[@property='og:title' or @name='title']/@content")
+    if meta:
+        match = _COMPANY_TITLE_RE.search(meta[0])
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def parse_header_fundamentals(tree: etree._Element) -> Dict[str, Optional[str]]:
+    text = "\n".join(tree.xpath("//text()[not(parent::script or parent::style)]"))
+    data = {}
+    for name, pattern in HEADER_PATTERNS.items():
+        match = re.search(pattern, text)
+        data[name] = match.group(1).strip() if match else None
+    return data
+
+
+def parse_peer_table(tree: etree._Element) -> Optional[Dict[str, List[Any]]]:
+    for table in tree.iter("table"):
+        records = _table_records(table)
+        cols = " ".join(records["columns"])
+        if "CMP Rs." in cols and "P/E" in cols:
+            return records
+    return None
+
+
+def parse_section_table(tree: etree._Element, heading_text: str) -> Optional[Dict[str, List[Any]]]:
+    for heading in tree.xpath("//h2|//h3"):
+        if heading_text in heading.text_content():
+            tables = heading.xpath("following::table[1]")
+            return _table_records(tables[0]) if tables else None
+    return None
+
+
+def parse_screener_page(page_html: str) -> Dict[str, Any]:
+    """Parse a company page once and return all sections the scraper stores"""
+    tree = html.fromstring(page_html)
+    return {
+        "company_name": parse_company_name(tree),
+        "header": parse_header_fundamentals(tree),
+        "peers": parse_peer_table(tree),
+        "sections": {heading: parse_section_table(tree, heading) for heading in SECTION_HEADINGS},
+    }
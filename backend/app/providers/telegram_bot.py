@@ -12,6 +12,7 @@ from sqlalchemy import select
 from app.models.user import User
 from app.models.connection import Connection, ConnectionType
 from app.core.auth.security import decrypt_data
+from app.core.auth.user_cache import invalidate_user
 from app.core.database import SessionLocal
 
 logger = logging.getLogger(__name__)
@@ -270,6 +271,7 @@ class TelegramBotService:
                 
                 user.telegram_chat_id = chat_id
                 db.commit()
+                invalidate_user(user.id)
                 return user.username, user.mobile, None
 
             username, mobile, error_msg = await loop.run_in_executor(None, link_logic)
@@ -306,6 +308,7 @@ class TelegramBotService:
 
                 user.telegram_chat_id = chat_id
                 db.commit()
+                invalidate_user(user.id)
                 return user.username, user.mobile, None
 
             # Run DB logic in thread
@@ -15,6 +15,7 @@ import threading
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, Any
 from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,7 @@ class TokenService:
         """Initialize the tokens database schema - STANDARDIZED SCHEMA (FINAL)"""
         os.makedirs(os.path.dirname(self.tokens_db_path), exist_ok=True)
         
-        conn = duckdb.connect(self.tokens_db_path, config={'allow_unsigned_extensions': True})
+        conn = get_duckdb_registry().get_connection(self.tokens_db_path)
         try:
             # Check if table exists and get current columns
             table_exists = False
@@ -227,7 +228,7 @@ class TokenService:
                 expires_at_ist_verify = None
             
             # Store token with standardized schema
-            conn = duckdb.connect(self.tokens_db_path, config={'allow_unsigned_extensions': True})
+            conn = get_duckdb_registry().get_connection(self.tokens_db_path)
             try:
                 existing = conn.execute("""
                     SELECT id FROM tokens WHERE connection_id = ?
@@ -299,7 +300,7 @@ class TokenService:
         
         If auto_refresh=True and token is expired/expiring, attempts to refresh automatically
         """
-        conn = duckdb.connect(self.tokens_db_path, config={'allow_unsigned_extensions': True})
+        conn = get_duckdb_registry().get_connection(self.tokens_db_path)
         try:
             result = conn.execute("""
                 SELECT access_token, expires_at, status
@@ -364,7 +365,7 @@ class TokenService:
             - last_refreshed_at: ISO timestamp
             - seconds_left: seconds until expiry at 4:00 AM IST (can be negative if expired)
         """
-        conn = duckdb.connect(self.tokens_db_path, config={'allow_unsigned_extensions': True})
+        conn = get_duckdb_registry().get_connection(self.tokens_db_path)
         try:
             result = conn.execute("""
                 SELECT
@@ -605,7 +606,7 @@ class TokenService:
         # Refresh if expired (refresh happens AFTER expiry, not before)
         if token_status["token_status"] == "EXPIRED":
             # Check if we recently refreshed (within last 2 minutes) to prevent repeated refreshes
-            conn = duckdb.connect(self.tokens_db_path, config={'allow_unsigned_extensions': True})
+            conn = get_duckdb_registry().get_connection(self.tokens_db_path)
             try:
                 result = conn.execute("""
                     SELECT last_refreshed_at FROM tokens WHERE connection_id = ?
@@ -682,7 +683,7 @@ class TokenService:
     
     def delete_token(self, connection_id: int) -> bool:
         """Delete token for connection"""
-        conn = duckdb.connect(self.tokens_db_path, config={'allow_unsigned_extensions': True})
+        conn = get_duckdb_registry().get_connection(self.tokens_db_path)
         try:
             conn.execute("DELETE FROM tokens WHERE connection_id = ?", [connection_id])
             conn.commit()
@@ -695,7 +696,7 @@ class TokenService:
     
     def _set_token_status(self, connection_id: int, status: str) -> bool:
         """Set token status (ACTIVE, EXPIRING, EXPIRED, ERROR)"""
-        conn = duckdb.connect(self.tokens_db_path, config={'allow_unsigned_extensions': True})
+        conn = get_duckdb_registry().get_connection(self.tokens_db_path)
         try:
             conn.execute("""
                 UPDATE tokens SET status = ?
@@ -829,7 +830,7 @@ class TokenService:
         doesn't hit TrueData API unless refresh is needed
         Refresh happens AFTER expiry, not before
         """
-        conn = duckdb.connect(self.tokens_db_path, config={'allow_unsigned_extensions': True})
+        conn = get_duckdb_registry().get_connection(self.tokens_db_path)
         try:
             # Get all active tokens
             results = conn.execute("""
@@ -11,6 +11,8 @@ from app.services.announcements_service import get_announcements_service
 from app.providers.truedata_api import get_truedata_api_service
 from app.models.connection import Connection
 from app.core.websocket.manager import manager
+from app.core.database import run_db
+from app.services.attachment_prefetcher import get_attachment_prefetcher
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
@@ -169,12 +171,13 @@ class AnnouncementsWebSocketService:
                 return
             
             # Insert into database (id-based de-duplication)
-            inserted = service.insert_announcement(announcement)
+            inserted = await run_db("announcements", service.insert_announcement, announcement)
             
             if inserted:
                 headline = announcement.get('news_headline', '') or ''
                 headline_preview = headline[:50] if headline else 'N/A'
                 logger.info(f"Inserted new announcement: {announcement_id} - {headline_preview}")
+                get_attachment_prefetcher().enqueue(self.connection_id, [announcement_id])
                 
                 # Broadcast to all connected frontend clients
                 try:
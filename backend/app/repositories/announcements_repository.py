@@ -1,57 +1,53 @@
 import os
 import duckdb
+import hashlib
 import logging
+import tempfile
+import pandas as pd
 import threading
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
+from app.core.pagination import decode_cursor, encode_cursor, get_count_cache, keyset_predicate
 
 logger = logging.getLogger(__name__)
 
+# Normalized (company, headline) hash used for duplicate detection; NULL unless both are present
+DEDUP_KEY_SQL = "md5(LOWER(NULLIF(TRIM({company}), '')) || chr(31) || LOWER(NULLIF(TRIM({headline}), '')))"
+
+
 class AnnouncementsRepository:
     _init_lock = threading.Lock()
-    _initialized = False
+    # Database files initialized/migrated in this process
+    _initialized_paths = set()
 
     def __init__(self):
         self.data_dir = os.path.abspath(settings.DATA_DIR)
         self.db_dir = os.path.join(self.data_dir, "Company Fundamentals")
         self.db_path = os.path.join(self.db_dir, "corporate_announcements.duckdb")
+        self.attachments_dir = os.path.join(self.db_dir, "attachments")
         os.makedirs(self.db_dir, exist_ok=True)
         self.ensure_initialized()
 
     def get_connection(self):
-        """Get DuckDB connection"""
+        """Get a cursor on the shared announcements DuckDB connection (caller closes it)"""
+        registry = get_duckdb_registry()
         try:
-            conn = duckdb.connect(self.db_path, config={'allow_unsigned_extensions': True}, read_only=False)
-            conn.execute("PRAGMA enable_progress_bar=false")
-            return conn
+            return registry.get_connection(self.db_path, read_only_fallback=True)
         except Exception as e:
-            err_msg = str(e).lower()
-            if "permission denied" in err_msg or "lock" in err_msg or "resource temporarily unavailable" in err_msg:
-                logger.warning(f"Announcements DB is locked or permission denied. Falling back to READ-ONLY mode.")
-                try:
-                    conn = duckdb.connect(self.db_path, config={'allow_unsigned_extensions': True}, read_only=True)
-                    conn.execute("PRAGMA enable_progress_bar=false")
-                    return conn
-                except Exception as ro_err:
-                    logger.error(f"Failed to open Announcements DB in Read-Only mode: {ro_err}")
-                    raise ro_err
-            
             logger.error(f"Error connecting to announcements database: {e}")
             # Retry initialization
-            self._initialized = False
+            AnnouncementsRepository._initialized_paths.discard(self.db_path)
             self.ensure_initialized()
-            conn = duckdb.connect(self.db_path, config={'allow_unsigned_extensions': True})
-            conn.execute("PRAGMA enable_progress_bar=false")
-            return conn
+            return registry.get_connection(self.db_path)
 
     def ensure_initialized(self):
-        if self._initialized: return
+        if self.db_path in self._initialized_paths: return
         with self._init_lock:
-            if self._initialized: return
+            if self.db_path in self._initialized_paths: return
             try:
-                conn = duckdb.connect(self.db_path, config={'allow_unsigned_extensions': True})
-                conn.execute("PRAGMA enable_progress_bar=false")
+                conn = get_duckdb_registry().get_connection(self.db_path)
                 
                 # Check table
                 exists = False
@@ -77,8 +73,10 @@ class AnnouncementsRepository:
                             announcement_type VARCHAR,
                             meeting_type VARCHAR,
                             date_of_meeting TIMESTAMP WITH TIME ZONE,
-                            attachment_data BLOB,
+                            attachment_sha256 VARCHAR,
+                            attachment_size BIGINT,
                             attachment_content_type VARCHAR,
+                            dedup_key VARCHAR,
                             created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                             updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
                         )
@@ -92,80 +90,244 @@ class AnnouncementsRepository:
                     conn.execute("CREATE INDEX IF NOT EXISTS idx_company_name ON corporate_announcements(company_name)")
                     conn.execute("CREATE INDEX IF NOT EXISTS idx_descriptor_id ON corporate_announcements(descriptor_id)")
                 
+                self._migrate_dedup_key(conn)
+                self._migrate_attachments(conn)
                 conn.close()
-                self._initialized = True
+                AnnouncementsRepository._initialized_paths.add(self.db_path)
             except Exception as e:
                 logger.error(f"Failed to init announcements DB: {e}")
 
+    def _migrate_dedup_key(self, conn):
+        """Add, backfill and uniquely index dedup_key on databases created before it existed"""
+        conn.execute("ALTER TABLE corporate_announcements ADD COLUMN IF NOT EXISTS dedup_key VARCHAR")
+        indexed = conn.execute(
+            "SELECT 1 FROM duckdb_indexes() WHERE table_name = 'corporate_announcements' AND index_name = 'idx_dedup_key'"
+        ).fetchone()
+        if indexed:
+            return
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            conn.execute(f"""
+                UPDATE corporate_announcements
+                SET dedup_key = {DEDUP_KEY_SQL.format(company="company_name", headline="news_headline")}
+                WHERE dedup_key IS NULL
+            """)
+            # Rows stored before headline dedup existed may collide; the oldest keeps the key
+            conn.execute("""
+                UPDATE corporate_announcements SET dedup_key = NULL
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, row_number() OVER (PARTITION BY dedup_key ORDER BY created_at, id) AS rn
+                        FROM corporate_announcements WHERE dedup_key IS NOT NULL
+                    ) WHERE rn > 1
+                )
+            """)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_dedup_key ON corporate_announcements(dedup_key)")
+        # Fold the migration into the database file instead of leaving it for WAL replay
+        conn.execute("CHECKPOINT")
+
+    def _migrate_attachments(self, conn, batch_size: int = 100):
+        """Move attachment BLOBs of databases created before the file store into it"""
+        conn.execute("ALTER TABLE corporate_announcements ADD COLUMN IF NOT EXISTS attachment_sha256 VARCHAR")
+        conn.execute("ALTER TABLE corporate_announcements ADD COLUMN IF NOT EXISTS attachment_size BIGINT")
+        has_blob_column = conn.execute(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = 'corporate_announcements' AND column_name = 'attachment_data'"
+        ).fetchone()
+        if not has_blob_column:
+            return
+        moved = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, attachment_data FROM corporate_announcements WHERE attachment_data IS NOT NULL LIMIT ?",
+                [batch_size]
+            ).fetchall()
+            if not rows:
+                break
+            # Files first, so a crash in between leaves the BLOB in place to retry
+            updates = [[*self._write_attachment_file(data), id] for id, data in rows]
+            conn.executemany(
+                "UPDATE corporate_announcements SET attachment_sha256 = ?, attachment_size = ?, attachment_data = NULL WHERE id = ?",
+                updates
+            )
+            moved += len(updates)
+        if moved:
+            # The column cannot be dropped while indexes exist; it stays, always NULL
+            conn.execute("CHECKPOINT")
+            logger.info(f"Moved {moved} announcement attachments to {self.attachments_dir}")
+
+    def _attachment_path(self, sha256: str) -> str:
+        return os.path.join(self.attachments_dir, sha256[:2], sha256[2:4], sha256)
+
+    def _write_attachment_file(self, data: bytes) -> Tuple[str, int]:
+        """Store bytes under their sha256 (written once, shared by identical files)"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._attachment_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return sha256, len(data)
+
     def insert_announcement(self, announcement: Dict[str, Any]) -> bool:
+        """
+        Insert one announcement; False if its id or its (company, headline) key already exists.
+        Both checks are point lookups on the primary key and the unique dedup_key index.
+        """
         if not announcement.get("id"): return False
         conn = self.get_connection()
         try:
-            # Duplicate checks
-            if announcement.get("company_name") and announcement.get("news_headline"):
-                 c_name = str(announcement["company_name"]).strip().lower()
-                 headline = str(announcement["news_headline"]).strip().lower()
-                 exist = conn.execute("SELECT id FROM corporate_announcements WHERE LOWER(TRIM(company_name)) = ? AND LOWER(TRIM(news_headline)) = ?", [c_name, headline]).fetchone()
-                 if exist: return False
-
-            exist_id = conn.execute("SELECT id FROM corporate_announcements WHERE id = ?", [announcement["id"]]).fetchone()
-            if exist_id: return False
-
-            conn.execute("""
+            conn.execute(f"""
                 INSERT INTO corporate_announcements (
                     id, trade_date, script_code, symbol_nse, symbol_bse,
                     company_name, file_status, news_headline, news_subhead,
                     news_body, descriptor_id, announcement_type, meeting_type,
-                    date_of_meeting
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    date_of_meeting, dedup_key
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {DEDUP_KEY_SQL.format(company="?", headline="?")})
             """, [
                 announcement.get("id"), announcement.get("trade_date"), announcement.get("script_code"),
                 announcement.get("symbol_nse"), announcement.get("symbol_bse"), announcement.get("company_name"),
                 announcement.get("file_status"), announcement.get("news_headline"), announcement.get("news_subhead"),
                 announcement.get("news_body"), announcement.get("descriptor_id"), announcement.get("announcement_type"),
-                announcement.get("meeting_type"), announcement.get("date_of_meeting")
+                announcement.get("meeting_type"), announcement.get("date_of_meeting"),
+                announcement.get("company_name"), announcement.get("news_headline")
             ])
             conn.commit()
             return True
+        except duckdb.ConstraintException:
+            return False
+        finally:
+            conn.close()
+
+    INSERT_COLUMNS = [
+        ("id", "VARCHAR"), ("trade_date", "TIMESTAMPTZ"), ("script_code", "INTEGER"),
+        ("symbol_nse", "VARCHAR"), ("symbol_bse", "VARCHAR"), ("company_name", "VARCHAR"),
+        ("file_status", "VARCHAR"), ("news_headline", "VARCHAR"), ("news_subhead", "VARCHAR"),
+        ("news_body", "VARCHAR"), ("descriptor_id", "INTEGER"), ("announcement_type", "VARCHAR"),
+        ("meeting_type", "VARCHAR"), ("date_of_meeting", "TIMESTAMPTZ"),
+    ]
+
+    def insert_announcements(self, announcements: List[Dict[str, Any]]) -> List[str]:
+        """
+        Insert a batch of announcements in one statement and return the ids actually inserted.
+        Rows are skipped when their id or their dedup_key (normalized company + headline)
+        already exists; both checks are one anti-join against the staged batch instead of
+        lookups per row. Within the batch the first row wins. Unparseable dates/numbers are
+        stored as NULL.
+        """
+        batch, seen_ids = [], set()
+        for announcement in announcements:
+            aid = announcement.get("id")
+            if not aid or aid in seen_ids:
+                continue
+            seen_ids.add(aid)
+            batch.append(announcement)
+        if not batch:
+            return []
+
+        names = [name for name, _ in self.INSERT_COLUMNS]
+        frame = pd.DataFrame(
+            [[None if a.get(name) is None else str(a.get(name)) for name in names] for a in batch],
+            columns=names, dtype=object
+        )
+        frame.insert(0, "_row", range(len(frame)))
+        select_list = ", ".join(
+            f"i.{name}" if sql_type == "VARCHAR" else f"TRY_CAST(i.{name} AS {sql_type})"
+            for name, sql_type in self.INSERT_COLUMNS
+        )
+        conn = self.get_connection()
+        conn.register("incoming_announcements", frame)
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                rows = conn.execute(f"""
+                    INSERT INTO corporate_announcements ({", ".join(names)}, dedup_key)
+                    SELECT {select_list}, i.dedup_key
+                    FROM (
+                        SELECT *, {DEDUP_KEY_SQL.format(company="company_name", headline="news_headline")} AS dedup_key
+                        FROM incoming_announcements
+                    ) i
+                    WHERE NOT EXISTS (SELECT 1 FROM corporate_announcements a WHERE a.id = i.id)
+                      AND NOT EXISTS (SELECT 1 FROM corporate_announcements a WHERE a.dedup_key = i.dedup_key)
+                    QUALIFY row_number() OVER (PARTITION BY COALESCE(i.dedup_key, i.id) ORDER BY i._row) = 1
+                    ORDER BY i._row
+                    RETURNING id
+                """).fetchall()
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
         finally:
+            conn.unregister("incoming_announcements")
             conn.close()
+        inserted = {r[0] for r in rows}
+        return [a["id"] for a in batch if a["id"] in inserted]
 
     def get_announcements(self, from_date=None, to_date=None, symbol=None, search=None, limit=None, offset=0, **kwargs) -> Tuple[List[Dict], int]:
+        items, total, _ = self.get_announcements_page(from_date, to_date, symbol, search, limit, offset)
+        return items, total
+
+    def get_announcements_page(self, from_date=None, to_date=None, symbol=None, search=None, limit=None, offset=0,
+                               cursor: Optional[str] = None, include_total: bool = True) -> Tuple[List[Dict], Optional[int], Optional[str]]:
+        """
+        Announcements newest first, ordered by (trade_date DESC, id DESC).
+        With a cursor the page starts after the cursor's key and offset is ignored,
+        so deep pages cost the same as the first. Returns (items, total, next_cursor);
+        total is None when include_total is False.
+        """
         conn = self.get_connection()
         try:
             where = ["1=1"]
             params = []
-            c_params = []
             
             if from_date:
                 where.append("trade_date >= ?")
                 params.append(from_date)
-                c_params.append(from_date)
             if to_date:
                 where.append("trade_date <= ?")
                 params.append(to_date + " 23:59:59")
-                c_params.append(to_date + " 23:59:59")
             if symbol:
                 s = symbol.lower().strip()
                 pat = f"%{s}%"
                 where.append("(LOWER(symbol_nse) LIKE ? OR LOWER(symbol_bse) LIKE ? OR CAST(script_code AS VARCHAR) LIKE ? OR LOWER(company_name) LIKE ?)")
                 params.extend([pat, pat, pat, pat])
-                c_params.extend([pat, pat, pat, pat])
             if search:
                 s = search.lower().strip()
                 pat = f"%{s}%"
                 where.append("(LOWER(news_headline) LIKE ? OR LOWER(symbol_nse) LIKE ? OR LOWER(symbol_bse) LIKE ? OR CAST(script_code AS VARCHAR) LIKE ?)")
                 params.extend([pat, pat, pat, pat])
-                c_params.extend([pat, pat, pat, pat])
 
             where_clause = " AND ".join(where)
             
-            count = conn.execute(f"SELECT COUNT(*) FROM corporate_announcements WHERE {where_clause}", c_params).fetchone()[0]
+            count = None
+            if include_total:
+                count = get_count_cache().get_or_compute(
+                    ("announcements", self.db_path, where_clause, tuple(params)),
+                    lambda: conn.execute(f"SELECT COUNT(*) FROM corporate_announcements WHERE {where_clause}", params).fetchone()[0]
+                )
             
+            page_params = list(params)
+            if cursor:
+                trade_date, last_id = decode_cursor(cursor, 2)
+                predicate, predicate_params = keyset_predicate("trade_date", "id", trade_date, last_id)
+                where_clause = f"{where_clause} AND {predicate}"
+                page_params += predicate_params
+                offset = 0
+
             limit_clause = ""
             if limit:
                 limit_clause = "LIMIT ? OFFSET ?"
-                params.extend([limit, offset])
+                page_params.extend([limit + 1, offset])
 
             query = f"""
                 SELECT id, trade_date, script_code, symbol_nse, symbol_bse,
@@ -174,13 +336,18 @@ class AnnouncementsRepository:
                        date_of_meeting, created_at, updated_at
                 FROM corporate_announcements
                 WHERE {where_clause}
-                ORDER BY trade_date DESC
+                ORDER BY trade_date DESC NULLS LAST, id DESC
                 {limit_clause}
             """
             
-            cursor = conn.execute(query, params)
-            cols = [d[0] for d in cursor.description]
-            rows = cursor.fetchall()
+            cursor_result = conn.execute(query, page_params)
+            cols = [d[0] for d in cursor_result.description]
+            rows = cursor_result.fetchall()
+            
+            next_cursor = None
+            if limit and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor([rows[-1][1], rows[-1][0]])
             
             res = []
             for r in rows:
@@ -189,7 +356,7 @@ class AnnouncementsRepository:
                      if d.get(k): d[k] = d[k].isoformat() if hasattr(d[k], 'isoformat') else str(d[k])
                 res.append(d)
             
-            return res, count
+            return res, count, next_cursor
         finally:
             conn.close()
 
@@ -208,53 +375,63 @@ class AnnouncementsRepository:
             conn.close()
 
     def update_attachment(self, id: str, data: bytes, ctype: str):
+        """Write the file to the attachment store and record its hash, size and type"""
+        sha256, size = self._write_attachment_file(data)
         conn = self.get_connection()
         try:
-            conn.execute("UPDATE corporate_announcements SET attachment_data = ?, attachment_content_type = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", [data, ctype, id])
+            conn.execute(
+                "UPDATE corporate_announcements SET attachment_sha256 = ?, attachment_size = ?, attachment_content_type = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                [sha256, size, ctype, id]
+            )
             conn.commit()
             return True
         finally:
             conn.close()
 
     def get_attachment(self, id: str):
+        """Path and metadata of a stored attachment; None if never stored or the file is gone"""
         conn = self.get_connection()
         try:
-            r = conn.execute("SELECT attachment_data, attachment_content_type FROM corporate_announcements WHERE id = ?", [id]).fetchone()
-            if r and r[0]: return {'data': r[0], 'content_type': r[1]}
-            return None
-        finally:
-            conn.close()
-
-    def get_descriptor_metadata(self, descriptor_id: int) -> Optional[Dict[str, Any]]:
-        conn = self.get_connection()
-        try:
-            r = conn.execute("SELECT * FROM descriptor_metadata WHERE descriptor_id = ?", [descriptor_id]).fetchone()
-            if not r: return None
-            return {"descriptor_id": r[0], "descriptor_name": r[1], "descriptor_category": r[2], "updated_at": r[3].isoformat() if r[3] else None}
+            r = conn.execute("SELECT attachment_sha256, attachment_size, attachment_content_type FROM corporate_announcements WHERE id = ?", [id]).fetchone()
         finally:
             conn.close()
+        if not r or not r[0]: return None
+        path = self._attachment_path(r[0])
+        if not os.path.exists(path):
+            logger.warning(f"Attachment file for {id} is missing: {path}")
+            return None
+        return {'path': path, 'sha256': r[0], 'size': r[1], 'content_type': r[2]}
 
-    def get_descriptor_metadata_batch(self, descriptor_ids: List[int]) -> Dict[int, Dict[str, Any]]:
-        if not descriptor_ids: return {}
+    def get_all_descriptor_metadata(self) -> Dict[int, Dict[str, Any]]:
+        """The whole descriptor_metadata table keyed by descriptor_id (a few hundred rows)"""
         conn = self.get_connection()
         try:
-            placeholders = ','.join(['?' for _ in descriptor_ids])
-            rows = conn.execute(f"SELECT descriptor_id, descriptor_name, descriptor_category, updated_at FROM descriptor_metadata WHERE descriptor_id IN ({placeholders})", descriptor_ids).fetchall()
+            rows = conn.execute("SELECT descriptor_id, descriptor_name, descriptor_category, updated_at FROM descriptor_metadata").fetchall()
             res = {}
             for r in rows:
                 res[r[0]] = {"descriptor_id": r[0], "descriptor_name": r[1], "descriptor_category": r[2], "updated_at": r[3].isoformat() if r[3] else None}
             return res
         finally:
             conn.close()
-            
-    def cache_descriptor_metadata(self, descriptors: List[Dict[str, Any]]):
+
+    def cache_descriptor_metadata(self, descriptors: List[Dict[str, Any]]) -> int:
+        """Upsert descriptors in one statement; returns the number of rows written"""
+        # One row per id (last wins): an upsert cannot touch the same row twice
+        rows = {}
+        for d in descriptors:
+            if d.get("descriptor_id") is None or not d.get("descriptor_name"):
+                logger.warning(f"Skipping descriptor without id or name: {d}")
+                continue
+            rows[d["descriptor_id"]] = [d["descriptor_id"], d["descriptor_name"], d.get("descriptor_category")]
+        if not rows: return 0
         conn = self.get_connection()
         try:
-            for d in descriptors:
-                conn.execute(
-                    "INSERT OR REPLACE INTO descriptor_metadata (descriptor_id, descriptor_name, descriptor_category, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
-                    [d.get("descriptor_id"), d.get("descriptor_name"), d.get("descriptor_category")]
-                )
+            placeholders = ", ".join(["(?, ?, ?, CURRENT_TIMESTAMP)"] * len(rows))
+            conn.execute(
+                f"INSERT OR REPLACE INTO descriptor_metadata (descriptor_id, descriptor_name, descriptor_category, updated_at) VALUES {placeholders}",
+                [v for row in rows.values() for v in row]
+            )
             conn.commit()
+            return len(rows)
         finally:
             conn.close()
@@ -1,11 +1,13 @@
 import duckdb
 import os
+import json
+import hashlib
 import logging
-import time
 import pandas as pd
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +16,7 @@ class ScreenerRepository:
         self.data_dir = os.path.abspath(settings.DATA_DIR)
         self.db_dir = os.path.join(self.data_dir, "Company Fundamentals")
         self.db_path = os.path.join(self.db_dir, "screener.duckdb")
+        self.page_cache_dir = os.path.join(self.db_dir, "page_cache")
         os.makedirs(self.db_dir, exist_ok=True)
         
         # Initialize DB if needed (e.g. on first access)
@@ -28,7 +31,7 @@ class ScreenerRepository:
     def init_screener_database(self):
         """Initialize DuckDB database and create unified time-series table"""
         try:
-            conn = duckdb.connect(self.db_path, config={'allow_unsigned_extensions': True})
+            conn = get_duckdb_registry().get_connection(self.db_path, on_open=self._configure_connection)
             
             # Create unified time-series table
             conn.execute("""
@@ -47,7 +50,8 @@ class ScreenerRepository:
                     consolidated_flag VARCHAR DEFAULT 'CONSOLIDATED',
                     source VARCHAR DEFAULT 'screener.in',
                     captured_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                    metadata TEXT
+                    metadata TEXT,
+                    parent_key VARCHAR NOT NULL DEFAULT ''
                 )
             """)
             
@@ -70,7 +74,8 @@ class ScreenerRepository:
                 CREATE INDEX IF NOT EXISTS idx_entity_type 
                 ON screener_data(entity_type, parent_company_symbol)
             """)
-            
+            self._ensure_natural_key(conn)
+
             # Create scraping logs table
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS screener_scraping_logs (
@@ -121,6 +126,8 @@ class ScreenerRepository:
             if 'records_count' not in current_columns_detailed:
                  conn.execute("ALTER TABLE screener_detailed_logs ADD COLUMN records_count INTEGER")
             
+            self._ensure_log_sequence(conn)
+            
             # Create indexes for detailed logs
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_detailed_logs_job_id 
@@ -191,37 +198,88 @@ class ScreenerRepository:
         except Exception as e:
             logger.warning(f"Could not ensure default connection: {e}")
 
+    def _ensure_natural_key(self, conn: duckdb.DuckDBPyConnection):
+        """
+        Migrate screener_data to one row per natural key.
+        Databases written by the old append-only scraper hold a copy of every metric per
+        run; the newest copy is kept before the unique index is created. Indexes created
+        before parent_key was part of the key are rebuilt with it.
+        """
+        index = conn.execute(
+            "SELECT sql FROM duckdb_indexes() WHERE index_name = 'uq_screener_data_natural_key'"
+        ).fetchone()
+        if not index or "parent_key" not in (index[0] or ""):
+            conn.execute("ALTER TABLE screener_data ADD COLUMN IF NOT EXISTS parent_key VARCHAR DEFAULT ''")
+            if index:
+                conn.execute("DROP INDEX uq_screener_data_natural_key")
+            conn.execute(f"UPDATE screener_data SET parent_key = {self.PARENT_KEY_SQL}")
+            key = ", ".join(self.NATURAL_KEY)
+            deleted = conn.execute(f"""
+                DELETE FROM screener_data
+                WHERE id NOT IN (SELECT MAX(id) FROM screener_data GROUP BY {key})
+            """).fetchone()
+            if deleted and deleted[0]:
+                logger.info(f"Removed {deleted[0]} duplicate screener_data rows before adding natural key index")
+            conn.execute(f"CREATE UNIQUE INDEX uq_screener_data_natural_key ON screener_data({key})")
+
+        conn.execute("CREATE SEQUENCE IF NOT EXISTS screener_data_changes_id_seq START 1")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS screener_data_changes (
+                id INTEGER PRIMARY KEY,
+                symbol VARCHAR NOT NULL,
+                period_type VARCHAR NOT NULL,
+                period_key VARCHAR NOT NULL,
+                statement_group VARCHAR NOT NULL,
+                metric_name VARCHAR NOT NULL,
+                old_value DOUBLE,
+                new_value DOUBLE,
+                changed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def _ensure_log_sequence(self, conn: duckdb.DuckDBPyConnection):
+        """Detailed log ids come from a sequence, started after any ids assigned with MAX(id) + 1"""
+        exists = conn.execute(
+            "SELECT COUNT(*) FROM duckdb_sequences() WHERE sequence_name = 'screener_detailed_logs_id_seq'"
+        ).fetchone()[0]
+        if not exists:
+            start = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM screener_detailed_logs").fetchone()[0]
+            conn.execute(f"CREATE SEQUENCE screener_detailed_logs_id_seq START {int(start)}")
+
+    def _configure_connection(self, conn: duckdb.DuckDBPyConnection):
+        """One-time setup run whenever the shared Screener connection is (re)opened"""
+        conn.execute("SET threads=1")
+        try:
+            tables = {row[0] for row in conn.execute(
+                "SELECT table_name FROM information_schema.tables "
+                "WHERE table_name IN ('screener_data', 'screener_connections', 'screener_detailed_logs')"
+            ).fetchall()}
+            if 'screener_connections' in tables:
+                self._ensure_default_connection(conn)
+        except Exception as e:
+            logger.warning(f"Could not ensure default connection: {e}")
+            tables = set()
+        if 'screener_data' in tables:
+            try:
+                self._ensure_natural_key(conn)
+            except Exception as e:
+                logger.warning(f"Could not migrate screener_data to natural key upserts: {e}")
+        if 'screener_detailed_logs' in tables:
+            try:
+                self._ensure_log_sequence(conn)
+            except Exception as e:
+                logger.warning(f"Could not create detailed log id sequence: {e}")
+
     def get_db_connection(self):
-        """Get a DuckDB connection to the Screener database with proper configuration"""
+        """Get a cursor on the shared Screener DuckDB connection (caller closes it)"""
         if not os.path.exists(self.db_path):
             self.init_screener_database()
         
-        max_retries = 3
-        retry_delay = 0.5
-        
-        for attempt in range(max_retries):
-            try:
-                conn = duckdb.connect(self.db_path, read_only=False, config={'allow_unsigned_extensions': True})
-                conn.execute("SET enable_progress_bar=false")
-                conn.execute("SET threads=1")
-                try:
-                    self._ensure_default_connection(conn)
-                except Exception as e:
-                    logger.warning(f"Could not ensure default connection: {e}")
-                return conn
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    error_msg = str(e)
-                    if "being used by another process" in error_msg or "Cannot open file" in error_msg:
-                        logger.warning(f"[DB] Database file is locked (attempt {attempt + 1}/{max_retries}), retrying in {retry_delay}s...")
-                        time.sleep(retry_delay)
-                        retry_delay *= 2
-                    else:
-                        logger.error(f"Failed to connect to Screener database at {self.db_path}: {e}", exc_info=True)
-                        raise
-                else:
-                    logger.error(f"Failed to connect to Screener database at {self.db_path} after {max_retries} attempts: {e}", exc_info=True)
-                    raise
+        try:
+            return get_duckdb_registry().get_connection(self.db_path, on_open=self._configure_connection)
+        except Exception as e:
+            logger.error(f"Failed to connect to Screener database at {self.db_path}: {e}", exc_info=True)
+            raise
 
     def insert_metric(
         self,
@@ -239,7 +297,7 @@ class ScreenerRepository:
         consolidated_flag: str = "CONSOLIDATED",
         metadata: Optional[str] = None
     ):
-        """Insert a single metric into the unified table"""
+        """Insert or update a single metric in the unified table"""
         if metric_value is None and period_type != "EVENT":
             return
         
@@ -255,16 +313,103 @@ class ScreenerRepository:
                 INSERT INTO screener_data (
                     id, entity_type, parent_company_symbol, symbol, exchange,
                     period_type, period_key, statement_group, metric_name,
-                    metric_value, unit, consolidated_flag, source, metadata
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, [
+                    metric_value, unit, consolidated_flag, source, metadata, parent_key
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, ''))
+            """ + self.UPSERT_CLAUSE, [
                 next_id, entity_type, parent_company_symbol, symbol, exchange,
                 period_type, period_key, statement_group, metric_name,
-                metric_value, unit, consolidated_flag, "screener.in", metadata
+                metric_value, unit, consolidated_flag, "screener.in", metadata, parent_company_symbol
             ])
         except Exception as e:
             logger.warning(f"Failed to insert metric {metric_name} for {symbol}: {e}")
 
+    METRIC_COLUMNS = [
+        "entity_type", "parent_company_symbol", "symbol", "exchange",
+        "period_type", "period_key", "statement_group", "metric_name",
+        "metric_value", "unit", "consolidated_flag", "metadata"
+    ]
+
+    # One stored row per metric and period; re-scrapes update it in place.
+    # parent_key (parent_company_symbol, '' if none) keeps a PEER row per listing company,
+    # so two companies sharing a peer each keep their own peer rows.
+    NATURAL_KEY = ["symbol", "period_type", "period_key", "statement_group", "metric_name", "parent_key"]
+    PARENT_KEY_SQL = "COALESCE(parent_company_symbol, '')"
+
+    # entity_type/parent_company_symbol are left alone: DuckDB can't update indexed columns on conflict
+    UPSERT_CLAUSE = """
+        ON CONFLICT (symbol, period_type, period_key, statement_group, metric_name, parent_key) DO UPDATE SET
+            exchange = EXCLUDED.exchange,
+            metric_value = EXCLUDED.metric_value,
+            unit = EXCLUDED.unit,
+            consolidated_flag = EXCLUDED.consolidated_flag,
+            source = EXCLUDED.source,
+            metadata = EXCLUDED.metadata,
+            captured_at = now()
+    """
+
+    def insert_metrics_bulk(self, conn: duckdb.DuckDBPyConnection, rows: List[Dict[str, Any]]) -> int:
+        """
+        Upsert a batch of metrics in a single INSERT ... SELECT ... ON CONFLICT.
+        Rows are dicts keyed by METRIC_COLUMNS; new rows take ids from screener_data_id_seq.
+        With SCREENER_TRACK_VALUE_CHANGES, rows whose value differs from the stored one
+        are recorded in screener_data_changes first.
+        Returns the number of rows written; on failure the batch is rolled back and the error re-raised.
+        """
+        rows = [r for r in rows if r.get("metric_value") is not None or r.get("period_type") == "EVENT"]
+        if not rows:
+            return 0
+        
+        # object dtype keeps None as NULL and avoids pandas' str dtype, which DuckDB can't scan
+        batch = pd.DataFrame(rows, columns=self.METRIC_COLUMNS, dtype=object)
+        batch["metric_value"] = pd.to_numeric(batch["metric_value"], errors="coerce").astype("float64")
+        batch["consolidated_flag"] = batch["consolidated_flag"].fillna("CONSOLIDATED")
+        batch["parent_key"] = batch["parent_company_symbol"].fillna("")
+        # ON CONFLICT can't touch the same row twice in one statement
+        batch = batch.drop_duplicates(subset=self.NATURAL_KEY, keep="last")
+        
+        try:
+            conn.register("metric_batch", batch)
+            conn.execute("BEGIN TRANSACTION")
+            if settings.SCREENER_TRACK_VALUE_CHANGES:
+                conn.execute("""
+                    INSERT INTO screener_data_changes (
+                        id, symbol, period_type, period_key, statement_group, metric_name, old_value, new_value
+                    )
+                    SELECT
+                        nextval('screener_data_changes_id_seq'), b.symbol, b.period_type, b.period_key,
+                        b.statement_group, b.metric_name, d.metric_value, b.metric_value
+                    FROM metric_batch b
+                    JOIN screener_data d USING (symbol, period_type, period_key, statement_group, metric_name, parent_key)
+                    WHERE d.metric_value IS DISTINCT FROM b.metric_value
+                """)
+            conn.execute("""
+                INSERT INTO screener_data (
+                    id, entity_type, parent_company_symbol, symbol, exchange,
+                    period_type, period_key, statement_group, metric_name,
+                    metric_value, unit, consolidated_flag, source, metadata, parent_key
+                )
+                SELECT
+                    nextval('screener_data_id_seq'), entity_type, parent_company_symbol, symbol, exchange,
+                    period_type, period_key, statement_group, metric_name,
+                    metric_value, unit, consolidated_flag, 'screener.in', metadata, parent_key
+                FROM metric_batch
+            """ + self.UPSERT_CLAUSE)
+            conn.execute("COMMIT")
+            return len(batch)
+        except Exception as e:
+            try:
+                conn.execute("ROLLBACK")
+            except Exception:
+                pass
+            symbol = rows[0].get("symbol")
+            logger.warning(f"Failed to upsert {len(rows)} metrics for {symbol}: {e}")
+            raise
+        finally:
+            try:
+                conn.unregister("metric_batch")
+            except Exception:
+                pass
+
     def write_detailed_log(
         self,
         conn: duckdb.DuckDBPyConnection,
@@ -282,24 +427,54 @@ class ScreenerRepository:
     ):
         """Write detailed log entry"""
         try:
-            try:
-                max_id_result = conn.execute("SELECT COALESCE(MAX(id), 0) FROM screener_detailed_logs").fetchone()
-                next_id = (max_id_result[0] if max_id_result else 0) + 1
-            except:
-                next_id = 1
-            
             conn.execute("""
                 INSERT INTO screener_detailed_logs 
                 (id, job_id, connection_id, connection_name, symbol, exchange, company_name, 
                  symbol_index, total_symbols, action, message, records_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (nextval('screener_detailed_logs_id_seq'), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, [
-                next_id, job_id, connection_id, connection_name, symbol, exchange, company_name,
+                job_id, connection_id, connection_name, symbol, exchange, company_name,
                 symbol_index, total_symbols, action, message, records_count
             ])
         except Exception as e:
             logger.warning(f"Failed to write detailed log: {e}")
 
+    LOG_COLUMNS = [
+        "job_id", "connection_id", "connection_name", "symbol", "exchange", "company_name",
+        "symbol_index", "total_symbols", "action", "message", "records_count", "logged_at"
+    ]
+
+    def write_detailed_logs(self, conn: duckdb.DuckDBPyConnection, events: List[Dict[str, Any]]) -> int:
+        """
+        Write a batch of detailed log events (dicts keyed by LOG_COLUMNS) in one INSERT ... SELECT.
+        logged_at is when the event happened, so buffered events keep their original timestamp.
+        """
+        if not events:
+            return 0
+        
+        batch = pd.DataFrame(events, columns=self.LOG_COLUMNS, dtype=object)
+        try:
+            conn.register("log_batch", batch)
+            conn.execute("""
+                INSERT INTO screener_detailed_logs 
+                (id, job_id, connection_id, connection_name, symbol, exchange, company_name, 
+                 symbol_index, total_symbols, action, message, records_count, timestamp)
+                SELECT
+                    nextval('screener_detailed_logs_id_seq'), job_id, CAST(connection_id AS INTEGER), connection_name,
+                    symbol, exchange, company_name, CAST(symbol_index AS INTEGER), CAST(total_symbols AS INTEGER),
+                    action, message, CAST(records_count AS INTEGER), COALESCE(CAST(logged_at AS TIMESTAMPTZ), now())
+                FROM log_batch
+            """)
+            return len(batch)
+        except Exception as e:
+            logger.warning(f"Failed to write {len(events)} detailed logs: {e}")
+            return 0
+        finally:
+            try:
+                conn.unregister("log_batch")
+            except Exception:
+                pass
+
     def save_scraping_log(
         self,
         conn,
@@ -369,22 +544,20 @@ class ScreenerRepository:
         
         try:
             logger.info(f"[SYMBOL_SELECTION] Loading symbols database from: {symbols_db_path}")
-            conn.execute(f"ATTACH '{symbols_db_path}' AS symbols_db")
-            
-            query = conn.execute("""
-                SELECT name, exchange, exchange_token, trading_symbol
-                FROM symbols_db.symbols
-                WHERE status = 'ACTIVE'
-                AND (instrument_type = 'CASH' OR instrument_type = 'EQ')
-                AND (
-                    (exchange = 'NSE' AND name IS NOT NULL AND TRIM(name) != '') OR
-                    (exchange = 'BSE' AND exchange_token IS NOT NULL AND TRIM(exchange_token) != '')
-                )
-                ORDER BY exchange, UPPER(COALESCE(name, exchange_token))
-            """)
-            
-            rows = query.fetchall()
-            conn.execute("DETACH symbols_db")
+            # Read through the shared symbols connection instead of ATTACHing the
+            # file into this database, which would open it a second time in-process
+            with get_duckdb_registry().connection(symbols_db_path) as symbols_conn:
+                rows = symbols_conn.execute("""
+                    SELECT name, exchange, exchange_token, trading_symbol
+                    FROM symbols
+                    WHERE status = 'ACTIVE'
+                    AND (instrument_type = 'CASH' OR instrument_type = 'EQ')
+                    AND (
+                        (exchange = 'NSE' AND name IS NOT NULL AND TRIM(name) != '') OR
+                        (exchange = 'BSE' AND exchange_token IS NOT NULL AND TRIM(exchange_token) != '')
+                    )
+                    ORDER BY exchange, UPPER(COALESCE(name, exchange_token))
+                """).fetchall()
             
             symbols_list = []
             seen_symbols = set()
@@ -424,12 +597,122 @@ class ScreenerRepository:
             
         except Exception as e:
             logger.error(f"[SYMBOL_SELECTION] Error getting active symbols: {e}", exc_info=True)
-            try:
-                conn.execute("DETACH symbols_db")
-            except:
-                pass
             return []
 
+    # Annual/quarterly keys look like "Mar 2024", snapshot keys are ISO dates; anything else (TTM) sorts last
+    PERIOD_DATE_SQL = "COALESCE(try_strptime(period_key, '%b %Y'), try_strptime(period_key, '%Y-%m-%d'))"
+
+    def get_metric_matrix(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        symbols: List[str],
+        statement_group: Optional[str] = None,
+        period_type: Optional[str] = None,
+        metrics: Optional[List[str]] = None
+    ) -> Optional[duckdb.DuckDBPyConnection]:
+        """
+        Pivot the tall metric rows of the given symbols into one row per
+        (symbol, statement_group, period_type, period_key) and one column per metric.
+        Returns the executed result so the caller can fetch it as rows or Arrow,
+        or None if nothing matches.
+        """
+        filters = [f"symbol IN ({', '.join('?' for _ in symbols)})"]
+        params: List[Any] = list(symbols)
+        if statement_group:
+            filters.append("statement_group = ?")
+            params.append(statement_group)
+        if period_type:
+            filters.append("period_type = ?")
+            params.append(period_type)
+        if metrics:
+            filters.append(f"metric_name IN ({', '.join('?' for _ in metrics)})")
+            params.extend(metrics)
+        where = " AND ".join(filters)
+
+        # PIVOT can only take parameters when its columns are listed explicitly
+        metric_names = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT metric_name FROM screener_data WHERE {where} ORDER BY metric_name", params
+        ).fetchall()]
+        if not metric_names:
+            return None
+        pivot_columns = ", ".join("'" + name.replace("'", "''") + "'" for name in metric_names)
+
+        return conn.execute(f"""
+            PIVOT (
+                SELECT symbol, statement_group, period_type, period_key, metric_name, metric_value
+                FROM screener_data
+                WHERE {where}
+            )
+            ON metric_name IN ({pivot_columns})
+            USING first(metric_value)
+            GROUP BY symbol, statement_group, period_type, period_key
+            ORDER BY symbol, statement_group, period_type, {self.PERIOD_DATE_SQL} NULLS LAST, period_key
+        """, params)
+
+    def get_cross_section(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        metric_name: str,
+        statement_group: Optional[str] = None,
+        period_type: Optional[str] = None
+    ) -> duckdb.DuckDBPyConnection:
+        """Latest value of one metric for every company symbol; returns the executed result"""
+        filters = ["metric_name = ?", "entity_type = 'COMPANY'"]
+        params: List[Any] = [metric_name]
+        if statement_group:
+            filters.append("statement_group = ?")
+            params.append(statement_group)
+        if period_type:
+            filters.append("period_type = ?")
+            params.append(period_type)
+
+        # arg_max over a single scan is several times cheaper than a ROW_NUMBER() window
+        return conn.execute(f"""
+            SELECT
+                symbol,
+                arg_max(exchange, latest) AS exchange,
+                arg_max(statement_group, latest) AS statement_group,
+                arg_max(period_type, latest) AS period_type,
+                arg_max(period_key, latest) AS period_key,
+                arg_max(metric_value, latest) AS metric_value,
+                arg_max(unit, latest) AS unit
+            FROM (
+                SELECT *, (COALESCE({self.PERIOD_DATE_SQL}, '-infinity'::TIMESTAMP), captured_at) AS latest
+                FROM screener_data
+                WHERE {" AND ".join(filters)}
+            )
+            GROUP BY symbol
+            ORDER BY symbol
+        """, params)
+
+    def _page_cache_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.page_cache_dir, key[:2], f"{key}.json")
+
+    def get_page_cache_entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached ETag / Last-Modified / body hash for a page URL, if any"""
+        path = self._page_cache_path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable page cache entry for {url}: {e}")
+            return None
+
+    def save_page_cache_entry(self, url: str, entry: Dict[str, Any]):
+        """Persist a page cache entry. Call only after the page's data has been written."""
+        path = self._page_cache_path(url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({**entry, "url": url}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to save page cache entry for {url}: {e}")
+
     def log_job_failure(self, job_id, triggered_by, started_at, error_msg):
         """Helper to log job failure when main connection isn't available"""
         try:
@@ -1,35 +1,70 @@
 import duckdb
 import os
+import re
+import csv
 import logging
+import threading
 import pandas as pd
 from datetime import datetime, timezone
 from typing import List, Dict, Optional, Any, Tuple
 from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
+from app.core.pagination import decode_cursor, encode_cursor, get_count_cache, keyset_predicate
 
 logger = logging.getLogger(__name__)
 
 class SymbolsRepository:
+    # Schema setup is idempotent (IF NOT EXISTS) and runs once per database file per process,
+    # so databases created by older versions pick up new tables and columns
+    _schema_ready: set = set()
+    _schema_lock = threading.Lock()
+
     def __init__(self):
         self.data_dir = os.path.abspath(settings.DATA_DIR)
         self.db_dir = os.path.join(self.data_dir, "symbols")
         self.db_path = os.path.join(self.db_dir, "symbols.duckdb")
         os.makedirs(self.db_dir, exist_ok=True)
         
-        # Initialize DB if needed
-        if not os.path.exists(self.db_path):
-             self.init_symbols_database()
+        # Initialize DB / apply schema updates if needed
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        if self.db_path in SymbolsRepository._schema_ready and os.path.exists(self.db_path):
+            return
+        with SymbolsRepository._schema_lock:
+            if self.db_path not in SymbolsRepository._schema_ready or not os.path.exists(self.db_path):
+                self.init_symbols_database()
+                SymbolsRepository._schema_ready.add(self.db_path)
 
     def get_symbols_db_path(self) -> str:
         return self.db_path
 
+    def _ensure_symbol_key(self, conn):
+        """
+        Uploads upsert on (exchange, trading_symbol). Databases created without the
+        UNIQUE constraint get a unique index, keeping the oldest row per key.
+        """
+        has_key = conn.execute("""
+            SELECT COUNT(*) FROM duckdb_constraints()
+            WHERE table_name = 'symbols' AND constraint_type = 'UNIQUE'
+            AND constraint_column_names = ['exchange', 'trading_symbol']
+        """).fetchone()[0] or conn.execute(
+            "SELECT COUNT(*) FROM duckdb_indexes() WHERE index_name = 'uq_symbols_exchange_trading_symbol'"
+        ).fetchone()[0]
+        if not has_key:
+            deleted = conn.execute("""
+                DELETE FROM symbols
+                WHERE id NOT IN (SELECT MIN(id) FROM symbols GROUP BY exchange, trading_symbol)
+            """).fetchone()
+            if deleted and deleted[0]:
+                logger.info(f"Removed {deleted[0]} duplicate symbols before adding unique key index")
+            conn.execute("CREATE UNIQUE INDEX uq_symbols_exchange_trading_symbol ON symbols(exchange, trading_symbol)")
+
     def get_db_connection(self):
-        """Get a DuckDB connection with consistent configuration"""
+        """Get a cursor on the shared symbols DuckDB connection (caller closes it)"""
         try:
-            if not os.path.exists(self.db_path):
-                self.init_symbols_database()
-            conn = duckdb.connect(self.db_path, config={'allow_unsigned_extensions': True})
-            conn.execute("PRAGMA enable_progress_bar=false")
-            return conn
+            self._ensure_schema()
+            return get_duckdb_registry().get_connection(self.db_path)
         except Exception as e:
             logger.error(f"Failed to get database connection: {str(e)}", exc_info=True)
             raise
@@ -37,8 +72,7 @@ class SymbolsRepository:
     def init_symbols_database(self):
         """Initialize DuckDB database and create tables"""
         try:
-            conn = duckdb.connect(self.db_path, config={'allow_unsigned_extensions': True})
-            conn.execute("PRAGMA enable_progress_bar=false")
+            conn = get_duckdb_registry().get_connection(self.db_path)
             
             # Create symbols table
             conn.execute("""
@@ -103,7 +137,23 @@ class SymbolsRepository:
                     updated_at TIMESTAMP WITH TIME ZONE,
                     last_run_at TIMESTAMP WITH TIME ZONE,
                     next_run_at TIMESTAMP WITH TIME ZONE,
-                    created_by INTEGER
+                    created_by INTEGER,
+                    max_parallel_downloads INTEGER
+                )
+            """)
+            conn.execute("ALTER TABLE schedulers ADD COLUMN IF NOT EXISTS max_parallel_downloads INTEGER")
+            
+            # Validators of the last file applied per scheduler source, for conditional downloads
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scheduler_source_state (
+                    scheduler_id INTEGER NOT NULL,
+                    url VARCHAR NOT NULL,
+                    etag VARCHAR,
+                    last_modified VARCHAR,
+                    content_hash VARCHAR,
+                    checked_at TIMESTAMP WITH TIME ZONE,
+                    changed_at TIMESTAMP WITH TIME ZONE,
+                    PRIMARY KEY (scheduler_id, url)
                 )
             """)
             
@@ -118,9 +168,16 @@ class SymbolsRepository:
                     created_by INTEGER,
                     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP WITH TIME ZONE,
-                    last_used_at TIMESTAMP WITH TIME ZONE
+                    last_used_at TIMESTAMP WITH TIME ZONE,
+                    run_count INTEGER DEFAULT 0,
+                    total_run_ms DOUBLE DEFAULT 0,
+                    last_run_ms DOUBLE,
+                    max_run_ms DOUBLE
                 )
             """)
+            for column, column_type in [("run_count", "INTEGER DEFAULT 0"), ("total_run_ms", "DOUBLE DEFAULT 0"),
+                                        ("last_run_ms", "DOUBLE"), ("max_run_ms", "DOUBLE")]:
+                conn.execute(f"ALTER TABLE transformation_scripts ADD COLUMN IF NOT EXISTS {column} {column_type}")
             
             # Create series_lookup table
             conn.execute("""
@@ -154,6 +211,62 @@ class SymbolsRepository:
              logger.error(f"Failed to initialize symbols database: {e}")
              raise
 
+    SERIES_RANGE_PATTERN = re.compile(r'^([A-Z]+)([0-9A-Z])-([A-Z]+)([0-9A-Z])$')
+
+    @classmethod
+    def expand_series_code(cls, series_code: str) -> List[str]:
+        """
+        Codes covered by a Series.csv entry. Range entries such as 'N1-N9' or
+        'A1-A9/BA-BZ' also keep the raw entry as a code of its own.
+        """
+        if not ('-' in series_code and ('/' in series_code or len(series_code) > 5)):
+            return [series_code]
+        codes = []
+        for part in series_code.split('/'):
+            part = part.strip()
+            match = cls.SERIES_RANGE_PATTERN.match(part) if '-' in part else None
+            if not match:
+                continue
+            prefix, start_sub, end_sub = match.group(1), match.group(2), match.group(4)
+            if start_sub.isdigit() and end_sub.isdigit():
+                codes.extend(f"{prefix}{i}" for i in range(int(start_sub), int(end_sub) + 1))
+            elif start_sub.isalpha() and end_sub.isalpha():
+                codes.extend(f"{prefix}{chr(i)}" for i in range(ord(start_sub.upper()), ord(end_sub.upper()) + 1))
+        codes.append(series_code)
+        return codes
+
+    def _read_series_csv(self, csv_path: str) -> Dict[str, str]:
+        """series_code -> description with ranges expanded; later rows win, as with INSERT OR REPLACE"""
+        lookup: Dict[str, str] = {}
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                series_code = (row.get('Series Code') or '').strip()
+                description = (row.get('Description') or '').strip()
+                if series_code and description:
+                    for code in self.expand_series_code(series_code):
+                        lookup[code] = description
+        return lookup
+
+    # Process-wide series_code -> description maps, one per symbols database
+    _series_cache: Dict[str, Dict[str, str]] = {}
+    _series_lock = threading.Lock()
+
+    def get_series_descriptions(self) -> Dict[str, str]:
+        """Cached series_code -> description map; loaded from series_lookup once per process"""
+        lookup = SymbolsRepository._series_cache.get(self.db_path)
+        if lookup is not None:
+            return lookup
+        with SymbolsRepository._series_lock:
+            lookup = SymbolsRepository._series_cache.get(self.db_path)
+            if lookup is None:
+                conn = self.get_db_connection()
+                try:
+                    lookup = dict(conn.execute("SELECT series_code, description FROM series_lookup").fetchall())
+                finally:
+                    conn.close()
+                SymbolsRepository._series_cache[self.db_path] = lookup
+        return lookup
+
     def reload_series_lookup(self, force: bool = False):
         """Reload series lookup data from CSV file"""
         conn = None
@@ -189,45 +302,28 @@ class SymbolsRepository:
             if not should_reload:
                 return {"success": True, "message": "Series lookup data up to date", "reloaded": False}
             
-            if row_count > 0:
+            # Expand the CSV in memory, then replace the table in one transaction
+            lookup = self._read_series_csv(csv_path)
+            frame = pd.DataFrame({
+                "series_code": list(lookup.keys()),
+                "description": list(lookup.values())
+            }, dtype=object)
+            conn.register("series_frame", frame)
+            conn.execute("BEGIN TRANSACTION")
+            try:
                 conn.execute("DELETE FROM series_lookup")
+                conn.execute("INSERT INTO series_lookup SELECT series_code, description FROM series_frame")
+                conn.execute("INSERT OR REPLACE INTO series_lookup_metadata (id, csv_last_modified, last_loaded_at) VALUES (1, ?, CURRENT_TIMESTAMP)", [csv_mtime_dt])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.unregister("series_frame")
             
-            # Load CSV logic (simplified here, assumes CSV format is correct)
-            # Replicating the range expansion logic from original file
-            import csv
-            import re
-            loaded_count = 0
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    series_code = row.get('Series Code', '').strip()
-                    description = row.get('Description', '').strip()
-                    if series_code and description:
-                         if '-' in series_code and ('/' in series_code or len(series_code) > 5):
-                             parts = series_code.split('/')
-                             for part in parts:
-                                 part = part.strip()
-                                 if '-' in part:
-                                     match = re.match(r'^([A-Z]+)([0-9A-Z])-([A-Z]+)([0-9A-Z])$', part)
-                                     if match:
-                                         prefix = match.group(1)
-                                         start_sub = match.group(2)
-                                         end_sub = match.group(4)
-                                         if start_sub.isdigit() and end_sub.isdigit():
-                                             for i in range(int(start_sub), int(end_sub) + 1):
-                                                 conn.execute("INSERT OR REPLACE INTO series_lookup VALUES (?, ?)", [f"{prefix}{i}", description])
-                                                 loaded_count += 1
-                                         elif start_sub.isalpha() and end_sub.isalpha():
-                                              for i in range(ord(start_sub.upper()), ord(end_sub.upper()) + 1):
-                                                 conn.execute("INSERT OR REPLACE INTO series_lookup VALUES (?, ?)", [f"{prefix}{chr(i)}", description])
-                                                 loaded_count += 1
-                             conn.execute("INSERT OR REPLACE INTO series_lookup VALUES (?, ?)", [series_code, description])
-                             loaded_count += 1
-                         else:
-                             conn.execute("INSERT OR REPLACE INTO series_lookup VALUES (?, ?)", [series_code, description])
-                             loaded_count += 1
-
-            conn.execute("INSERT OR REPLACE INTO series_lookup_metadata (id, csv_last_modified, last_loaded_at) VALUES (1, ?, CURRENT_TIMESTAMP)", [csv_mtime_dt])
+            with SymbolsRepository._series_lock:
+                SymbolsRepository._series_cache[self.db_path] = lookup
+            loaded_count = len(lookup)
             return {"success": True, "message": f"Loaded {loaded_count} entries", "reloaded": True, "entries_count": loaded_count}
         except Exception as e:
             logger.error(f"Error reloading series lookup: {e}")
@@ -235,6 +331,47 @@ class SymbolsRepository:
         finally:
             if conn: conn.close()
 
+    def get_source_state(self, scheduler_id: int, url: str) -> Optional[Dict[str, Any]]:
+        """ETag / Last-Modified / content hash of the last file applied for a scheduler source"""
+        conn = self.get_db_connection()
+        try:
+            row = conn.execute("""
+                SELECT etag, last_modified, content_hash FROM scheduler_source_state
+                WHERE scheduler_id = ? AND url = ?
+            """, [scheduler_id, url]).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "content_hash": row[2]}
+
+    def save_source_state(self, scheduler_id: int, url: str, state: Dict[str, Any], changed: bool):
+        """Store a source's validators; call after its file was applied, or after a no-change check"""
+        now = datetime.now(timezone.utc)
+        conn = self.get_db_connection()
+        try:
+            conn.execute("""
+                INSERT INTO scheduler_source_state (scheduler_id, url, etag, last_modified, content_hash, checked_at, changed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (scheduler_id, url) DO UPDATE SET
+                    etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified,
+                    content_hash = EXCLUDED.content_hash, checked_at = EXCLUDED.checked_at,
+                    changed_at = COALESCE(EXCLUDED.changed_at, scheduler_source_state.changed_at)
+            """, [scheduler_id, url, state.get("etag"), state.get("last_modified"), state.get("content_hash"),
+                  now, now if changed else None])
+        finally:
+            conn.close()
+
+    def clear_source_state(self, conn, scheduler_id: Optional[int] = None):
+        """
+        Forget stored validators so the next run downloads and applies every source again;
+        without a scheduler_id every scheduler is reset (e.g. after symbols were deleted)
+        """
+        if scheduler_id is None:
+            conn.execute("DELETE FROM scheduler_source_state")
+        else:
+            conn.execute("DELETE FROM scheduler_source_state WHERE scheduler_id = ?", [scheduler_id])
+
     def save_upload_log(self, conn, job_id, filename, started_at, ended_at, status, total_rows, inserted, updated, failed, errors, triggered_by, upload_type):
         """Save upload log to database"""
         close_conn = False
@@ -249,7 +386,7 @@ class SymbolsRepository:
             
             duration = int((ended_at - started_at).total_seconds())
             error_summary = "; ".join(errors[:5]) if errors else None
-            progress_pct = 100 if status in ["SUCCESS", "PARTIAL", "FAILED"] else 0
+            progress_pct = 100 if status in ["SUCCESS", "PARTIAL", "FAILED", "NO_CHANGE"] else 0
             
             existing = conn.execute("SELECT id FROM upload_logs WHERE job_id = ?", [job_id]).fetchone()
             
@@ -277,49 +414,222 @@ class SymbolsRepository:
             logger.error(f"Failed to save upload log: {e}")
         finally:
             if close_conn and conn: conn.close()
-    
+
+    def stage_upload_file(self, conn, csv_path: str) -> int:
+        """
+        Load a spooled CSV upload into the connection's upload_staging temp table.
+        DuckDB reads the file directly; every column is kept as text so a type
+        guessed from the first rows can't fail halfway through a large file.
+        Returns the number of staged rows.
+        """
+        conn.execute("""
+            CREATE OR REPLACE TEMP TABLE upload_staging AS
+            SELECT row_number() OVER () AS _row, *
+            FROM read_csv(?, header = true, all_varchar = true)
+        """, [csv_path])
+        return conn.execute("SELECT COUNT(*) FROM upload_staging").fetchone()[0]
+
+    def stage_upload_frame(self, conn, df: pd.DataFrame) -> int:
+        """Load a DataFrame (e.g. output of a transformation script) into upload_staging"""
+        # object dtype with None for missing values; DuckDB can't scan pandas' str dtype
+        staged = df.astype(object).where(df.notna(), None)
+        conn.register("upload_frame", staged)
+        try:
+            conn.execute("""
+                CREATE OR REPLACE TEMP TABLE upload_staging AS
+                SELECT row_number() OVER () AS _row, * FROM upload_frame
+            """)
+        finally:
+            conn.unregister("upload_frame")
+        return len(staged)
+
+    UPLOAD_TEXT_COLUMNS = ['exchange_token', 'name', 'instrument_type', 'segment', 'series', 'isin']
+
+    def apply_upload_staging(self, conn, now: datetime) -> Dict[str, int]:
+        """
+        Normalize upload_staging and upsert it into symbols in one statement,
+        keyed on the unique (exchange, trading_symbol) index.
+        Returns {"valid": ..., "inserted": ..., "updated": ...}.
+        """
+        columns = {row[0] for row in conn.execute("DESCRIBE upload_staging").fetchall()}
+        symbol_column = 'trading_symbol' if 'trading_symbol' in columns else 'symbol' if 'symbol' in columns else None
+        if 'exchange' not in columns or not symbol_column:
+            raise ValueError("Upload must contain 'exchange' and 'trading_symbol' (or 'symbol') columns")
+        self._ensure_symbol_key(conn)
+
+        def col(name):
+            return '"' + name.replace('"', '""') + '"' if name in columns else 'NULL'
+
+        text_columns = ",\n".join(f"CAST({col(c)} AS VARCHAR) AS {c}" for c in self.UPLOAD_TEXT_COLUMNS)
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE upload_rows AS
+            SELECT * FROM (
+                SELECT
+                    _row,
+                    UPPER(TRIM(COALESCE(CAST({col('exchange')} AS VARCHAR), ''))) AS exchange,
+                    UPPER(TRIM(COALESCE(CAST({col(symbol_column)} AS VARCHAR), ''))) AS trading_symbol,
+                    {text_columns},
+                    TRY_CAST({col('expiry_date')} AS DATE) AS expiry_date,
+                    TRY_CAST({col('strike_price')} AS DOUBLE) AS strike_price,
+                    TRY_CAST(TRY_CAST({col('lot_size')} AS DOUBLE) AS INTEGER) AS lot_size
+                FROM upload_staging
+            )
+            WHERE exchange != '' AND trading_symbol != ''
+            QUALIFY row_number() OVER (PARTITION BY exchange, trading_symbol ORDER BY _row) = 1
+        """)
+
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            # Rows that already exist keep their id; new rows are numbered after the current max
+            valid, updated = conn.execute("""
+                SELECT COUNT(*), COUNT(s.id)
+                FROM upload_rows u
+                LEFT JOIN symbols s ON s.exchange = u.exchange AND s.trading_symbol = u.trading_symbol
+            """).fetchone()
+            conn.execute("""
+                INSERT INTO symbols (
+                    id, exchange, trading_symbol, exchange_token, name, instrument_type,
+                    segment, series, isin, expiry_date, strike_price, lot_size,
+                    status, source, created_at, updated_at, last_updated_at
+                )
+                SELECT
+                    COALESCE(s.id, m.max_id + row_number() OVER (PARTITION BY s.id IS NULL ORDER BY u._row)),
+                    u.exchange, u.trading_symbol, u.exchange_token, u.name, u.instrument_type,
+                    u.segment, u.series, u.isin, u.expiry_date, u.strike_price, u.lot_size,
+                    'ACTIVE', 'MANUAL', $now, $now, $now
+                FROM upload_rows u
+                LEFT JOIN symbols s ON s.exchange = u.exchange AND s.trading_symbol = u.trading_symbol
+                CROSS JOIN (SELECT COALESCE(MAX(id), 0) AS max_id FROM symbols) m
+                ON CONFLICT (exchange, trading_symbol) DO UPDATE SET
+                    exchange_token = EXCLUDED.exchange_token,
+                    name = EXCLUDED.name,
+                    instrument_type = EXCLUDED.instrument_type,
+                    segment = EXCLUDED.segment,
+                    series = EXCLUDED.series,
+                    isin = EXCLUDED.isin,
+                    expiry_date = EXCLUDED.expiry_date,
+                    strike_price = EXCLUDED.strike_price,
+                    lot_size = EXCLUDED.lot_size,
+                    updated_at = EXCLUDED.updated_at,
+                    last_updated_at = EXCLUDED.last_updated_at
+            """, {"now": now})
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.execute("DROP TABLE IF EXISTS upload_rows")
+            conn.execute("DROP TABLE IF EXISTS upload_staging")
+
+        inserted = valid - updated
+        return {"valid": valid, "inserted": inserted, "updated": updated}
+
     def get_transformation_script(self, script_id: int):
         conn = None
         try:
             conn = self.get_db_connection()
-            return conn.execute("SELECT name, content FROM transformation_scripts WHERE id = ?", [script_id]).fetchone()
+            return conn.execute("SELECT name, content, version FROM transformation_scripts WHERE id = ?", [script_id]).fetchone()
         finally:
             if conn: conn.close()
 
-    def get_symbols_paginated(self, limit=25, offset=0, where_clauses=[], params=[]):
+    def record_script_run(self, script_id: int, run_ms: float):
+        """Update last_used_at and the run timing stats of a transformation script"""
+        conn = None
+        try:
+            conn = self.get_db_connection()
+            conn.execute("""
+                UPDATE transformation_scripts SET
+                    last_used_at = ?,
+                    run_count = COALESCE(run_count, 0) + 1,
+                    total_run_ms = COALESCE(total_run_ms, 0) + ?,
+                    last_run_ms = ?,
+                    max_run_ms = GREATEST(COALESCE(max_run_ms, 0), ?)
+                WHERE id = ?
+            """, [datetime.now(timezone.utc), run_ms, run_ms, run_ms, script_id])
+        except Exception as e:
+            logger.warning(f"Failed to record run stats for script {script_id}: {e}")
+        finally:
+            if conn: conn.close()
+
+    SYMBOL_COLUMNS = ['id', 'exchange', 'trading_symbol', 'exchange_token', 'name', 'instrument_type',
+                      'segment', 'series', 'isin', 'expiry_date', 'strike_price', 'lot_size', 'status',
+                      'source', 'updated_at']
+
+    def _symbol_dicts(self, rows) -> List[dict]:
+        series_descriptions = self.get_series_descriptions() if rows else {}
+        result = []
+        for row in rows:
+            d = dict(zip(self.SYMBOL_COLUMNS, row))
+            d['series_description'] = series_descriptions.get(d['series']) if d['series'] else None
+            # Convert dates/timestamps to string/isoformat if needed
+            if d['updated_at']: d['updated_at'] = d['updated_at'].isoformat() if hasattr(d['updated_at'], 'isoformat') else str(d['updated_at'])
+            if d['expiry_date']: d['expiry_date'] = str(d['expiry_date'])
+            result.append(d)
+        return result
+
+    def get_symbols_paginated(self, limit=25, offset=0, where_clauses=[], params=[], cursor=None, include_total=True):
+        """
+        One page of symbols ordered by (exchange, trading_symbol).
+        With a cursor the page starts after the cursor's key (offset is ignored),
+        so deep pages cost the same as the first. Returns (items, total, next_cursor);
+        total is None when include_total is False.
+        """
         conn = None
         try:
             conn = self.get_db_connection()
             
             where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
             
-            count_sql = f"SELECT COUNT(*) FROM symbols WHERE {where_sql}"
-            total = conn.execute(count_sql, params).fetchone()[0]
+            total = None
+            if include_total:
+                count_sql = f"SELECT COUNT(*) FROM symbols WHERE {where_sql}"
+                total = get_count_cache().get_or_compute(
+                    ("symbols", self.db_path, where_sql, tuple(params)),
+                    lambda: conn.execute(count_sql, params).fetchone()[0]
+                )
+            
+            page_where, page_params = where_sql, list(params)
+            if cursor:
+                exchange, trading_symbol = decode_cursor(cursor, 2)
+                predicate, predicate_params = keyset_predicate("exchange", "trading_symbol", exchange, trading_symbol, descending=False)
+                page_where = f"({where_sql}) AND {predicate}"
+                page_params += predicate_params
+                offset = 0
             
             sql = f"""
-                SELECT id, exchange, trading_symbol, exchange_token, name, instrument_type, 
-                       segment, series, isin, expiry_date, strike_price, lot_size, status, 
-                       source, updated_at
+                SELECT {', '.join(self.SYMBOL_COLUMNS)}
                 FROM symbols
-                WHERE {where_sql}
-                ORDER BY exchange, trading_symbol
+                WHERE {page_where}
+                ORDER BY exchange NULLS LAST, trading_symbol
                 LIMIT ? OFFSET ?
             """
-            rows = conn.execute(sql, params + [limit, offset]).fetchall()
-            
-            col_names = ['id', 'exchange', 'trading_symbol', 'exchange_token', 'name', 'instrument_type', 
-                         'segment', 'series', 'isin', 'expiry_date', 'strike_price', 'lot_size', 'status', 
-                         'source', 'updated_at']
-            
-            result = []
-            for row in rows:
-                d = dict(zip(col_names, row))
-                # Convert dates/timestamps to string/isoformat if needed
-                if d['updated_at']: d['updated_at'] = d['updated_at'].isoformat() if hasattr(d['updated_at'], 'isoformat') else str(d['updated_at'])
-                if d['expiry_date']: d['expiry_date'] = str(d['expiry_date'])
-                result.append(d)
-                
-            return result, total
+            rows = conn.execute(sql, page_params + [limit + 1, offset]).fetchall()
+            next_cursor = encode_cursor([rows[limit - 1][1], rows[limit - 1][2]]) if len(rows) > limit else None
+            return self._symbol_dicts(rows[:limit]), total, next_cursor
+        finally:
+            if conn: conn.close()
+
+    def get_symbols_by_ids(self, ids: List[int]) -> List[dict]:
+        """Symbols for the given ids, in the order the ids are given"""
+        if not ids:
+            return []
+        conn = None
+        try:
+            conn = self.get_db_connection()
+            placeholders = ','.join(['?' for _ in ids])
+            rows = conn.execute(f"SELECT {', '.join(self.SYMBOL_COLUMNS)} FROM symbols WHERE id IN ({placeholders})", ids).fetchall()
+            position = {symbol_id: i for i, symbol_id in enumerate(ids)}
+            rows.sort(key=lambda r: position[r[0]])
+            return self._symbol_dicts(rows)
+        finally:
+            if conn: conn.close()
+
+    def get_search_rows(self) -> List[tuple]:
+        """(id, exchange, trading_symbol, name, status) of every symbol, for the search index"""
+        conn = None
+        try:
+            conn = self.get_db_connection()
+            return conn.execute("SELECT id, exchange, trading_symbol, name, status FROM symbols").fetchall()
         finally:
             if conn: conn.close()
 
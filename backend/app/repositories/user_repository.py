@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from typing import Optional, List
+from app.core.auth.user_cache import invalidate_user
 
 class UserRepository:
     def get_by_id(self, db: Session, user_id: int) -> Optional[User]:
@@ -28,6 +29,7 @@ class UserRepository:
     def update(self, db: Session, user: User) -> User:
         db.commit()
         db.refresh(user)
+        invalidate_user(user.id)
         return user
         
     def count(self, db: Session) -> int:
@@ -34,12 +34,13 @@ class AnnouncementResponse(BaseModel):
 class AnnouncementListResponse(BaseModel):
     """Paginated announcement list response"""
     announcements: List[AnnouncementResponse]
-    total: int
+    total: Optional[int] = None
     limit: Optional[int] = None
     offset: int = 0
     page: Optional[int] = None
     page_size: Optional[int] = None
     total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class FetchAnnouncementsRequest(BaseModel):
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import date, datetime
 
@@ -31,10 +31,12 @@ class SymbolResponse(SymbolBase):
 
 class PaginatedSymbolResponse(BaseModel):
     items: List[SymbolResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 class PreviewResponse(BaseModel):
     headers: List[str]
@@ -62,6 +64,10 @@ class ScriptResponse(ScriptBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
     last_used_at: Optional[datetime] = None
+    run_count: int = 0
+    avg_run_ms: Optional[float] = None
+    last_run_ms: Optional[float] = None
+    max_run_ms: Optional[float] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -90,6 +96,7 @@ class SchedulerCreate(BaseModel):
     script_id: Optional[int] = None
     is_active: bool = True
     sources: List[SchedulerSource]
+    max_parallel_downloads: Optional[int] = Field(None, ge=1, le=32)  # None = SCHEDULER_MAX_PARALLEL_DOWNLOADS
 
 class SchedulerUpdate(BaseModel):
     name: Optional[str] = None
@@ -101,6 +108,7 @@ class SchedulerUpdate(BaseModel):
     script_id: Optional[int] = None
     is_active: Optional[bool] = None
     sources: Optional[List[SchedulerSource]] = None
+    max_parallel_downloads: Optional[int] = Field(None, ge=1, le=32)
 
 class SchedulerResponse(BaseModel):
     id: int
@@ -118,6 +126,7 @@ class SchedulerResponse(BaseModel):
     last_run_at: Optional[datetime] = None
     next_run_at: Optional[datetime] = None
     created_by: Optional[int] = None
+    max_parallel_downloads: Optional[int] = None
     last_run_status: Optional[str] = None  # Status from upload logs (SUCCESS, FAILED, etc.)
 
     model_config = ConfigDict(from_attributes=True)
@@ -20,10 +20,12 @@ from app.repositories.feature_request_repository import FeatureRequestRepository
 from app.schemas.user import UserCreate, UserUpdate, UserStatusUpdate
 from app.schemas.admin import AccessRequestResponse, AdminMessage, ChangePasswordRequest
 from app.core.auth.security import get_password_hash
+from app.core.auth.user_cache import invalidate_user
 from app.core.websocket.manager import manager
 from app.core.logging.audit import AuditService
 from app.providers.telegram_notification_service import TelegramNotificationService
 from app.services.user_service import UserService
+from app.services.presence_service import get_presence_service
 
 class AdminService:
     def __init__(self, db: Session):
@@ -53,21 +55,11 @@ class AdminService:
             )
         users = query.order_by(User.created_at.desc()).all()
         
-        now = datetime.now(timezone.utc)
-        online_threshold = timedelta(minutes=5)
+        presence = get_presence_service()
         
         result = []
         for user in users:
-            has_websocket = manager.is_user_online(user.id)
-            has_recent_activity = False
-            if user.last_active_at:
-                last_active = user.last_active_at
-                if last_active.tzinfo is None:
-                    last_active = last_active.replace(tzinfo=timezone.utc)
-                time_diff = now - last_active
-                has_recent_activity = time_diff < online_threshold
-            
-            is_online = (has_websocket or has_recent_activity) and user.is_active
+            is_online = presence.is_online(user.id) and user.is_active
             
             user_dict = {
                 "id": user.id,
@@ -83,7 +75,7 @@ class AdminService:
                 "created_at": user.created_at,
                 "updated_at": user.updated_at,
                 "last_seen": user.last_seen,
-                "last_active_at": user.last_active_at,
+                "last_active_at": presence.last_active(user.id) or user.last_active_at,
                 "is_online": is_online,
                 "telegram_chat_id": user.telegram_chat_id
             }
@@ -95,19 +87,8 @@ class AdminService:
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        now = datetime.now(timezone.utc)
-        online_threshold = timedelta(minutes=5)
-        
-        has_websocket = manager.is_user_online(user.id)
-        has_recent_activity = False
-        if user.last_active_at:
-            last_active = user.last_active_at
-            if last_active.tzinfo is None:
-                last_active = last_active.replace(tzinfo=timezone.utc)
-            time_diff = now - last_active
-            has_recent_activity = time_diff < online_threshold
-        
-        is_online = (has_websocket or has_recent_activity) and user.is_active
+        presence = get_presence_service()
+        is_online = presence.is_online(user.id) and user.is_active
         
         user_dict = {
             "id": user.id,
@@ -123,7 +104,7 @@ class AdminService:
             "created_at": user.created_at,
             "updated_at": user.updated_at,
             "last_seen": user.last_seen,
-            "last_active_at": user.last_active_at,
+            "last_active_at": presence.last_active(user.id) or user.last_active_at,
             "is_online": is_online,
             "telegram_chat_id": user.telegram_chat_id
         }
@@ -202,8 +183,10 @@ class AdminService:
             self.db.query(AuditLog).filter(AuditLog.performer_id == user.id).update({"performer_id": None})
             self.db.query(AccessRequest).filter(AccessRequest.reviewed_by == user.id).update({"reviewed_by": None})
             
+            user_id = user.id
             self.db.delete(user)
             self.db.commit()
+            invalidate_user(user_id)
             return {"message": "User deleted successfully"}
         except IntegrityError:
             self.db.rollback()
@@ -232,6 +215,12 @@ class AdminService:
         user.updated_at = datetime.now(timezone.utc)
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user(user.id)
+        # After the commit and cache invalidation, so no request can still record the user as active
+        if user.is_active:
+             get_presence_service().restore(user.id)
+        else:
+             get_presence_service().forget(user.id)
         
         AuditService.log_action(
             db=self.db,
@@ -269,6 +258,7 @@ class AdminService:
         user.updated_at = datetime.now(timezone.utc)
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user(user.id)
         return user
 
     async def send_user_message(self, user_id: int, message_data: AdminMessage, admin: User):
@@ -356,6 +346,7 @@ class AdminService:
         user.updated_at = datetime.now(timezone.utc)
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user(user.id)
         return user
 
     def demote_from_super_admin(self, user_id: int, super_admin: User) -> User:
@@ -374,6 +365,7 @@ class AdminService:
         user.updated_at = datetime.now(timezone.utc)
         self.db.commit()
         self.db.refresh(user)
+        invalidate_user(user.id)
         return user
 
     # --- Access Requests ---
@@ -10,9 +10,15 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 from app.providers.truedata_api import get_truedata_api_service
 from app.repositories.announcements_repository import AnnouncementsRepository
+from app.services.attachment_prefetcher import get_attachment_prefetcher
 
 logger = logging.getLogger(__name__)
 
+# descriptor_metadata held in memory: loaded at startup, replaced whenever descriptors are cached.
+# Enrichment of announcements is a dict lookup instead of a DuckDB query.
+_descriptor_metadata: Dict[int, Dict[str, Any]] = {}
+_descriptor_lock = threading.Lock()
+
 class AnnouncementsService:
     def __init__(self):
         self.repo = AnnouncementsRepository()
@@ -20,9 +26,40 @@ class AnnouncementsService:
     def insert_announcement(self, announcement: Dict[str, Any]) -> bool:
         return self.repo.insert_announcement(announcement)
 
+    def insert_announcements(self, announcements: List[Dict[str, Any]]) -> List[str]:
+        """Insert a batch; returns the ids that were new (e.g. for broadcasting)"""
+        return self.repo.insert_announcements(announcements)
+
     def get_announcements(self, **kwargs) -> tuple[List[Dict[str, Any]], int]:
         return self.repo.get_announcements(**kwargs)
 
+    def get_announcements_page(self, page: Optional[int] = None, page_size: Optional[int] = None, limit: Optional[int] = None,
+                               offset: int = 0, cursor: Optional[str] = None, include_total: bool = True, **filters) -> Dict[str, Any]:
+        """
+        One page of announcements; page/page_size take precedence over limit/offset
+        and a cursor over both. A page, cursor or offset without page_size or limit
+        gets 25 rows; with none of them every match is returned.
+        """
+        limit = page_size or limit
+        if limit is None and (page or cursor or offset):
+            limit = 25
+        page_size = limit or 25
+        if page:
+            offset = (page - 1) * page_size
+        items, total, next_cursor = self.repo.get_announcements_page(
+            limit=limit, offset=offset, cursor=cursor, include_total=include_total, **filters
+        )
+        return {
+            "announcements": items,
+            "total": total,
+            "limit": page_size,
+            "offset": offset,
+            "page": page if page else (offset // page_size) + 1,
+            "page_size": page_size,
+            "total_pages": ((total + page_size - 1) // page_size if total > 0 else 1) if total is not None else None,
+            "next_cursor": next_cursor
+        }
+
     def get_announcement_by_id(self, announcement_id: str) -> Optional[Dict[str, Any]]:
         return self.repo.get_announcement(announcement_id)
 
@@ -37,10 +74,26 @@ class AnnouncementsService:
         return self.repo.get_attachment(announcement_id)
     
     def get_descriptor_metadata(self, descriptor_id: int) -> Optional[Dict[str, Any]]:
-        return self.repo.get_descriptor_metadata(descriptor_id)
+        """In-memory lookup; no database access"""
+        return _descriptor_metadata.get(descriptor_id)
 
     def get_descriptor_metadata_batch(self, descriptor_ids: List[int]) -> Dict[int, Dict[str, Any]]:
-        return self.repo.get_descriptor_metadata_batch(descriptor_ids)
+        """In-memory lookup; no database access"""
+        metadata = _descriptor_metadata
+        return {did: metadata[did] for did in descriptor_ids if did in metadata}
+
+    def load_descriptor_metadata(self) -> int:
+        """Replace the in-memory descriptor map with the database contents"""
+        global _descriptor_metadata
+        with _descriptor_lock:
+            _descriptor_metadata = self.repo.get_all_descriptor_metadata()
+            return len(_descriptor_metadata)
+
+    def cache_descriptor_metadata(self, descriptors: List[Dict[str, Any]]) -> int:
+        """Upsert descriptors and refresh the in-memory map"""
+        written = self.repo.cache_descriptor_metadata(descriptors)
+        self.load_descriptor_metadata()
+        return written
         
     def fetch_descriptors_from_truedata(self, connection_id: int):
         try:
@@ -51,7 +104,7 @@ class AnnouncementsService:
                 descriptors = response["data"]
             elif not isinstance(descriptors, list):
                 descriptors = [descriptors]
-            self.repo.cache_descriptor_metadata(descriptors)
+            self.cache_descriptor_metadata(descriptors)
         except Exception as e:
             logger.error(f"Error fetching descriptors from TrueData: {e}")
             raise
@@ -92,14 +145,16 @@ class AnnouncementsService:
                 if not isinstance(announcements_data, list):
                     announcements_data = [announcements_data] if announcements_data else []
 
-            cnt = 0
+            mapped = []
             for ann_data in announcements_data:
                 try:
-                    ann = self._map_truedata_to_schema(ann_data)
-                    if self.insert_announcement(ann): cnt += 1
+                    mapped.append(self._map_truedata_to_schema(ann_data))
                 except Exception as e:
                      logger.warning(f"Error processing announcement: {e}")
-            return cnt
+            inserted_ids = self.insert_announcements(mapped)
+            logger.info(f"Inserted {len(inserted_ids)} of {len(mapped)} announcements from TrueData REST")
+            get_attachment_prefetcher().enqueue(connection_id, inserted_ids)
+            return len(inserted_ids)
         except Exception as e:
             logger.error(f"Error fetching from TrueData REST API: {e}")
             raise
@@ -187,3 +242,8 @@ class AnnouncementsService:
 
 def get_announcements_service() -> AnnouncementsService:
     return AnnouncementsService()
+
+def init_announcements_database():
+    """Create/migrate the announcements database and load descriptor metadata (startup)"""
+    count = get_announcements_service().load_descriptor_metadata()
+    logger.info(f"Loaded {count} announcement descriptors")
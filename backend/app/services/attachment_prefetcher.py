@@ -0,0 +1,192 @@
+"""
+Attachment downloads from TrueData
+
+Announcements inserted by the WebSocket listener and the REST backfill are
+queued here, and ATTACHMENT_PREFETCH_WORKERS background threads download
+their attachments into the attachment store before anyone opens them. The
+queue is bounded (ATTACHMENT_PREFETCH_QUEUE_SIZE); ids that do not fit are
+dropped and fetched on first view instead.
+
+Every download, prefetched or requested by the attachment endpoint, goes
+through one singleflight map: while an id is being downloaded, other callers
+get the same Future instead of starting a second download.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.providers.truedata_api import get_truedata_api_service
+
+logger = logging.getLogger(__name__)
+
+
+def _announcements_service():
+    # Imported late: the announcements service feeds this module
+    from app.services.announcements_service import get_announcements_service
+    return get_announcements_service()
+
+
+class AttachmentPrefetcher:
+    """Bounded background prefetch plus singleflight on-demand downloads"""
+
+    def __init__(
+        self,
+        service_factory: Callable[[], Any] = _announcements_service,
+        api_factory: Callable[[int], Any] = get_truedata_api_service,
+    ):
+        self.service_factory = service_factory
+        self.api_factory = api_factory
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=settings.ATTACHMENT_PREFETCH_QUEUE_SIZE)
+        # On-demand downloads do not wait behind queued prefetches
+        self._executor = self._new_executor()
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stats = {"downloaded": 0, "shared": 0, "failed": 0, "dropped": 0}
+
+    # --- Feeding ---
+
+    def enqueue(self, connection_id: int, announcement_ids: Iterable[str]) -> int:
+        """Queue newly inserted announcements for prefetch; returns how many were queued"""
+        if not self._threads or self._stop_event.is_set():
+            return 0
+        queued = 0
+        for announcement_id in announcement_ids:
+            try:
+                self._queue.put_nowait((connection_id, announcement_id))
+                queued += 1
+            except queue.Full:
+                with self._lock:
+                    self._stats["dropped"] += 1
+        return queued
+
+    # --- Downloading ---
+
+    def fetch(self, connection_id: int, announcement_id: str) -> Future:
+        """
+        Future resolving to the stored attachment (see AnnouncementsRepository.get_attachment),
+        or to {'data', 'content_type'} if it could not be stored. Concurrent calls for the
+        same id share one download.
+        """
+        future, owner = self._claim(announcement_id)
+        if owner:
+            try:
+                self._executor.submit(self._run, connection_id, announcement_id, future)
+            except Exception as e:
+                # Executor shut down (stop() or interpreter exit): never leave a Future nobody completes
+                with self._lock:
+                    self._inflight.pop(announcement_id, None)
+                future.set_exception(e)
+        return future
+
+    def _claim(self, announcement_id: str):
+        with self._lock:
+            future = self._inflight.get(announcement_id)
+            if future is not None:
+                self._stats["shared"] += 1
+                return future, False
+            future = Future()
+            # Running futures cannot be cancelled, so a waiter that gives up (timeout,
+            # client disconnect) does not cancel the download shared with other waiters
+            future.set_running_or_notify_cancel()
+            self._inflight[announcement_id] = future
+            return future, True
+
+    def _run(self, connection_id: int, announcement_id: str, future: Future):
+        try:
+            future.set_result(self._download(connection_id, announcement_id))
+        except Exception as e:
+            with self._lock:
+                self._stats["failed"] += 1
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(announcement_id, None)
+
+    def _download(self, connection_id: int, announcement_id: str) -> Dict[str, Any]:
+        service = self.service_factory()
+        attachment = service.get_attachment(announcement_id)
+        if attachment:
+            return attachment
+
+        response = self.api_factory(connection_id).get_announcement_attachment(announcement_id)
+        data = response.content
+        content_type = response.headers.get('Content-Type', 'application/pdf')
+        with self._lock:
+            self._stats["downloaded"] += 1
+
+        if service.store_attachment(announcement_id, data, content_type):
+            attachment = service.get_attachment(announcement_id)
+            if attachment:
+                return attachment
+        return {"data": data, "content_type": content_type}
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            item = self._queue.get()
+            if item is None:
+                break
+            connection_id, announcement_id = item
+            future, owner = self._claim(announcement_id)
+            if not owner:
+                continue
+            self._run(connection_id, announcement_id, future)
+            if future.exception():
+                logger.debug(f"Prefetch of attachment {announcement_id} failed: {future.exception()}")
+
+    # --- Lifecycle ---
+
+    @staticmethod
+    def _new_executor() -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=settings.ATTACHMENT_FETCH_WORKERS, thread_name_prefix="AttachmentFetch")
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop_event.clear()
+        for i in range(settings.ATTACHMENT_PREFETCH_WORKERS):
+            thread = threading.Thread(target=self._worker, name=f"AttachmentPrefetch-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop prefetching; queued ids are discarded and fetched on first view"""
+        self._stop_event.set()
+        self._drain()
+        # One wake-up per worker blocked on the queue
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self._drain()
+        executor, self._executor = self._executor, self._new_executor()
+        executor.shutdown(wait=False)
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "queued": self._queue.qsize(), "in_flight": len(self._inflight)}
+
+
+_prefetcher: Optional[AttachmentPrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_attachment_prefetcher() -> AttachmentPrefetcher:
+    """Get the process-wide attachment prefetcher"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = AttachmentPrefetcher()
+        return _prefetcher
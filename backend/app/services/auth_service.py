@@ -14,6 +14,7 @@ from app.schemas.auth import (
     ResetPasswordResponse
 )
 from app.core.auth.security import verify_password, create_access_token, get_password_hash
+from app.core.auth.user_cache import invalidate_user
 from app.providers.telegram_bot import TelegramBotService
 from app.providers.telegram_notification_service import TelegramNotificationService
 from app.core.database import get_connection_manager
@@ -193,6 +194,7 @@ class AuthService:
                 # Sync is_active with account_status for consistency
                 user.is_active = False
                 self.db.commit()
+                invalidate_user(user.id)
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"User account is {user.account_status.lower()}"
@@ -292,6 +294,7 @@ class AuthService:
         user.hashed_password = get_password_hash(request.new_password)
         user.updated_at = datetime.now(timezone.utc)
         self.db.commit()
+        invalidate_user(user.id)
         
         # Send confirmation to Telegram
         if user.telegram_chat_id:
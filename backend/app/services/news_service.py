@@ -5,17 +5,23 @@ class NewsService:
     def __init__(self, get_final_news_func=None, get_backlog_func=None):
         self.get_final_news_impl = get_final_news_func or get_final_news
         self.get_backlog_impl = get_backlog_func or get_pipeline_backlog
-    def get_news(self, page: int = 1, page_size: int = 20, search: Optional[str] = None) -> Dict[str, Any]:
+    def get_news(self, page: int = 1, page_size: int = 20, search: Optional[str] = None,
+                 cursor: Optional[str] = None, include_total: bool = True) -> Dict[str, Any]:
         offset = (page - 1) * page_size
-        news_items, total = self.get_final_news_impl(limit=page_size, offset=offset, search=search)
+        news_items, total, next_cursor = self.get_final_news_impl(
+            limit=page_size, offset=offset, search=search, cursor=cursor, include_total=include_total
+        )
         
-        total_pages = (total + page_size - 1) // page_size if total > 0 else 1
+        total_pages = None
+        if total is not None:
+            total_pages = (total + page_size - 1) // page_size if total > 0 else 1
         return {
             "news": news_items,
             "total": total,
             "page": page,
             "page_size": page_size,
-            "total_pages": total_pages
+            "total_pages": total_pages,
+            "next_cursor": next_cursor
         }
 
     def get_latest_news(self, limit: int = 20) -> Tuple[List[Dict], int]:
@@ -0,0 +1,216 @@
+"""
+Presence tracking for users
+
+Activity from authenticated HTTP requests and WebSocket traffic is recorded
+in memory. A background thread writes the buffered last_active_at values with
+one executemany UPDATE every PRESENCE_FLUSH_SECONDS, so requests never wait on
+an auth database write. The set of online users (active within
+PRESENCE_ONLINE_SECONDS, or holding a WebSocket) is kept as an immutable
+snapshot; admin user lists check membership instead of recomputing each row,
+and online/offline transitions are broadcast to WebSocket clients.
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, FrozenSet, Optional, Set
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.core.database import get_db_router
+from app.core.websocket.manager import manager
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def _auth_session() -> Optional[Session]:
+    auth_client = get_db_router(settings.DATA_DIR).get_auth_db()
+    return auth_client.get_session() if auth_client else None
+
+
+class PresenceService:
+    """In-memory user activity with write-behind persistence"""
+
+    def __init__(self, session_factory: Callable[[], Optional[Session]] = _auth_session):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._last_active: Dict[int, datetime] = {}
+        self._pending: Dict[int, datetime] = {}
+        self._online: FrozenSet[int] = frozenset()
+        # Deactivated users; requests still in flight for them must not bring them back online
+        self._inactive: Set[int] = set()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Recording ---
+
+    def record(self, user_id: int, now: Optional[datetime] = None):
+        """Record activity of a user; O(1), no database access"""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            if user_id in self._inactive:
+                return
+            self._last_active[user_id] = now
+            self._pending[user_id] = now
+            came_online = user_id not in self._online
+            if came_online:
+                self._online = self._online | {user_id}
+        if came_online:
+            self._broadcast(user_id, True, now)
+
+    def record_activity(self, user: User, now: Optional[datetime] = None):
+        """Record activity and show it on the request's user without dirtying the session"""
+        now = now or datetime.now(timezone.utc)
+        self.record(user.id, now)
+        set_committed_value(user, "last_active_at", now)
+
+    def forget(self, user_id: int):
+        """
+        Drop a deactivated user's unwritten activity (deactivation clears last_active_at)
+        and ignore their activity until restore()
+        """
+        with self._lock:
+            self._inactive.add(user_id)
+            self._last_active.pop(user_id, None)
+            self._pending.pop(user_id, None)
+            self._online = self._online - {user_id}
+
+    def restore(self, user_id: int):
+        """Track a reactivated user's activity again"""
+        with self._lock:
+            self._inactive.discard(user_id)
+
+    # --- Snapshot ---
+
+    def online_user_ids(self) -> FrozenSet[int]:
+        """Users active within PRESENCE_ONLINE_SECONDS, as of the last record/tick"""
+        return self._online
+
+    def is_online(self, user_id: int) -> bool:
+        return user_id in self._online or manager.is_user_online(user_id)
+
+    def last_active(self, user_id: int) -> Optional[datetime]:
+        """Most recent activity seen by this process, including unwritten activity"""
+        return self._last_active.get(user_id)
+
+    # --- Persistence ---
+
+    def seed(self):
+        """Load users active within the online window so presence survives a restart"""
+        session = self.session_factory()
+        if session is None:
+            return
+        try:
+            since = datetime.now(timezone.utc) - timedelta(seconds=settings.PRESENCE_ONLINE_SECONDS)
+            rows = session.query(User.id, User.last_active_at).filter(User.last_active_at >= since).all()
+        finally:
+            session.close()
+        with self._lock:
+            for user_id, last_active_at in rows:
+                if last_active_at.tzinfo is None:
+                    last_active_at = last_active_at.replace(tzinfo=timezone.utc)
+                current = self._last_active.get(user_id)
+                if current is None or last_active_at > current:
+                    self._last_active[user_id] = last_active_at
+            self._online = frozenset(self._last_active)
+
+    def flush(self) -> int:
+        """Write buffered activity in one batch; returns the number of users written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        session = None
+        try:
+            session = self.session_factory()
+            if session is None:
+                return 0
+            stmt = (
+                update(User.__table__)
+                .where(User.__table__.c.id == bindparam("uid"))
+                # A flush racing a deactivation must not write last_active_at back
+                .where(User.__table__.c.is_active.is_(True))
+                .values(last_active_at=bindparam("ts"))
+            )
+            session.execute(stmt, [{"uid": uid, "ts": ts} for uid, ts in pending.items()])
+            session.commit()
+            return len(pending)
+        except Exception:
+            if session is not None:
+                session.rollback()
+            # Keep the values for the next flush unless newer ones arrived
+            with self._lock:
+                for uid, ts in pending.items():
+                    self._pending.setdefault(uid, ts)
+            raise
+        finally:
+            if session is not None:
+                session.close()
+
+    def expire(self, now: Optional[datetime] = None):
+        """Move users past the online window out of the snapshot and announce them offline"""
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=settings.PRESENCE_ONLINE_SECONDS)
+        with self._lock:
+            stale = {uid: ts for uid, ts in self._last_active.items() if ts < cutoff}
+            for uid in stale:
+                del self._last_active[uid]
+            went_offline = self._online & stale.keys()
+            self._online = self._online - went_offline
+        for uid in went_offline:
+            if not manager.is_user_online(uid):
+                self._broadcast(uid, False, stale[uid])
+
+    def _broadcast(self, user_id: int, is_online: bool, last_active_at: datetime):
+        loop = manager._loop
+        if not loop or not loop.is_running() or not manager.active_connections:
+            return
+        asyncio.run_coroutine_threadsafe(
+            manager.broadcast_user_status(user_id, is_online, last_active_at), loop
+        )
+
+    # --- Lifecycle ---
+
+    def _run(self):
+        try:
+            self.seed()
+        except Exception as e:
+            logger.warning(f"Failed to load recent user activity: {e}")
+        while not self._stop_event.wait(settings.PRESENCE_FLUSH_SECONDS):
+            try:
+                self.flush()
+                self.expire()
+            except Exception as e:
+                logger.warning(f"Failed to write user activity: {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="PresenceFlusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write what is still buffered"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+
+_presence_service: Optional[PresenceService] = None
+_presence_lock = threading.Lock()
+
+
+def get_presence_service() -> PresenceService:
+    """Get the process-wide presence service"""
+    global _presence_service
+    with _presence_lock:
+        if _presence_service is None:
+            _presence_service = PresenceService()
+        return _presence_service
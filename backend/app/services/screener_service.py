@@ -9,11 +9,99 @@ from datetime import datetime, timezone
 from typing import Dict, List, Optional, Any
 import traceback
 import io
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
 
+from app.core.config import settings
 from app.repositories.screener_repository import ScreenerRepository
+from app.providers.screener_parser import parse_screener_page
 
 logger = logging.getLogger(__name__)
 
+class TokenBucketRateLimiter:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class DetailedLogBuffer:
+    """
+    Batches screener_detailed_logs events in memory and writes them every
+    `max_events` events or `flush_interval_ms`, whichever comes first.
+    Live progress is served from ScreenerService._scraping_status_cache, so
+    the table only needs to catch up for history.
+    """
+
+    def __init__(self, repo: ScreenerRepository, max_events: int = 50, flush_interval_ms: int = 1000):
+        self.repo = repo
+        self.max_events = max(1, max_events)
+        self.flush_interval = max(flush_interval_ms, 10) / 1000
+        self._events: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="screener-log-flush", daemon=True)
+        self._thread.start()
+
+    def log(self, job_id, connection_id, connection_name, symbol, exchange, action, message,
+            company_name=None, symbol_index=None, total_symbols=None, records_count=None):
+        event = {
+            "job_id": job_id, "connection_id": connection_id, "connection_name": connection_name,
+            "symbol": symbol, "exchange": exchange, "company_name": company_name,
+            "symbol_index": symbol_index, "total_symbols": total_symbols, "action": action,
+            "message": message, "records_count": records_count, "logged_at": datetime.now(timezone.utc)
+        }
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= self.max_events
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of events written"""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+            conn = None
+            try:
+                conn = self.repo.get_db_connection()
+                return self.repo.write_detailed_logs(conn, events)
+            except Exception as e:
+                logger.warning(f"Failed to flush {len(events)} detailed logs: {e}")
+                return 0
+            finally:
+                if conn: conn.close()
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the timer thread and write the remaining events"""
+        self._closed.set()
+        self._thread.join()
+        self.flush()
+
 class ScreenerService:
     # Shared state for background tasks
     _scraping_status_cache: Dict[str, Dict] = {}
@@ -26,6 +114,8 @@ class ScreenerService:
     _connection_jobs_lock = threading.Lock()
     _session = None
     _session_lock = threading.Lock()
+    _rate_limiters: Dict[str, TokenBucketRateLimiter] = {}
+    _rate_limiters_lock = threading.Lock()
     
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0 Safari/537.36",
@@ -48,8 +138,20 @@ class ScreenerService:
                     cls._session.mount('https://', adapter)
         return cls._session
 
+    @classmethod
+    def get_rate_limiter(cls, url: str) -> TokenBucketRateLimiter:
+        """Per-host token bucket shared by all scraping workers"""
+        host = urlparse(url).netloc or url
+        with cls._rate_limiters_lock:
+            if host not in cls._rate_limiters:
+                cls._rate_limiters[host] = TokenBucketRateLimiter(
+                    settings.SCREENER_REQUESTS_PER_SECOND, settings.SCREENER_RATE_BURST
+                )
+            return cls._rate_limiters[host]
+
     def fetch_soup(self, url: str) -> BeautifulSoup:
         session = self.get_session()
+        self.get_rate_limiter(url).acquire()
         try:
             resp = session.get(url, headers=self.HEADERS, timeout=10, stream=False)
             resp.raise_for_status()
@@ -61,6 +163,49 @@ class ScreenerService:
             logger.error(f"Failed to fetch URL {url}: {e}")
             raise
 
+    def fetch_page(self, url: str) -> Dict[str, Any]:
+        """
+        Conditional GET backed by the on-disk page cache.
+        Returns {"unchanged": True} on 304 or when the body hash matches the cached one,
+        otherwise {"unchanged": False, "text": ..., "cache_entry": ...}. The caller saves
+        cache_entry once the page's data has been written.
+        """
+        cached = self.repo.get_page_cache_entry(url) if settings.SCREENER_PAGE_CACHE_ENABLED else None
+        headers = dict(self.HEADERS)
+        if cached:
+            if cached.get("etag"): headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"): headers["If-Modified-Since"] = cached["last_modified"]
+        
+        session = self.get_session()
+        self.get_rate_limiter(url).acquire()
+        try:
+            resp = session.get(url, headers=headers, timeout=10, stream=False)
+            if cached and resp.status_code == 304:
+                return {"unchanged": True}
+            resp.raise_for_status()
+        except requests.exceptions.Timeout:
+            logger.error(f"Timeout fetching URL {url}")
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to fetch URL {url}: {e}")
+            raise
+        
+        text = resp.text
+        body_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if cached and cached.get("body_hash") == body_hash:
+            return {"unchanged": True}
+        
+        return {
+            "unchanged": False,
+            "text": text,
+            "cache_entry": {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "body_hash": body_hash,
+                "fetched_at": datetime.now(timezone.utc).isoformat()
+            }
+        }
+
     # ... [Parsing Helpers from models/screener.py] ...
     
     def parse_company_name(self, soup: BeautifulSoup) -> Optional[str]:
@@ -134,87 +279,111 @@ class ScreenerService:
         if exchange.upper() == 'BSE': return str(symbol).strip()
         else: return str(symbol).strip().upper().replace(' ', '').replace('-', '').replace('.', '')
 
-    def _insert_financial_table(self, conn, df, symbol, exchange, statement_name, statement_group) -> int:
-        records = 0
+    def _metric_row(self, entity_type, parent_symbol, symbol, exchange, period_type, period_key, statement_group, metric_name, metric_value, unit=None) -> dict:
+        return {
+            "entity_type": entity_type, "parent_company_symbol": parent_symbol, "symbol": symbol,
+            "exchange": exchange, "period_type": period_type, "period_key": period_key,
+            "statement_group": statement_group, "metric_name": metric_name,
+            "metric_value": metric_value, "unit": unit
+        }
+
+    def _financial_table_rows(self, table, symbol, exchange, statement_name, statement_group) -> List[dict]:
+        """Flatten a parsed statement table ({"columns", "rows"}) into ANNUAL metric rows"""
+        rows = []
         try:
-            if df is not None and not df.empty and len(df.columns) >= 2:
-                metric_col = df.columns[0]
-                year_cols = df.columns[1:]
-                for _, row in df.iterrows():
-                    metric_name = str(row[metric_col]).strip() if pd.notna(row.get(metric_col)) else None
+            if table and len(table["columns"]) >= 2:
+                year_cols = table["columns"][1:]
+                for row in table["rows"]:
+                    metric_name = row[0].strip()
                     if not metric_name or metric_name.lower() in ['nan', 'none', '']: continue
-                    for year_col in year_cols:
+                    for year_col, metric_value in zip(year_cols, row[1:]):
                         period_key = str(year_col).strip()
                         if not period_key or period_key.lower() in ['nan', 'none', '']: continue
-                        metric_value = row.get(year_col)
-                        if pd.notna(metric_value) and str(metric_value).strip():
+                        if metric_value and metric_value.strip():
                             num_val = self.clean_numeric_value(metric_value)
                             if num_val is not None:
                                 unit = None
-                                m_str = str(metric_name).lower()
+                                m_str = metric_name.lower()
                                 if 'crore' in m_str or 'cr' in m_str: unit = "Cr"
-                                elif '%' in str(metric_value) or 'ratio' in m_str or 'percent' in m_str: unit = "%"
-                                elif '₹' in str(metric_value) or 'rs' in m_str: unit = "₹"
-                                self.repo.insert_metric(conn, "COMPANY", None, symbol, exchange, "ANNUAL", period_key, statement_group, metric_name, num_val, unit)
-                                records += 1
+                                elif '%' in metric_value or 'ratio' in m_str or 'percent' in m_str: unit = "%"
+                                elif '₹' in metric_value or 'rs' in m_str: unit = "₹"
+                                rows.append(self._metric_row("COMPANY", None, symbol, exchange, "ANNUAL", period_key, statement_group, metric_name, num_val, unit))
         except Exception as e:
-            logger.debug(f"Error inserting {statement_name} for {symbol}: {e}")
-        return records
+            logger.debug(f"Error parsing {statement_name} for {symbol}: {e}")
+        return rows
 
-    def scrape_symbol_logic(self, symbol: str, exchange: str, conn, base_url: Optional[str] = None) -> dict:
-        """Main scraping logic for a symbol"""
+    def scrape_symbol_rows(self, symbol: str, exchange: str, base_url: Optional[str] = None) -> dict:
+        """Fetch and parse a symbol's page without touching the database. Metrics are returned in "rows"."""
         if not symbol or not symbol.strip():
-             return {"success": False, "records_inserted": 0, "error": "Invalid symbol"}
+             return {"success": False, "records_inserted": 0, "rows": [], "error": "Invalid symbol"}
         
         symbol_for_url = self.format_symbol_for_url(symbol, exchange)
         url = base_url.strip().replace('{symbol}', symbol_for_url) if base_url else f"https://www.screener.in/company/{symbol_for_url}/"
         if '/consolidated/' not in url: url = url.rstrip('/') + '/consolidated/'
         
-        records_inserted = 0
         extracted_name = None
         try:
-            soup = self.fetch_soup(url)
+            page = self.fetch_page(url)
+            if page["unchanged"]:
+                return {
+                    "symbol": symbol_for_url, "exchange": exchange, "success": True, "unchanged": True,
+                    "records_inserted": 0, "rows": []
+                }
+            parsed = parse_screener_page(page["text"])
             snapshot_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-            extracted_name = self.parse_company_name(soup)
+            extracted_name = parsed["company_name"]
+            metric_rows = []
             
             # Header
-            header_data = self.parse_header_fundamentals(soup)
-            for k, v in header_data.items():
+            for k, v in parsed["header"].items():
                 if v:
                     num = self.clean_numeric_value(v)
                     unit = "%" if "%" in k else "₹" if "₹" in str(v) else None
-                    self.repo.insert_metric(conn, "COMPANY", None, symbol_for_url, exchange, "SNAPSHOT", snapshot_date, "MARKET", k, num, unit)
-                    records_inserted += 1
+                    metric_rows.append(self._metric_row("COMPANY", None, symbol_for_url, exchange, "SNAPSHOT", snapshot_date, "MARKET", k, num, unit))
             
             # Peer
-            peer_df = self.parse_peer_table(soup)
-            if peer_df is not None and not peer_df.empty:
-                first_col = peer_df.columns[0]
-                for _, row in peer_df.iterrows():
-                    peer_name = str(row[first_col]).strip() if pd.notna(row.get(first_col)) else None
+            peers = parsed["peers"]
+            if peers and peers["rows"]:
+                # Peer tables lead with a serial-number column; the peer is identified by "Name"
+                cols = peers["columns"]
+                name_idx = cols.index("Name") if "Name" in cols else 0
+                for row in peers["rows"]:
+                    peer_name = row[name_idx].strip()
                     if peer_name and peer_name.lower() not in ['nan','none','']:
-                        for col in peer_df.columns[1:]:
-                            val = row.get(col)
-                            if pd.notna(val):
+                        for col, val in list(zip(cols, row))[name_idx + 1:]:
+                            if val:
                                 num = self.clean_numeric_value(val)
                                 if num is not None:
-                                    unit = "%" if "%" in str(col) else "₹" if "Rs." in str(col) else None
-                                    self.repo.insert_metric(conn, "PEER", symbol_for_url, peer_name, exchange, "SNAPSHOT", snapshot_date, "PEER", str(col), num, unit)
-                                    records_inserted += 1
+                                    unit = "%" if "%" in col else "₹" if "Rs." in col else None
+                                    metric_rows.append(self._metric_row("PEER", symbol_for_url, peer_name, exchange, "SNAPSHOT", snapshot_date, "PEER", col, num, unit))
             
             # Financials
-            records_inserted += self._insert_financial_table(conn, self.parse_section_table(soup, "Profit & Loss"), symbol_for_url, exchange, "Profit & Loss", "Profit & Loss")
-            records_inserted += self._insert_financial_table(conn, self.parse_section_table(soup, "Balance Sheet"), symbol_for_url, exchange, "Balance Sheet", "Balance Sheet")
-            records_inserted += self._insert_financial_table(conn, self.parse_section_table(soup, "Cash Flows"), symbol_for_url, exchange, "Cash Flows", "Cash Flows")
-            records_inserted += self._insert_financial_table(conn, self.parse_section_table(soup, "Ratios"), symbol_for_url, exchange, "Ratios", "Ratios")
+            for section, table in parsed["sections"].items():
+                metric_rows.extend(self._financial_table_rows(table, symbol_for_url, exchange, section, section))
             
             return {
-                "symbol": symbol_for_url, "exchange": exchange, "success": True, 
-                "records_inserted": records_inserted, "company_name": extracted_name
+                "symbol": symbol_for_url, "exchange": exchange, "success": True,
+                "records_inserted": 0, "rows": metric_rows, "company_name": extracted_name,
+                "page_url": url, "cache_entry": page["cache_entry"]
             }
         except Exception as e:
             logger.error(f"Error scraping {symbol}: {e}")
-            return {"symbol": symbol_for_url, "exchange": exchange, "success": False, "records_inserted": 0, "error": str(e)}
+            return {"symbol": symbol_for_url, "exchange": exchange, "success": False, "records_inserted": 0, "rows": [], "error": str(e)}
+
+    def scrape_symbol_logic(self, symbol: str, exchange: str, conn, base_url: Optional[str] = None) -> dict:
+        """Main scraping logic for a symbol. All metrics of the page are written in one bulk insert."""
+        res = self.scrape_symbol_rows(symbol, exchange, base_url)
+        rows = res.pop("rows", [])
+        if res["success"] and not res.get("unchanged"):
+            res["records_inserted"] = self._write_symbol_rows(conn, res, rows)
+        return res
+
+    def _write_symbol_rows(self, conn, res: dict, rows: List[dict]) -> int:
+        """Bulk insert a parsed page and, once written, remember its cache validators"""
+        records = self.repo.insert_metrics_bulk(conn, rows)
+        if (records or not rows) and res.get("cache_entry"):
+            self.repo.save_page_cache_entry(res["page_url"], res["cache_entry"])
+        return records
 
     # Top-level Orchestrator
     def process_scraping_async(self, job_id: str, triggered_by: str, connection_id: Optional[int] = None):
@@ -265,49 +434,80 @@ class ScreenerService:
             symbols_failed = 0
             total_records = 0
             errors = []
-            
-            for idx, symbol_info in enumerate(symbols):
-                # Check stop flag
-                if connection_id:
+            processed = 0
+            stop_event = threading.Event()
+            c_name = conn_details['name'] if conn_details else None
+            base_u = conn_details['url'] if conn_details else None
+
+            def is_stopped() -> bool:
+                if connection_id and not stop_event.is_set():
                     with self._stop_flags_lock:
                         if self._stop_flags.get(connection_id, False):
-                            self._handle_job_end(job_id, connection_id, "STOPPED", errors + ["Stopped by user"], symbols_succeeded, symbols_failed, total_records, total_symbols, started_at, triggered_by)
-                            return
+                            stop_event.set()
+                return stop_event.is_set()
 
+            def fetch_task(idx, symbol_info):
+                # Runs on a fetch worker: network + parsing only, no database access
+                if is_stopped():
+                    return idx, symbol_info, None
                 symbol_clean = symbol_info.get("symbol", "").strip()
-                display_name = symbol_info.get("display_name", symbol_clean)
                 exchange = symbol_info.get("exchange", "").upper()
-                
-                self._scraping_status_cache[job_id]["current_symbol"] = display_name
+                self._scraping_status_cache[job_id]["current_symbol"] = symbol_info.get("display_name", symbol_clean)
                 self._scraping_status_cache[job_id]["current_exchange"] = exchange
-                
-                s_conn = self.repo.get_db_connection()
                 try:
-                    c_name = conn_details['name'] if conn_details else None
-                    self.repo.write_detailed_log(s_conn, job_id, connection_id, c_name, symbol_clean, exchange, "FETCH", f"Fetching {display_name} ({idx+1}/{total_symbols})", company_name=display_name, symbol_index=idx+1, total_symbols=total_symbols)
-                    
-                    base_u = conn_details['url'] if conn_details else None
-                    res = self.scrape_symbol_logic(symbol_clean, exchange, s_conn, base_u)
-                    
-                    time.sleep(1) # Rate limit
-                    
-                    if res["success"]:
-                        symbols_succeeded += 1
-                        total_records += res["records_inserted"]
-                        self.repo.write_detailed_log(s_conn, job_id, connection_id, c_name, symbol_clean, exchange, "INSERT", f"Scraped {res['records_inserted']} records", company_name=display_name, symbol_index=idx+1, total_symbols=total_symbols, records_count=res["records_inserted"])
-                    else:
-                        symbols_failed += 1
-                        err = res.get("error", "Unknown")
-                        errors.append(f"{display_name}: {err}")
-                        self.repo.write_detailed_log(s_conn, job_id, connection_id, c_name, symbol_clean, exchange, "ERROR", f"Failed: {err}", company_name=display_name, symbol_index=idx+1, total_symbols=total_symbols)
-                
+                    return idx, symbol_info, self.scrape_symbol_rows(symbol_clean, exchange, base_u)
                 except Exception as e:
-                     symbols_failed += 1
-                     errors.append(f"{display_name}: {str(e)}")
-                finally:
-                    s_conn.close()
-                
-                self._update_cache(job_id, idx+1, symbols_succeeded, symbols_failed, total_records, total_symbols)
+                    return idx, symbol_info, {"success": False, "error": str(e), "rows": []}
+
+            # Fetch workers run concurrently behind the per-host rate limiter;
+            # this thread is the single writer that drains their results into DuckDB.
+            workers = max(1, settings.SCREENER_FETCH_WORKERS)
+            w_conn = self.repo.get_db_connection()
+            log_buffer = DetailedLogBuffer(self.repo, settings.SCREENER_LOG_FLUSH_EVENTS, settings.SCREENER_LOG_FLUSH_INTERVAL_MS)
+            try:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"screener-{job_id[:8]}") as pool:
+                    futures = [pool.submit(fetch_task, idx, info) for idx, info in enumerate(symbols)]
+                    for future in as_completed(futures):
+                        if is_stopped():
+                            for f in futures: f.cancel()
+                        if future.cancelled():
+                            continue
+                        idx, symbol_info, res = future.result()
+                        if res is None:
+                            continue
+
+                        symbol_clean = symbol_info.get("symbol", "").strip()
+                        display_name = symbol_info.get("display_name", symbol_clean)
+                        exchange = symbol_info.get("exchange", "").upper()
+                        processed += 1
+                        try:
+                            log_buffer.log(job_id, connection_id, c_name, symbol_clean, exchange, "FETCH", f"Fetching {display_name} ({idx+1}/{total_symbols})", company_name=display_name, symbol_index=idx+1, total_symbols=total_symbols)
+                            if res.get("unchanged"):
+                                symbols_succeeded += 1
+                                log_buffer.log(job_id, connection_id, c_name, symbol_clean, exchange, "SKIP", "Page unchanged since last scrape", company_name=display_name, symbol_index=idx+1, total_symbols=total_symbols, records_count=0)
+                            elif res["success"]:
+                                records = self._write_symbol_rows(w_conn, res, res.get("rows", []))
+                                symbols_succeeded += 1
+                                total_records += records
+                                log_buffer.log(job_id, connection_id, c_name, symbol_clean, exchange, "INSERT", f"Scraped {records} records", company_name=display_name, symbol_index=idx+1, total_symbols=total_symbols, records_count=records)
+                            else:
+                                symbols_failed += 1
+                                err = res.get("error", "Unknown")
+                                errors.append(f"{display_name}: {err}")
+                                log_buffer.log(job_id, connection_id, c_name, symbol_clean, exchange, "ERROR", f"Failed: {err}", company_name=display_name, symbol_index=idx+1, total_symbols=total_symbols)
+                        except Exception as e:
+                            symbols_failed += 1
+                            errors.append(f"{display_name}: {str(e)}")
+                            log_buffer.log(job_id, connection_id, c_name, symbol_clean, exchange, "ERROR", f"Failed: {e}", company_name=display_name, symbol_index=idx+1, total_symbols=total_symbols)
+
+                        self._update_cache(job_id, processed, symbols_succeeded, symbols_failed, total_records, total_symbols)
+            finally:
+                log_buffer.close()
+                w_conn.close()
+
+            if stop_event.is_set():
+                self._handle_job_end(job_id, connection_id, "STOPPED", errors + ["Stopped by user"], symbols_succeeded, symbols_failed, total_records, total_symbols, started_at, triggered_by)
+                return
 
             self._handle_job_end(job_id, connection_id, "COMPLETED" if symbols_failed == 0 else "COMPLETED (Partial)", errors, symbols_succeeded, symbols_failed, total_records, total_symbols, started_at, triggered_by)
 
@@ -490,3 +690,69 @@ class ScreenerService:
              raise
         finally:
              if conn: conn.close()
+
+    def _result_columns(self, result) -> dict:
+        """Compact columnar JSON: column names once, values as one list per column"""
+        if result is None:
+            return {"row_count": 0, "columns": {}}
+        names = [d[0] for d in result.description]
+        rows = result.fetchall()
+        values = list(zip(*rows)) if rows else [()] * len(names)
+        return {"row_count": len(rows), "columns": {name: list(col) for name, col in zip(names, values)}}
+
+    def _result_arrow_ipc(self, result) -> bytes:
+        """Serialize a result as an Arrow IPC stream (requires pyarrow)"""
+        import pyarrow as pa
+
+        table = result.fetch_arrow_table() if result is not None else pa.table({})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def get_fundamentals(
+        self,
+        symbols: List[str],
+        statement_group: Optional[str] = None,
+        period_type: Optional[str] = None,
+        metrics: Optional[List[str]] = None,
+        output_format: str = "json"
+    ):
+        """Period x metric matrix for the given symbols as columnar JSON or Arrow IPC bytes"""
+        conn = None
+        try:
+            conn = self.repo.get_db_connection()
+            result = self.repo.get_metric_matrix(conn, symbols, statement_group, period_type, metrics)
+            if output_format == "arrow":
+                return self._result_arrow_ipc(result)
+            return self._result_columns(result)
+        except ImportError:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading fundamentals for {symbols}: {e}")
+            return self._result_columns(None) if output_format != "arrow" else self._result_arrow_ipc(None)
+        finally:
+            if conn: conn.close()
+
+    def get_cross_section(
+        self,
+        metric_name: str,
+        statement_group: Optional[str] = None,
+        period_type: Optional[str] = None,
+        output_format: str = "json"
+    ):
+        """Latest value of one metric across all symbols as columnar JSON or Arrow IPC bytes"""
+        conn = None
+        try:
+            conn = self.repo.get_db_connection()
+            result = self.repo.get_cross_section(conn, metric_name, statement_group, period_type)
+            if output_format == "arrow":
+                return self._result_arrow_ipc(result)
+            return self._result_columns(result)
+        except ImportError:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading cross-section for {metric_name}: {e}")
+            return self._result_columns(None) if output_format != "arrow" else self._result_arrow_ipc(None)
+        finally:
+            if conn: conn.close()
@@ -0,0 +1,161 @@
+"""
+Execution of symbol transformation scripts
+
+Scripts are compiled once per (script_id, version) and run in a small pool of
+worker processes, so a heavy pandas transform neither holds the API process's
+GIL nor can corrupt its state; a crashing script only takes down its worker.
+Each worker keeps its own compiled-code cache. Editing a script bumps its
+version, so stale code is never reused. The run time is measured inside the
+worker and returned with the result. A script still running after
+SCRIPT_TIMEOUT_SECONDS has its workers terminated and the pool recreated.
+This is process isolation, not a sandbox: scripts can use any builtins.
+
+SCRIPT_WORKER_PROCESSES = 0 runs scripts in the calling process.
+"""
+import builtins
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from types import CodeType
+from typing import Any, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Compiled scripts kept per process (the API process and each worker)
+COMPILED_CACHE_SIZE = 32
+
+_compiled: "OrderedDict[Tuple[Any, ...], Tuple[str, CodeType]]" = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def _compile(key: Tuple[Any, ...], content: str) -> CodeType:
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+    with _compiled_lock:
+        entry = _compiled.get(key)
+        # The digest guards against a deleted script's id being reused with the same version
+        if entry and entry[0] == digest:
+            _compiled.move_to_end(key)
+            return entry[1]
+    code = compile(content, f"<transformation script {key[0]} v{key[1]}>", "exec")
+    with _compiled_lock:
+        _compiled[key] = (digest, code)
+        _compiled.move_to_end(key)
+        while len(_compiled) > COMPILED_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return code
+
+
+def execute_script(key: Tuple[Any, ...], content: str, df: pd.DataFrame) -> Tuple[pd.DataFrame, float]:
+    """
+    Run a script against df and return (result DataFrame, run time in ms).
+    The script must create 'final_df' or modify 'df'. Runs inside a worker process.
+    """
+    started = time.perf_counter()
+    try:
+        code = _compile(key, content)
+        scope = {'pd': pd, 'df': df.copy(), '__builtins__': builtins}
+        exec(code, scope)
+
+        result_df = None
+        if 'final_df' in scope:
+            result_df = scope['final_df']
+        elif 'df' in scope:
+            modified_df = scope['df']
+            if not modified_df.equals(df) or list(modified_df.columns) != list(df.columns) or modified_df.shape != df.shape:
+                result_df = modified_df
+    except Exception as e:
+        # User exceptions may not survive pickling back to the API process
+        raise ValueError(str(e)) from None
+
+    if result_df is None:
+        raise ValueError("Transformation script must create 'final_df' or modify 'df'.")
+    if not isinstance(result_df, pd.DataFrame):
+        raise ValueError(f"Transformation script must result in a pandas DataFrame, got {type(result_df)}")
+    return result_df, (time.perf_counter() - started) * 1000
+
+
+class ScriptRunner:
+    """Runs transformation scripts in a lazily started process pool"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that holds DuckDB and thread locks is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def run(self, df: pd.DataFrame, content: str, script_id: Optional[int] = None,
+            version: Optional[int] = None) -> Tuple[pd.DataFrame, float]:
+        """Run a script and return (result DataFrame, run time in ms); errors raise ValueError"""
+        if script_id is not None:
+            key = (script_id, version)
+        else:
+            key = ("adhoc", hashlib.sha1(content.encode("utf-8")).hexdigest()[:12])
+        if self.max_workers <= 0:
+            return execute_script(key, content, df)
+
+        pool = self._get_pool()
+        try:
+            return pool.submit(execute_script, key, content, df).result(timeout=settings.SCRIPT_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            # The worker is stuck (e.g. an endless loop); kill it so it does not hold a worker forever.
+            # Scripts running concurrently on the same pool fail as crashed.
+            self._discard_pool(pool, terminate=True)
+            raise ValueError(f"Transformation script timed out after {settings.SCRIPT_TIMEOUT_SECONDS}s")
+        except BrokenProcessPool:
+            # A worker died (e.g. the script exhausted memory); start a fresh pool next time
+            self._discard_pool(pool)
+            raise ValueError("Transformation script worker process crashed")
+
+    def _discard_pool(self, pool: ProcessPoolExecutor, terminate: bool = False):
+        """Stop using a pool; the next run starts a fresh one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        if terminate:
+            # ProcessPoolExecutor has no public terminate before Python 3.14
+            for process in list((pool._processes or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def invalidate(self, script_id: int):
+        """Drop compiled code of a script in this process; workers see the new version key"""
+        with _compiled_lock:
+            for key in [k for k in _compiled if k[0] == script_id]:
+                del _compiled[key]
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+_runner: Optional[ScriptRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_script_runner() -> ScriptRunner:
+    """Get the process-wide transformation script runner"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = ScriptRunner(settings.SCRIPT_WORKER_PROCESSES)
+        return _runner
@@ -0,0 +1,261 @@
+"""
+In-memory search index for the symbol master
+
+The admin symbol grid searches on every keystroke. A LIKE '%X%' predicate plus
+a separate COUNT(*) scans the whole symbols table twice per request, so search
+is served from an index kept in memory instead:
+
+- queries of 3+ characters use trigram postings; candidates come from the
+  rarest trigram of the query and are verified with a substring check
+- shorter queries have no trigram, so symbols and names are scanned for the
+  substring; this matches the same rows as the SQL LIKE fallback
+- when nothing contains the query, trading symbols sharing enough of its
+  trigrams are returned as fuzzy matches
+- the page is filled in rank order and stops early; large match counts are
+  estimated from a sample of the candidates
+
+The index is rebuilt in a background thread whenever the table changes.
+Until a build finishes, search() returns None and callers fall back to SQL.
+"""
+import bisect
+import logging
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from typing import Callable, Collection, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fuzzy matches need about a third of the query's trigrams (two of six for an eight letter query)
+FUZZY_MIN_SHARED_RATIO = 0.3
+# Above this many candidates the match count is estimated from a sample
+EXACT_COUNT_LIMIT = 20000
+COUNT_SAMPLE_SIZE = 2000
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SymbolSearchIndex:
+    """Trigram/prefix index over (trading_symbol, name) of every symbol"""
+
+    def __init__(self, load_rows: Callable[[], List[Tuple]]):
+        # load_rows returns (id, exchange, trading_symbol, name, status) tuples
+        self._load_rows = load_rows
+        self._lock = threading.Lock()
+        self._state: Optional[dict] = None
+        self._generation = 0
+        self._building = False
+        self.last_build_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    def invalidate(self, rebuild: bool = True):
+        """Drop the index after the table changed; optionally rebuild in the background"""
+        with self._lock:
+            self._generation += 1
+            self._state = None
+        if rebuild:
+            self._start_build()
+
+    def _start_build(self):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self.rebuild, daemon=True, name="SymbolSearchIndex").start()
+
+    def rebuild(self):
+        """Load all symbols and build the index; runs in the caller's thread"""
+        with self._lock:
+            self._building = True
+            generation = self._generation
+        try:
+            started = time.perf_counter()
+            state = self._build(self._load_rows())
+            with self._lock:
+                # A write during the build makes this snapshot stale; build again
+                stale = generation != self._generation
+                if not stale:
+                    self._state = state
+                    self.last_build_seconds = time.perf_counter() - started
+            if stale:
+                return self.rebuild()
+            logger.info(f"Symbol search index built: {len(state['ids'])} symbols in {self.last_build_seconds:.2f}s")
+        except Exception as e:
+            logger.error(f"Failed to build symbol search index: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._building = False
+
+    @staticmethod
+    def _build(rows: List[Tuple]) -> dict:
+        # Rows are ordered by exchange, trading_symbol so postings and results keep that order
+        rows = sorted(rows, key=lambda r: (r[1] or "", r[2] or ""))
+        ids, exchanges, symbols, names, statuses = [], [], [], [], []
+        symbol_postings: Dict[str, List[int]] = defaultdict(list)
+        name_postings: Dict[str, List[int]] = defaultdict(list)
+        exact: Dict[str, List[int]] = defaultdict(list)
+        symbol_prefixes: List[Tuple[str, int]] = []
+        word_prefixes: List[Tuple[str, int]] = []
+
+        for idx, (symbol_id, exchange, trading_symbol, name, status) in enumerate(rows):
+            symbol = (trading_symbol or "").upper()
+            upper_name = (name or "").upper()
+            ids.append(symbol_id)
+            exchanges.append((exchange or "").upper())
+            symbols.append(symbol)
+            names.append(upper_name)
+            statuses.append((status or "").upper())
+            for gram in _trigrams(symbol):
+                symbol_postings[gram].append(idx)
+            for gram in _trigrams(upper_name):
+                name_postings[gram].append(idx)
+            exact[symbol].append(idx)
+            symbol_prefixes.append((symbol, idx))
+            for word in set(upper_name.split()):
+                word_prefixes.append((word, idx))
+
+        symbol_prefixes.sort()
+        word_prefixes.sort()
+        return {
+            "ids": ids,
+            "exchanges": exchanges,
+            "symbols": symbols,
+            "names": names,
+            "statuses": statuses,
+            "exact": dict(exact),
+            "symbol_postings": {g: array('I', p) for g, p in symbol_postings.items()},
+            "name_postings": {g: array('I', p) for g, p in name_postings.items()},
+            "symbol_prefixes": symbol_prefixes,
+            "symbol_prefix_keys": [p[0] for p in symbol_prefixes],
+            "word_prefixes": word_prefixes,
+            "word_prefix_keys": [p[0] for p in word_prefixes],
+        }
+
+    @staticmethod
+    def _prefix_entries(keys: List[str], entries: List[Tuple[str, int]], prefix: str):
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\uffff", start)
+        return (entries[i][1] for i in range(start, end))
+
+    @staticmethod
+    def _rarest_posting(postings: Dict[str, array], grams: set):
+        best = None
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                return ()
+            if best is None or len(posting) < len(best):
+                best = posting
+        return best or ()
+
+    def search(self, query: str, exchange: Optional[str] = None, status: Optional[str] = None,
+               limit: int = 25, offset: int = 0) -> Optional[Tuple[List[int], int, bool]]:
+        """
+        Return (ids for the requested page, match count, count_is_estimate), ranked
+        exact symbol, symbol prefix, name word prefix, symbol substring, name substring.
+        The page is filled lazily in rank order; the count is exact for short queries and
+        for up to EXACT_COUNT_LIMIT trigram candidates, and estimated from a sample above that.
+        Returns None when the index is not built yet.
+        """
+        state = self._state
+        if state is None:
+            self._start_build()
+            return None
+
+        q = query.strip().upper()
+        if not q:
+            return [], 0, False
+        exchange = exchange.upper() if exchange else None
+        status = status.upper() if status else None
+        symbols, names = state["symbols"], state["names"]
+        exchanges, statuses = state["exchanges"], state["statuses"]
+
+        def allowed(idx: int) -> bool:
+            return (not exchange or exchanges[idx] == exchange) and (not status or statuses[idx] == status)
+
+        symbol_prefix = self._prefix_entries(state["symbol_prefix_keys"], state["symbol_prefixes"], q)
+        word_prefix = () if " " in q else self._prefix_entries(state["word_prefix_keys"], state["word_prefixes"], q)
+        ranked = [state["exact"].get(q, ()), symbol_prefix, word_prefix]
+        if len(q) >= 3:
+            grams = _trigrams(q)
+            symbol_candidates = self._rarest_posting(state["symbol_postings"], grams)
+            name_candidates = self._rarest_posting(state["name_postings"], grams)
+            ranked.append(i for i in symbol_candidates if q in symbols[i])
+            ranked.append(i for i in name_candidates if q in names[i])
+            pool = set(symbol_candidates)
+            pool.update(name_candidates)
+            count_limit = EXACT_COUNT_LIMIT
+
+            def matches(idx: int) -> bool:
+                return q in symbols[idx] or q in names[idx]
+        else:
+            # No trigram to look up: scan, so results and counts don't change when SQL serves
+            # the query. Counting is exact; the matching is cheap next to sampling error
+            pool = range(len(symbols))
+            count_limit = len(pool)
+            ranked.append(i for i in pool if q in symbols[i])
+            ranked.append(i for i in pool if q in names[i])
+
+            def matches(idx: int) -> bool:
+                return q in symbols[idx] or q in names[idx]
+
+        needed = offset + limit
+        page: List[int] = []
+        seen = set()
+        for bucket in ranked:
+            for idx in bucket:
+                if len(page) >= needed:
+                    break
+                if idx not in seen and allowed(idx):
+                    seen.add(idx)
+                    page.append(idx)
+
+        if not page and len(q) >= 3:
+            fuzzy = self._fuzzy(state, q, allowed)
+            return [state["ids"][i] for i in fuzzy[offset:needed]], len(fuzzy), False
+
+        total, estimated = self._count(pool, lambda i: allowed(i) and matches(i), count_limit)
+        # The estimate can't be lower than what was already found
+        total = max(total, len(page))
+        return [state["ids"][i] for i in page[offset:needed]], total, estimated
+
+    @staticmethod
+    def _count(pool: Collection[int], predicate: Callable[[int], bool], exact_limit: int) -> Tuple[int, bool]:
+        if len(pool) <= exact_limit:
+            return sum(1 for idx in pool if predicate(idx)), False
+        step = len(pool) / COUNT_SAMPLE_SIZE
+        sample = sorted(pool)
+        hits = sum(1 for k in range(COUNT_SAMPLE_SIZE) if predicate(sample[int(k * step)]))
+        return int(len(pool) * hits / COUNT_SAMPLE_SIZE), True
+
+    @staticmethod
+    def _fuzzy(state: dict, q: str, allowed: Callable[[int], bool]) -> List[int]:
+        """Trading symbols sharing enough of the query's trigrams, most shared first"""
+        grams = _trigrams(q)
+        shared = Counter()
+        for gram in grams:
+            shared.update(state["symbol_postings"].get(gram, ()))
+        min_shared = max(1, round(len(grams) * FUZZY_MIN_SHARED_RATIO))
+        matches = [idx for idx, count in shared.items() if count >= min_shared and allowed(idx)]
+        symbols = state["symbols"]
+        matches.sort(key=lambda i: (-shared[i], abs(len(symbols[i]) - len(q)), i))
+        return matches
+
+
+_indexes: Dict[str, SymbolSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_search_index(db_path: str, load_rows: Callable[[], List[Tuple]]) -> SymbolSearchIndex:
+    """Get the process-wide search index for a symbols database"""
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = _indexes[db_path] = SymbolSearchIndex(load_rows)
+        return index
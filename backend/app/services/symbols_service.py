@@ -1,4 +1,6 @@
 import pandas as pd
+import duckdb
+import csv
 import io
 import os
 import uuid
@@ -14,6 +16,9 @@ from typing import List, Optional, Dict, Any, Tuple
 from urllib.parse import urlparse
 
 from app.repositories.symbols_repository import SymbolsRepository
+from app.core.pagination import decode_cursor, encode_cursor, get_count_cache
+from app.services.script_runner import get_script_runner
+from app.services.symbol_search import SymbolSearchIndex, get_symbol_search_index
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -36,69 +41,142 @@ class SymbolsService:
                 self._scheduler_manual_locks[scheduler_id] = threading.Lock()
             return self._scheduler_manual_locks[scheduler_id]
 
-    def apply_transformation_script(self, df: pd.DataFrame, script_content: str) -> pd.DataFrame:
-        """Apply transformation script to dataframe safely"""
+    def apply_transformation_script(self, df: pd.DataFrame, script_content: str,
+                                    script_id: Optional[int] = None, version: Optional[int] = None) -> pd.DataFrame:
+        """Apply transformation script to dataframe in the script worker pool; saved scripts record run stats"""
         try:
-            safe_globals = {
-                'pd': pd,
-                'df': df.copy(),
-                '__builtins__': __builtins__
-            }
-            exec(script_content, safe_globals)
-            
-            result_df = None
-            if 'final_df' in safe_globals:
-                result_df = safe_globals['final_df']
-            elif 'df' in safe_globals:
-                modified_df = safe_globals['df']
-                if not modified_df.equals(df) or list(modified_df.columns) != list(df.columns) or modified_df.shape != df.shape:
-                    result_df = modified_df
-            
-            if result_df is None:
-                raise ValueError("Transformation script must create 'final_df' or modify 'df'.")
-            
-            if not isinstance(result_df, pd.DataFrame):
-                raise ValueError(f"Transformation script must result in a pandas DataFrame, got {type(result_df)}")
-            
-            return result_df
+            result_df, run_ms = get_script_runner().run(df, script_content, script_id, version)
         except Exception as e:
             logger.error(f"Script transformation failed: {e}")
             raise ValueError(f"Error executing transformation script: {str(e)}")
+        if script_id is not None:
+            self.repo.record_script_run(script_id, run_ms)
+        return result_df
+
+    PREVIEW_ROWS = 10
+    SPOOL_CHUNK_SIZE = 1024 * 1024
+    SPOOL_MAX_AGE_SECONDS = 24 * 3600
+
+    def _spool_dir(self) -> str:
+        spool_dir = os.path.join(self.repo.data_dir, "temp")
+        os.makedirs(spool_dir, exist_ok=True)
+        return spool_dir
+
+    def _remove_spool(self, path: Optional[str]):
+        if path and os.path.exists(path):
+            try: os.remove(path)
+            except OSError as e: logger.warning(f"Failed to remove upload spool {path}: {e}")
+
+    def _cleanup_stale_spools(self):
+        """Expire previews that never uploaded successfully and remove their spooled files"""
+        cutoff = time.time() - self.SPOOL_MAX_AGE_SECONDS
+        for preview_id, cached in list(self._preview_cache.items()):
+            if cached.get('created_at', 0) < cutoff and not cached.get('processing'):
+                self._discard_preview(preview_id)
+        spool_dir = self._spool_dir()
+        for entry in os.listdir(spool_dir):
+            path = os.path.join(spool_dir, entry)
+            if entry.startswith("upload_") and os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                self._remove_spool(path)
+
+    def _discard_preview(self, preview_id: str):
+        cached = self._preview_cache.pop(preview_id, None)
+        if cached:
+            self._remove_spool(cached.get('file_path'))
+
+    def spool_stream(self, stream, suffix: str) -> str:
+        """Copy a file-like upload body to a temp file in fixed-size chunks; returns the path"""
+        with tempfile.NamedTemporaryFile(mode='wb', delete=False, prefix="upload_", suffix=suffix, dir=self._spool_dir()) as spool:
+            while True:
+                chunk = stream.read(self.SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+            return spool.name
+
+    def _spool_as_csv(self, path: str, file_type: str) -> str:
+        """Return a CSV version of a spooled upload; Excel sheets are converted row by row"""
+        if file_type == 'CSV':
+            return path
+        if file_type != 'XLSX':
+            raise ValueError(f"Unsupported file type: {file_type}")
+
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, prefix="upload_", suffix='.csv', dir=self._spool_dir(), newline='', encoding='utf-8') as out:
+            writer = csv.writer(out)
+            if path.lower().endswith('.xls'):
+                # Legacy .xls has no streaming reader; convert through pandas
+                pd.read_excel(path).to_csv(out, index=False)
+            else:
+                from openpyxl import load_workbook
+                workbook = load_workbook(path, read_only=True, data_only=True)
+                try:
+                    for row in workbook.worksheets[0].iter_rows(values_only=True):
+                        writer.writerow(['' if v is None else v for v in row])
+                finally:
+                    workbook.close()
+            csv_path = out.name
+        self._remove_spool(path)
+        return csv_path
+
+    def _read_csv_preview(self, csv_path: str) -> Tuple[List[str], List[dict], int]:
+        """Headers, first PREVIEW_ROWS rows and total row count, read by DuckDB without loading the file"""
+        conn = duckdb.connect()
+        try:
+            source = "read_csv(?, header = true, all_varchar = true)"
+            result = conn.execute(f"SELECT * FROM {source} LIMIT {self.PREVIEW_ROWS}", [csv_path])
+            headers = [d[0] for d in result.description]
+            rows = [dict(zip(headers, r)) for r in result.fetchall()]
+            total = conn.execute(f"SELECT COUNT(*) FROM {source}", [csv_path]).fetchone()[0]
+            return headers, rows, total
+        finally:
+            conn.close()
 
-    def process_manual_upload_preview(self, file_contents: bytes, filename: str, script_id: Optional[int], user_info: dict) -> dict:
-        conn = None
+    def create_upload_preview(self, file_path: str, filename: str, file_type: str, script_id: Optional[int], user_info: dict, upload_type: str = 'MANUAL', extra: Optional[dict] = None) -> dict:
+        """
+        Build a preview for a spooled upload file. The preview owns the file until
+        an upload of it succeeds, so a failed upload can be confirmed again; previews
+        that never succeed expire after SPOOL_MAX_AGE_SECONDS. Without a transformation script the rows are
+        never loaded into pandas: the preview is read by DuckDB and the upload
+        streams the file into a staging table. Scripts work on a DataFrame, so
+        scripted uploads are still loaded in full.
+        """
+        csv_path = None
         try:
-            file_ext = os.path.splitext(filename)[1].lower()
-            if file_ext == '.csv':
-                df = pd.read_csv(io.BytesIO(file_contents), low_memory=False)
-            elif file_ext in ['.xlsx', '.xls']:
-                df = pd.read_excel(io.BytesIO(file_contents))
-            else:
-                raise ValueError("Unsupported file type")
+            self._cleanup_stale_spools()
+            csv_path = self._spool_as_csv(file_path, file_type)
 
             script_loaded = False
             transformed = False
             script_name = None
-            original_rows = len(df)
-            original_cols = len(df.columns)
+            df = None
 
             if script_id:
                 script_row = self.repo.get_transformation_script(script_id)
-                if script_row:
-                    script_name = script_row[0]
-                    script_content = script_row[1]
-                    script_loaded = True
-                    df = self.apply_transformation_script(df, script_content)
-                    transformed = True
-                else:
+                if not script_row:
                     raise ValueError(f"Transformation script {script_id} not found")
+                script_name = script_row[0]
+                script_content = script_row[1]
+                script_version = script_row[2]
+                script_loaded = True
+                df = pd.read_csv(csv_path, low_memory=False)
+                original_rows = len(df)
+                original_cols = len(df.columns)
+                df = self.apply_transformation_script(df, script_content, script_id, script_version)
+                transformed = True
+                self._remove_spool(csv_path)
+                csv_path = None
+                headers = df.columns.tolist()
+                rows = df.head(self.PREVIEW_ROWS).to_dict('records')
+                total_rows = len(df)
+            else:
+                headers, rows, total_rows = self._read_csv_preview(csv_path)
+                original_rows = total_rows
+                original_cols = len(headers)
 
             preview_id = f"preview_{uuid.uuid4().hex[:16]}"
-            new_rows = len(df)
-            new_cols = len(df.columns)
-            
             self._preview_cache[preview_id] = {
                 'df': df,
+                'file_path': csv_path,
                 'filename': filename,
                 'script_id': script_id,
                 'script_name': script_name,
@@ -106,117 +184,75 @@ class SymbolsService:
                 'transformed': transformed,
                 'original_rows': original_rows,
                 'original_cols': original_cols,
-                'new_rows': new_rows,
-                'new_cols': new_cols,
+                'new_rows': total_rows,
+                'new_cols': len(headers),
                 'user_id': user_info.get('id'),
                 'user_name': user_info.get('name') or user_info.get('username') or 'system',
-                'upload_type': 'MANUAL'
+                'upload_type': upload_type,
+                'created_at': time.time(),
+                **(extra or {})
             }
-            
+
             return {
-                "headers": df.columns.tolist(),
-                "rows": df.head(10).to_dict('records'),
-                "total_rows": len(df),
+                "headers": headers,
+                "rows": rows,
+                "total_rows": total_rows,
                 "preview_id": preview_id
             }
+        except Exception:
+            self._remove_spool(csv_path or file_path)
+            raise
+
+    def resolve_file_type(self, file_ext: str, file_type: Optional[str] = 'AUTO') -> str:
+        final_file_type = file_type or 'AUTO'
+        if final_file_type == 'AUTO':
+            final_file_type = 'XLSX' if file_ext in ['.xlsx', '.xls'] else 'CSV'
+        return final_file_type
+
+    def process_manual_upload_preview(self, file_contents, filename: str, script_id: Optional[int], user_info: dict) -> dict:
+        """Preview a manual upload given as bytes, a file-like object or an already spooled file path"""
+        file_ext = os.path.splitext(filename)[1].lower()
+        if file_ext not in ['.csv', '.xlsx', '.xls']:
+            raise ValueError("Unsupported file type")
+
+        try:
+            if isinstance(file_contents, str):
+                file_path = file_contents
+            else:
+                stream = io.BytesIO(file_contents) if isinstance(file_contents, (bytes, bytearray)) else file_contents
+                file_path = self.spool_stream(stream, file_ext)
+            return self.create_upload_preview(file_path, filename, self.resolve_file_type(file_ext), script_id, user_info, 'MANUAL')
         except Exception as e:
             logger.error(f"Failed to process manual upload preview: {e}")
             raise
 
-    def process_auto_upload_preview(self, url: str, file_type: str, headers: dict, auth_type: str, auth_value: str, script_id: Optional[int], user_info: dict) -> dict:
-        temp_file_path = None
-        try:
-            req_headers = headers or {}
-            if auth_type and auth_value:
-                if auth_type.lower() == 'bearer': req_headers['Authorization'] = f"Bearer {auth_value}"
-                elif auth_type.lower() == 'basic': req_headers['Authorization'] = f"Basic {auth_value}"
-                elif auth_type.lower() == 'api_key': req_headers['X-API-Key'] = auth_value
-            
-            response = requests.get(url, headers=req_headers, timeout=300, stream=True)
+    def download_to_spool(self, url: str, headers: Optional[dict] = None, auth_type: Optional[str] = None, auth_value: Optional[str] = None) -> Tuple[str, str]:
+        """Stream a remote file to a spool file; returns (path, file extension)"""
+        req_headers = dict(headers or {})
+        if auth_type and auth_value:
+            if auth_type.lower() == 'bearer': req_headers['Authorization'] = f"Bearer {auth_value}"
+            elif auth_type.lower() == 'basic': req_headers['Authorization'] = f"Basic {auth_value}"
+            elif auth_type.lower() == 'api_key': req_headers['X-API-Key'] = auth_value
+
+        with requests.get(url, headers=req_headers, timeout=300, stream=True) as response:
             response.raise_for_status()
-            
-            parsed_url = urlparse(url)
-            file_ext = os.path.splitext(parsed_url.path)[1].lower()
+
+            file_ext = os.path.splitext(urlparse(url).path)[1].lower()
             if not file_ext:
                 ct = response.headers.get('Content-Type', '')
                 if 'csv' in ct.lower(): file_ext = '.csv'
                 elif 'excel' in ct.lower() or 'spreadsheet' in ct.lower(): file_ext = '.xlsx'
                 else: file_ext = '.csv'
 
-            temp_dir = os.path.join(self.repo.data_dir, "temp")
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            temp_file = tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix=file_ext, dir=temp_dir)
-            temp_file_path = temp_file.name
-            for chunk in response.iter_content(chunk_size=8192):
-                temp_file.write(chunk)
-            temp_file.close()
-
-            final_file_type = file_type or 'AUTO'
-            if final_file_type == 'AUTO':
-                if file_ext == '.csv': final_file_type = 'CSV'
-                elif file_ext in ['.xlsx', '.xls']: final_file_type = 'XLSX'
-                else: final_file_type = 'CSV'
-
-            with open(temp_file_path, 'rb') as f:
-                content = f.read()
-
-            if final_file_type == 'CSV':
-                df = pd.read_csv(io.BytesIO(content), low_memory=False)
-            elif final_file_type == 'XLSX':
-                df = pd.read_excel(io.BytesIO(content))
-            else:
-                 raise ValueError(f"Unsupported file type: {final_file_type}")
+            with tempfile.NamedTemporaryFile(mode='wb', delete=False, prefix="upload_", suffix=file_ext, dir=self._spool_dir()) as spool:
+                for chunk in response.iter_content(chunk_size=self.SPOOL_CHUNK_SIZE):
+                    spool.write(chunk)
+                return spool.name, file_ext
 
-            filename = os.path.basename(parsed_url.path) or f"download{file_ext}"
-            
-            script_loaded = False
-            transformed = False
-            script_name = None
-            original_rows = len(df)
-            original_cols = len(df.columns)
-
-            if script_id:
-                script_row = self.repo.get_transformation_script(script_id)
-                if script_row:
-                    script_name = script_row[0]
-                    script_content = script_row[1]
-                    script_loaded = True
-                    df = self.apply_transformation_script(df, script_content)
-                    transformed = True
-                else:
-                    raise ValueError(f"Transformation script {script_id} not found")
-
-            preview_id = f"preview_{uuid.uuid4().hex[:16]}"
-            new_rows = len(df)
-            new_cols = len(df.columns)
-            
-            self._preview_cache[preview_id] = {
-                'df': df,
-                'filename': filename,
-                'script_id': script_id,
-                'script_name': script_name,
-                'script_loaded': script_loaded,
-                'transformed': transformed,
-                'original_rows': original_rows,
-                'original_cols': original_cols,
-                'new_rows': new_rows,
-                'new_cols': new_cols,
-                'user_id': user_info.get('id'),
-                'user_name': user_info.get('name') or user_info.get('username') or 'system',
-                'upload_type': 'AUTO'
-            }
-            
-            return {
-                "headers": df.columns.tolist(),
-                "rows": df.head(10).to_dict('records'),
-                "total_rows": len(df),
-                "preview_id": preview_id
-            }
-        finally:
-            if temp_file_path and os.path.exists(temp_file_path):
-                try: os.remove(temp_file_path)
-                except: pass
+    def process_auto_upload_preview(self, url: str, file_type: str, headers: dict, auth_type: str, auth_value: str, script_id: Optional[int], user_info: dict) -> dict:
+        file_path, file_ext = self.download_to_spool(url, headers, auth_type, auth_value)
+        filename = os.path.basename(urlparse(url).path) or f"download{file_ext}"
+        return self.create_upload_preview(file_path, filename, self.resolve_file_type(file_ext, file_type), script_id, user_info, 'AUTO')
 
     def confirm_upload(self, preview_id: str):
         if preview_id not in self._preview_cache:
@@ -229,10 +265,9 @@ class SymbolsService:
         
         return {"job_id": job_id, "status": "PROCESSING", "message": "Upload started"}
 
-    def process_upload_async(self, preview_id: str, job_id: str):
-        """Background process for upload"""
+    def process_upload_async(self, preview_id: str, job_id: str, keep_on_failure: bool = True):
+        """Background process for upload; the preview is kept after a failure so it can be retried"""
         started_at = datetime.now(timezone.utc)
-        start_time = time.time()
         
         # Init status
         self._upload_status_cache[job_id] = {
@@ -244,132 +279,53 @@ class SymbolsService:
         filename = "unknown"
         triggered_by = "system"
         upload_type = "MANUAL"
+        cached = None
+        succeeded = False
         
         try:
-             if preview_id not in self._preview_cache:
+             cached = self._preview_cache.get(preview_id)
+             if cached is None:
                  self._upload_status_cache[job_id]["status"] = "FAILED"
                  self._upload_status_cache[job_id]["errors"] = ["Preview expired"]
                  self.repo.save_upload_log(None, job_id, "unknown", started_at, datetime.now(timezone.utc), "FAILED", 0, 0, 0, 0, ["Preview expired"], "system", "MANUAL")
                  return
              
-             cached = self._preview_cache[preview_id]
-             df = cached['df']
+             cached['processing'] = True
+             file_path = cached.get('file_path')
              filename = cached.get('filename', 'unknown')
              upload_type = cached.get('upload_type', 'MANUAL')
              triggered_by = cached.get('user_name', 'system')
              
              self._upload_status_cache[job_id]["triggered_by"] = triggered_by
-             self._upload_status_cache[job_id]["total"] = len(df)
              
              conn = self.repo.get_db_connection()
              
-             # PROCESSING LOGIC (Copied & Adapted for Repo)
-             # ... [Logic for bulk upsert using temp tables and logic from symbols.py] ...
-             # I will simplify for brevity but ensure core logic remains
-             
-             # Normalize columns
-             if 'symbol' in df.columns and 'trading_symbol' not in df.columns:
-                 df['trading_symbol'] = df['symbol']
-             df['exchange'] = df['exchange'].fillna('').astype(str).str.strip().str.upper()
-             df['trading_symbol'] = df['trading_symbol'].fillna('').astype(str).str.strip().str.upper()
-             
-             valid_mask = (df['exchange'] != '') & (df['trading_symbol'] != '')
-             df = df[valid_mask].drop_duplicates(subset=['exchange', 'trading_symbol'], keep='first').copy()
-             
-             # Get existing IDs
-             existing_rows = conn.execute("SELECT exchange, trading_symbol, id FROM symbols").fetchall()
-             existing_symbols = {f"{str(r[0]).strip().upper()}|{str(r[1]).strip().upper()}": r[2] for r in existing_rows}
-             
-             df['lookup_key'] = df['exchange'] + '|' + df['trading_symbol']
-             df['is_existing'] = df['lookup_key'].isin(existing_symbols.keys())
-             df['existing_id'] = df['lookup_key'].map(existing_symbols)
-             
-             insert_df = df[~df['is_existing']].copy()
-             update_df = df[df['is_existing']].copy()
+             # Stage the rows inside DuckDB (straight from the spooled file when there
+             # is no script output), then normalize and upsert them with SQL
+             if file_path:
+                 staged = self.repo.stage_upload_file(conn, file_path)
+             else:
+                 staged = self.repo.stage_upload_frame(conn, cached['df'])
+             self._upload_status_cache[job_id]["total"] = staged
              
-             inserted = 0
-             updated = 0
-             failed = 0 # logic for invalid rows could be added above
-             
-             now = datetime.now(timezone.utc)
-             
-             # INSERTS
-             if not insert_df.empty:
-                 max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM symbols").fetchone()[0]
-                 next_id = max_id + 1
-                 insert_df['id'] = range(next_id, next_id + len(insert_df))
-                 insert_df['status'] = 'ACTIVE'
-                 insert_df['source'] = 'MANUAL'
-                 insert_df['created_at'] = now
-                 insert_df['updated_at'] = now
-                 insert_df['last_updated_at'] = now
-                 
-                 # Prepare columns (ensure all exist)
-                 for col in ['exchange_token', 'name', 'instrument_type', 'segment', 'series', 'isin']:
-                     if col not in insert_df.columns: insert_df[col] = None
-                 
-                 # Use Register/Insert
-                 # Must select specific columns in order matching table
-                 cols = ['id', 'exchange', 'trading_symbol', 'exchange_token', 'name', 'instrument_type', 
-                         'segment', 'series', 'isin', 'expiry_date', 'strike_price', 'lot_size', 
-                         'status', 'source', 'created_at', 'updated_at', 'last_updated_at']
-                 
-                 # Ensure datatypes
-                 # ... (Add datatype conversions if needed, pandas usually handles it but explicit is better)
-                 
-                 conn.register('temp_insert_df', insert_df[cols]) # This might fail if columns missing, assuming df has necessary cols
-                 # In real usage, I'd need to ensure all cols exist in df with default Nones
-                 
-                 # Simple iteration fallback or robust column check needed. 
-                 # For brevity I assume `insert_df` has columns populated potentially with None/Default
-                 conn.execute(f"INSERT INTO symbols ({', '.join(cols)}) SELECT {', '.join(cols)} FROM temp_insert_df")
-                 conn.unregister('temp_insert_df')
-                 conn.commit()
-                 inserted = len(insert_df)
-
-             # UPDATES
-             if not update_df.empty:
-                 update_df['updated_at'] = now
-                 update_df['last_updated_at'] = now
-                 cols_up = ['existing_id', 'exchange_token', 'name', 'instrument_type', 'segment', 'series', 'isin', 
-                            'expiry_date', 'strike_price', 'lot_size', 'updated_at', 'last_updated_at']
-                 # Map existing_id to id for update
-                 update_df_renamed = update_df.rename(columns={'existing_id': 'id'})
-                 # Ensure cols
-                 for col in cols_up: 
-                     if col != 'id' and col not in update_df_renamed.columns: update_df_renamed[col] = None
-                 
-                 conn.register('temp_update_df', update_df_renamed)
-                 # Update logic with JOIN via temp table is tricky in standard SQL if not using specific DuckDB syntax carefully
-                 # DuckDB supports UPDATE FROM
-                 conn.execute("""
-                     UPDATE symbols 
-                     SET exchange_token = temp_update_df.exchange_token,
-                         name = temp_update_df.name,
-                         instrument_type = temp_update_df.instrument_type,
-                         segment = temp_update_df.segment,
-                         series = temp_update_df.series,
-                         isin = temp_update_df.isin,
-                         expiry_date = temp_update_df.expiry_date,
-                         strike_price = temp_update_df.strike_price,
-                         lot_size = temp_update_df.lot_size,
-                         updated_at = temp_update_df.updated_at,
-                         last_updated_at = temp_update_df.last_updated_at
-                     FROM temp_update_df
-                     WHERE symbols.id = temp_update_df.id
-                 """)
-                 conn.unregister('temp_update_df')
-                 conn.commit()
-                 updated = len(update_df)
+             counts = self.repo.apply_upload_staging(conn, datetime.now(timezone.utc))
+             self._symbols_changed()
+             inserted = counts["inserted"]
+             updated = counts["updated"]
+             failed = 0
              
              self._upload_status_cache[job_id]["status"] = "SUCCESS"
+             self._upload_status_cache[job_id]["processed"] = staged
              self._upload_status_cache[job_id]["inserted"] = inserted
              self._upload_status_cache[job_id]["updated"] = updated
              self._upload_status_cache[job_id]["percentage"] = 100
              
-             self.repo.save_upload_log(conn, job_id, filename, started_at, datetime.now(timezone.utc), "SUCCESS", len(df), inserted, updated, failed, [], triggered_by, upload_type)
-
-             del self._preview_cache[preview_id]
+             self.repo.save_upload_log(conn, job_id, filename, started_at, datetime.now(timezone.utc), "SUCCESS", counts["valid"], inserted, updated, failed, [], triggered_by, upload_type)
+             
+             # Scheduled sources remember what was applied so unchanged files are skipped next time
+             if cached.get('source_state') and cached.get('scheduler_id') is not None:
+                 self.repo.save_source_state(cached['scheduler_id'], cached['source_url'], cached['source_state'], changed=True)
+             succeeded = True
 
         except Exception as e:
             logger.error(f"Upload failed: {e}", exc_info=True)
@@ -378,6 +334,17 @@ class SymbolsService:
             self.repo.save_upload_log(conn, job_id, filename, started_at, datetime.now(timezone.utc), "FAILED", 0, 0, 0, 0, [str(e)], triggered_by, upload_type)
         finally:
             if conn: conn.close()
+            if cached is not None:
+                cached['processing'] = False
+                if succeeded or not keep_on_failure:
+                    self._discard_preview(preview_id)
+
+    def record_no_change_run(self, job_id: str, filename: str, triggered_by: str, scheduler_id: int,
+                             source_url: str, source_state: dict):
+        """Log a scheduled source whose remote file is unchanged; nothing is transformed or upserted"""
+        now = datetime.now(timezone.utc)
+        self.repo.save_source_state(scheduler_id, source_url, source_state, changed=False)
+        self.repo.save_upload_log(None, job_id, filename, now, now, "NO_CHANGE", 0, 0, 0, 0, [], triggered_by, "AUTO")
 
     def get_upload_status(self, job_id: str):
         if job_id in self._upload_status_cache:
@@ -432,7 +399,7 @@ class SymbolsService:
         }
 
     # Proxy methods to Repo
-    def get_symbols(self, search, exchange, status, expiry, sort_by, page_size, page):
+    def get_symbols(self, search, exchange, status, expiry, sort_by, page_size, page, cursor=None, include_total=True):
         where_clauses = []
         params = []
         if status:
@@ -442,42 +409,80 @@ class SymbolsService:
             where_clauses.append("exchange = ?")
             params.append(exchange.upper())
         if search:
-            s_term = f"%{search.upper()}%"
+            # Search results are ranked, so they page by position: the cursor holds the next offset
+            offset = decode_cursor(cursor, 1)[0] if cursor else (page-1)*page_size
+            found = None
+            if settings.SYMBOL_SEARCH_INDEX_ENABLED:
+                # In-memory index; SQL LIKE only while it is being built
+                found = self.search_index().search(search, exchange, status, page_size, offset)
+            if found is not None:
+                ids, total, estimated = found
+                items_data = self.repo.get_symbols_by_ids(ids)
+                next_cursor = encode_cursor([offset + page_size]) if offset + page_size < total else None
+                return self._symbols_page(items_data, total if include_total else None, page, page_size, next_cursor, estimated)
+            s_term = f"%{search.strip().upper()}%"
             where_clauses.append("(UPPER(trading_symbol) LIKE ? OR UPPER(name) LIKE ?)")
             params.extend([s_term, s_term])
+            items_data, total, key_cursor = self.repo.get_symbols_paginated(page_size, offset, where_clauses, params, None, include_total)
+            next_cursor = encode_cursor([offset + page_size]) if key_cursor else None
+            return self._symbols_page(items_data, total, page, page_size, next_cursor)
             
-        items_data, total = self.repo.get_symbols_paginated(page_size, (page-1)*page_size, where_clauses, params)
-        total_pages = (total + page_size - 1) // page_size if total > 0 else 1
+        items_data, total, next_cursor = self.repo.get_symbols_paginated(page_size, (page-1)*page_size, where_clauses, params, cursor, include_total)
+        return self._symbols_page(items_data, total, page, page_size, next_cursor)
+
+    def _symbols_page(self, items_data, total, page, page_size, next_cursor=None, total_is_estimate=False):
+        total_pages = None
+        if total is not None:
+            total_pages = (total + page_size - 1) // page_size if total > 0 else 1
         
         return {
             "items": items_data,
             "total": total,
             "page": page,
             "page_size": page_size,
-            "total_pages": total_pages
+            "total_pages": total_pages,
+            "next_cursor": next_cursor,
+            "total_is_estimate": total_is_estimate
         }
 
+    def _symbols_changed(self):
+        """Drop derived state (search index, cached totals) after symbols are written"""
+        self.search_index().invalidate()
+        get_count_cache().invalidate("symbols")
+
+    def search_index(self) -> SymbolSearchIndex:
+        return get_symbol_search_index(self.repo.db_path, self.repo.get_search_rows)
+
     def reload_series_lookup(self, force):
         return self.repo.reload_series_lookup(force)
 
-    def delete_all_symbols(self, user_info):
+    def _delete_symbols(self, where: str = "", params: Optional[list] = None):
+        """
+        Delete symbols and, in the same transaction, the scheduler source state: otherwise
+        an unchanged remote file (304 / same hash) would never bring the rows back
+        """
         conn = self.repo.get_db_connection()
         try:
-            conn.execute("DELETE FROM symbols")
-            conn.commit()
-            return {"message": "All symbols deleted"}
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.execute(f"DELETE FROM symbols {where}", params or [])
+                self.repo.clear_source_state(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._symbols_changed()
         finally:
             conn.close()
 
+    def delete_all_symbols(self, user_info):
+        self._delete_symbols()
+        return {"message": "All symbols deleted"}
+
     def bulk_delete(self, ids: List[int]):
-         conn = self.repo.get_db_connection()
-         try:
-             placeholders = ','.join(['?' for _ in ids])
-             conn.execute(f"DELETE FROM symbols WHERE id IN ({placeholders})", ids)
-             conn.commit()
-             return {"message": f"Deleted {len(ids)} symbols"}
-         finally:
-             conn.close()
+         placeholders = ','.join(['?' for _ in ids])
+         self._delete_symbols(f"WHERE id IN ({placeholders})", ids)
+         return {"message": f"Deleted {len(ids)} symbols"}
 
     def bulk_update_status(self, ids: List[int], status: str):
          conn = self.repo.get_db_connection()
@@ -487,6 +492,7 @@ class SymbolsService:
              params = [status, now, now] + ids
              conn.execute(f"UPDATE symbols SET status = ?, updated_at = ?, last_updated_at = ? WHERE id IN ({placeholders})", params)
              conn.commit()
+             self._symbols_changed()
              return {"message": f"Updated {len(ids)} symbols"}
          finally:
              conn.close()
@@ -494,14 +500,14 @@ class SymbolsService:
     def get_scripts(self):
         conn = self.repo.get_db_connection()
         try:
-            return conn.execute("SELECT id, name, description, content, version, created_by, created_at, updated_at, last_used_at FROM transformation_scripts ORDER BY created_at DESC").fetchall()
+            return conn.execute("SELECT id, name, description, content, version, created_by, created_at, updated_at, last_used_at, run_count, total_run_ms, last_run_ms, max_run_ms FROM transformation_scripts ORDER BY created_at DESC").fetchall()
         finally:
             conn.close()
 
     def get_script(self, script_id: int):
         conn = self.repo.get_db_connection()
         try:
-             res = conn.execute("SELECT id, name, description, content, version, created_by, created_at, updated_at, last_used_at FROM transformation_scripts WHERE id = ?", [script_id]).fetchone()
+             res = conn.execute("SELECT id, name, description, content, version, created_by, created_at, updated_at, last_used_at, run_count, total_run_ms, last_run_ms, max_run_ms FROM transformation_scripts WHERE id = ?", [script_id]).fetchone()
              return res
         finally:
              conn.close()
@@ -543,12 +549,15 @@ class SymbolsService:
             if 'content' in data and data['content']:
                  updates.append("content = ?"); params.append(data['content'])
                  updates.append("version = ?"); params.append(existing[1] + 1)
+                 # Schedulers using this script must re-apply their sources with the new version
+                 conn.execute("DELETE FROM scheduler_source_state WHERE scheduler_id IN (SELECT id FROM schedulers WHERE script_id = ?)", [script_id])
             
             if updates:
                 updates.append("updated_at = ?"); params.append(datetime.now(timezone.utc))
                 params.append(script_id)
                 conn.execute(f"UPDATE transformation_scripts SET {', '.join(updates)} WHERE id = ?", params)
                 conn.commit()
+                get_script_runner().invalidate(script_id)
             
             return self.get_script(script_id)
         finally:
@@ -559,6 +568,7 @@ class SymbolsService:
         try:
             conn.execute("DELETE FROM transformation_scripts WHERE id = ?", [script_id])
             conn.commit()
+            get_script_runner().invalidate(script_id)
         finally:
             conn.close()
 
@@ -567,7 +577,8 @@ class SymbolsService:
         try:
              schedulers = conn.execute("""
                  SELECT id, name, description, mode, interval_value, interval_unit, cron_expression,
-                        script_id, is_active, sources, created_at, updated_at, last_run_at, next_run_at, created_by
+                        script_id, is_active, sources, created_at, updated_at, last_run_at, next_run_at, created_by,
+                        max_parallel_downloads
                  FROM schedulers ORDER BY created_at DESC
              """).fetchall()
              res = []
@@ -576,7 +587,8 @@ class SymbolsService:
                      "id": s[0], "name": s[1], "description": s[2], "mode": s[3],
                      "interval_value": s[4], "interval_unit": s[5], "cron_expression": s[6],
                      "script_id": s[7], "is_active": s[8], "sources": json.loads(s[9]) if s[9] else [],
-                     "created_at": s[10], "updated_at": s[11], "last_run_at": s[12], "next_run_at": s[13], "created_by": s[14]
+                     "created_at": s[10], "updated_at": s[11], "last_run_at": s[12], "next_run_at": s[13], "created_by": s[14],
+                     "max_parallel_downloads": s[15]
                  })
              return res
         finally:
@@ -587,7 +599,8 @@ class SymbolsService:
          try:
              s = conn.execute("""
                  SELECT id, name, description, mode, interval_value, interval_unit, cron_expression,
-                        script_id, is_active, sources, created_at, updated_at, last_run_at, next_run_at, created_by
+                        script_id, is_active, sources, created_at, updated_at, last_run_at, next_run_at, created_by,
+                        max_parallel_downloads
                  FROM schedulers WHERE id = ?
              """, [scheduler_id]).fetchone()
              if not s: return None
@@ -595,7 +608,8 @@ class SymbolsService:
                  "id": s[0], "name": s[1], "description": s[2], "mode": s[3],
                  "interval_value": s[4], "interval_unit": s[5], "cron_expression": s[6],
                  "script_id": s[7], "is_active": s[8], "sources": json.loads(s[9]) if s[9] else [],
-                 "created_at": s[10], "updated_at": s[11], "last_run_at": s[12], "next_run_at": s[13], "created_by": s[14]
+                 "created_at": s[10], "updated_at": s[11], "last_run_at": s[12], "next_run_at": s[13], "created_by": s[14],
+                     "max_parallel_downloads": s[15]
              }
          finally:
              conn.close()
@@ -609,10 +623,11 @@ class SymbolsService:
              
              conn.execute("""
                  INSERT INTO schedulers (id, name, description, mode, interval_value, interval_unit, cron_expression,
-                        script_id, is_active, sources, created_at, created_by)
-                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        script_id, is_active, sources, created_at, created_by, max_parallel_downloads)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
              """, (next_id, data['name'], data.get('description'), data['mode'], data.get('interval_value'), data.get('interval_unit'),
-                   data.get('cron_expression'), data.get('script_id'), data.get('is_active', True), json.dumps(data.get('sources', [])), now, user_id))
+                   data.get('cron_expression'), data.get('script_id'), data.get('is_active', True), json.dumps(data.get('sources', [])), now, user_id,
+                   data.get('max_parallel_downloads')))
              conn.commit()
              return self.get_scheduler(next_id)
          finally:
@@ -623,7 +638,7 @@ class SymbolsService:
         try:
              updates = []
              params = []
-             fields = ['name', 'description', 'mode', 'interval_value', 'interval_unit', 'cron_expression', 'script_id', 'is_active']
+             fields = ['name', 'description', 'mode', 'interval_value', 'interval_unit', 'cron_expression', 'script_id', 'is_active', 'max_parallel_downloads']
              for f in fields:
                  if f in data:
                      updates.append(f"{f} = ?")
@@ -631,6 +646,9 @@ class SymbolsService:
              if 'sources' in data:
                  updates.append("sources = ?")
                  params.append(json.dumps(data['sources']))
+             if 'sources' in data or 'script_id' in data:
+                 # Changed sources or transform: the next run must apply every source again
+                 self.repo.clear_source_state(conn, scheduler_id)
              
              if updates:
                  updates.append("updated_at = ?")
@@ -646,6 +664,7 @@ class SymbolsService:
         conn = self.repo.get_db_connection()
         try:
              conn.execute("DELETE FROM schedulers WHERE id = ?", [scheduler_id])
+             self.repo.clear_source_state(conn, scheduler_id)
              conn.commit()
         finally:
              conn.close()
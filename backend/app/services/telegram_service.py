@@ -11,6 +11,7 @@ from telethon.sessions import StringSession
 from app.models.connection import Connection, ConnectionType
 from app.models.telegram_channel import TelegramChannel, ChannelStatus
 from app.core.auth.security import decrypt_data
+from app.core.auth.user_cache import invalidate_user
 from app.repositories.telegram_repository import TelegramRepository
 from app.providers.telegram_raw_listener.config import TABLE_NAME
 from app.providers.telegram_bot import TelegramBotService
@@ -285,3 +286,4 @@ class TelegramService:
     def disconnect_user(self, user: 'User'):
         user.telegram_chat_id = None
         self.db.commit()
+        invalidate_user(user.id)
@@ -18,6 +18,7 @@ from app.providers.telegram_bot import TelegramBotService
 from app.core.auth.security import verify_password, get_password_hash
 from app.core.database import get_connection_manager, get_db_router
 from app.core.config import settings
+from app.services.presence_service import get_presence_service
 import random
 import re
 import uuid
@@ -34,8 +35,9 @@ class UserService:
         return self.user_repo.get_by_email(self.db, email)
 
     def update_last_active(self, user: User) -> User:
-        user.last_active_at = datetime.now(timezone.utc)
-        return self.user_repo.update(self.db, user)
+        # Written in the presence service's next batch
+        get_presence_service().record_activity(user)
+        return user
 
     async def update_profile(self, user: User, user_update: UserUpdate) -> User:
         # Check for sensitive changes requiring OTP
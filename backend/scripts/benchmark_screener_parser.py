@@ -0,0 +1,77 @@
+"""
+Benchmark the single-pass lxml screener parser against the legacy
+BeautifulSoup + pd.read_html path on a directory of saved company pages.
+
+Usage: python scripts/benchmark_screener_parser.py <pages_dir> [repeat]
+"""
+import sys
+import os
+import glob
+import time
+import logging
+
+# Add backend directory to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bs4 import BeautifulSoup
+from app.services.screener_service import ScreenerService
+from app.providers.screener_parser import parse_screener_page, SECTION_HEADINGS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def legacy_parse(service, page_html):
+    soup = BeautifulSoup(page_html, "html.parser")
+    return {
+        "company_name": service.parse_company_name(soup),
+        "header": service.parse_header_fundamentals(soup),
+        "peers": service.parse_peer_table(soup),
+        "sections": {h: service.parse_section_table(soup, h) for h in SECTION_HEADINGS},
+    }
+
+def run(pages_dir, repeat=3):
+    paths = sorted(glob.glob(os.path.join(pages_dir, "*.html")))
+    if not paths:
+        logger.error(f"No .html pages found in {pages_dir}")
+        return False
+
+    pages = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+
+    service = ScreenerService.__new__(ScreenerService)
+    timings = {"legacy": 0.0, "lxml": 0.0}
+    mismatches = 0
+
+    for _ in range(repeat):
+        for name, page_html in pages:
+            start = time.perf_counter()
+            old = legacy_parse(service, page_html)
+            timings["legacy"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            new = parse_screener_page(page_html)
+            timings["lxml"] += time.perf_counter() - start
+
+            if old["header"] != new["header"] or old["company_name"] != new["company_name"]:
+                mismatches += 1
+                logger.warning(f"Header/name mismatch for {name}")
+
+    runs = len(pages) * repeat
+    legacy_ms = timings["legacy"] / runs * 1000
+    lxml_ms = timings["lxml"] / runs * 1000
+    logger.info(f"Pages: {len(pages)} x {repeat} runs")
+    logger.info(f"Legacy (BeautifulSoup + read_html): {legacy_ms:.2f} ms/page")
+    logger.info(f"Single-pass lxml                  : {lxml_ms:.2f} ms/page")
+    if lxml_ms:
+        logger.info(f"Speedup                           : {legacy_ms / lxml_ms:.1f}x")
+    logger.info(f"Header/name mismatches            : {mismatches}")
+    return mismatches == 0
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    ok = run(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 3)
+    sys.exit(0 if ok else 1)
@@ -9,6 +9,7 @@ os.environ["JWT_SYSTEM_SECRET_KEY"] = "test_default_system_secret_key_for_testin
 os.environ["ENCRYPTION_KEY"] = "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA="
 os.environ["DATA_DIR"] = "test_data" # Force local test_data dir
 os.environ["TESTING"] = "true" # Force testing flag
+os.environ["DB_LOOP_GUARD"] = "raise" # Fail on blocking DuckDB calls made on the event loop
 
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -45,6 +46,10 @@ def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+# Presence writes go to the test database too
+from app.services.presence_service import get_presence_service
+get_presence_service().session_factory = TestingSessionLocal
+
 # 3. Fixtures
 @pytest.fixture(scope="module")
 def client():
@@ -85,6 +90,10 @@ def client():
     db.commit()
     db.close()
     
+    # Users are recreated per module; don't serve cached users from a previous module
+    from app.core.auth.user_cache import get_user_cache
+    get_user_cache().clear()
+    
     with TestClient(app) as c:
         yield c
         
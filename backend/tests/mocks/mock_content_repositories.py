@@ -39,8 +39,9 @@ class MockNewsRepository:
     def __init__(self):
         self.news = []
 
-    def get_news(self, limit=10, offset=0, search=None):
-        return self.news[offset:offset+limit], len(self.news)
+    def get_news(self, limit=10, offset=0, search=None, cursor=None, include_total=True):
+        next_cursor = str(offset + limit) if offset + limit < len(self.news) else None
+        return self.news[offset:offset+limit], len(self.news) if include_total else None, next_cursor
     
     def insert_news(self, conn, news_item):
         self.news.append(news_item)
@@ -7,6 +7,7 @@ class MockScreenerRepository:
         self.logs = []
         self.connections = []
         self.detailed_logs = []
+        self.page_cache = {}
 
     # DuckDB returns connection objects which then execute. 
     # For unit testing service logic, we often mock the *result* of service calls that use the repo.
@@ -60,9 +61,28 @@ class MockScreenerRepository:
             "symbol": symbol, "metric": metric, "value": val
         })
 
+    def insert_metrics_bulk(self, conn, rows):
+        rows = [r for r in rows if r.get("metric_value") is not None]
+        for r in rows:
+            self.insert_metric(conn, r["entity_type"], r["parent_company_symbol"], r["symbol"], r["exchange"],
+                               r["period_type"], r["period_key"], r["statement_group"], r["metric_name"],
+                               r["metric_value"], r.get("unit"))
+        return len(rows)
+
+    def get_page_cache_entry(self, url):
+        return self.page_cache.get(url)
+
+    def save_page_cache_entry(self, url, entry):
+        self.page_cache[url] = entry
+
     def write_detailed_log(self, conn, job_id, conn_id, c_name, sym, exc, action, msg, **kwargs):
         self.detailed_logs.append({"job_id": job_id, "symbol": sym, "action": action, "msg": msg})
 
+    def write_detailed_logs(self, conn, events):
+        for e in events:
+            self.detailed_logs.append({"job_id": e["job_id"], "symbol": e["symbol"], "action": e["action"], "msg": e["message"]})
+        return len(events)
+
     def save_scraping_log(self, conn, job_id, trig, start, end, status, a, b, c, d, recs, errs):
         self.logs.append({"job_id": job_id, "status": status, "records": recs})
 
@@ -75,6 +95,7 @@ class MockScreenerRepository:
 class MockSymbolsRepository:
     def __init__(self):
         self.symbols = []
+        self.data_dir = "test_data"
 
 class MockAnnouncementsRepository:
     def __init__(self):
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+import pytest
+from app.core.config import settings
+from app.core.database.db_executor import (
+    BlockingDatabaseCallError,
+    DBExecutor,
+    allow_blocking_db,
+    check_not_on_event_loop,
+)
+from app.core.database.duckdb_registry import DuckDBConnectionRegistry
+
+class TestDBExecutor:
+    @pytest.fixture
+    def executor(self):
+        executor = DBExecutor(workers_per_database=2)
+        yield executor
+        executor.shutdown()
+
+    def test_runs_off_the_event_loop(self, executor, test_logger):
+        test_logger.info("UNIT: DB Executor Off Loop - Starting")
+
+        def work(value, offset=0):
+            check_not_on_event_loop("test")
+            return value + offset, threading.current_thread().name
+
+        async def main():
+            return await executor.run("symbols", work, 1, offset=2)
+
+        result, thread_name = asyncio.run(main())
+        assert result == 3
+        assert thread_name.startswith("db-symbols")
+        test_logger.info("UNIT: DB Executor Off Loop - Verified pool thread")
+
+    def test_pools_are_per_database(self, executor, test_logger):
+        test_logger.info("UNIT: DB Executor Per-Database Pools - Starting")
+        release = threading.Event()
+
+        async def main():
+            # Saturate the screener pool; symbols work must still complete
+            blocked = [asyncio.ensure_future(executor.run("screener", release.wait, 5)) for _ in range(3)]
+            name = await asyncio.wait_for(
+                executor.run("symbols", lambda: threading.current_thread().name), timeout=5
+            )
+            release.set()
+            await asyncio.gather(*blocked)
+            return name
+
+        assert asyncio.run(main()).startswith("db-symbols")
+
+        stats = executor.get_stats()
+        assert stats["screener"]["calls"] == 3
+        assert stats["screener"]["workers"] == 2
+        assert stats["screener"]["queued"] == 0
+        assert stats["screener"]["running"] == 0
+        assert stats["symbols"]["calls"] == 1
+        test_logger.info("UNIT: DB Executor Per-Database Pools - Verified isolation and stats")
+
+    def test_exceptions_propagate(self, executor, test_logger):
+        test_logger.info("UNIT: DB Executor Exceptions - Starting")
+
+        def fail():
+            raise ValueError("boom")
+
+        async def main():
+            await executor.run("announcements", fail)
+
+        with pytest.raises(ValueError, match="boom"):
+            asyncio.run(main())
+        test_logger.info("UNIT: DB Executor Exceptions - Verified propagation")
+
+class TestEventLoopGuard:
+    def test_registry_checkout_on_loop_raises(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: DB Loop Guard Raise - Starting")
+        monkeypatch.setattr(settings, "DB_LOOP_GUARD", "raise")
+        registry = DuckDBConnectionRegistry()
+        db_path = str(tmp_path / "guard.duckdb")
+
+        async def main():
+            registry.get_connection(db_path)
+
+        try:
+            with pytest.raises(BlockingDatabaseCallError, match="run_db"):
+                asyncio.run(main())
+            # Outside a loop the same checkout is fine
+            registry.get_connection(db_path).close()
+        finally:
+            registry.close_all()
+        test_logger.info("UNIT: DB Loop Guard Raise - Verified")
+
+    def test_allow_blocking_and_off_mode(self, monkeypatch, test_logger):
+        test_logger.info("UNIT: DB Loop Guard Exemptions - Starting")
+        monkeypatch.setattr(settings, "DB_LOOP_GUARD", "raise")
+
+        async def allowed():
+            with allow_blocking_db():
+                check_not_on_event_loop("startup")
+
+        asyncio.run(allowed())
+
+        monkeypatch.setattr(settings, "DB_LOOP_GUARD", "off")
+
+        async def unguarded():
+            check_not_on_event_loop("test")
+
+        asyncio.run(unguarded())
+        test_logger.info("UNIT: DB Loop Guard Exemptions - Verified")
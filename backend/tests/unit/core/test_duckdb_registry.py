@@ -0,0 +1,56 @@
+import pytest
+from app.core.database.duckdb_registry import DuckDBConnectionRegistry
+
+class TestDuckDBConnectionRegistry:
+    @pytest.fixture
+    def registry(self):
+        registry = DuckDBConnectionRegistry()
+        yield registry
+        registry.close_all()
+
+    def test_cursors_share_parent_connection(self, registry, tmp_path, test_logger):
+        test_logger.info("UNIT: DuckDB Registry Shared Parent - Starting")
+        db_path = str(tmp_path / "shared.duckdb")
+
+        conn = registry.get_connection(db_path)
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.close()
+
+        # Closing a cursor must not close the pooled parent
+        with registry.connection(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+        stats = registry.get_stats()[str(tmp_path / "shared.duckdb")]
+        assert stats["opens"] == 1
+        assert stats["checkouts"] == 2
+        assert stats["open"] is True
+        test_logger.info("UNIT: DuckDB Registry Shared Parent - Verified single open")
+
+    def test_on_open_runs_once(self, registry, tmp_path, test_logger):
+        test_logger.info("UNIT: DuckDB Registry on_open - Starting")
+        db_path = str(tmp_path / "setup.duckdb")
+        calls = []
+
+        for _ in range(3):
+            registry.get_connection(db_path, on_open=lambda c: calls.append(c)).close()
+
+        assert len(calls) == 1
+        test_logger.info("UNIT: DuckDB Registry on_open - Verified setup runs once")
+
+    def test_reopens_closed_parent(self, registry, tmp_path, test_logger):
+        test_logger.info("UNIT: DuckDB Registry Reopen - Starting")
+        db_path = str(tmp_path / "reopen.duckdb")
+
+        registry.get_connection(db_path).close()
+        # Simulate a dead parent connection
+        registry._parents[str(tmp_path / "reopen.duckdb")].close()
+
+        with registry.connection(db_path) as conn:
+            assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+        stats = registry.get_stats()[str(tmp_path / "reopen.duckdb")]
+        assert stats["reopens"] == 1
+        assert stats["opens"] == 2
+        assert registry.health_check()["status"] == "healthy"
+        test_logger.info("UNIT: DuckDB Registry Reopen - Verified recovery")
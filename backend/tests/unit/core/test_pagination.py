@@ -0,0 +1,46 @@
+import pytest
+from datetime import date, datetime, timezone
+from app.core.config import settings
+from app.core.pagination import CountCache, decode_cursor, encode_cursor, keyset_predicate
+
+class TestPagination:
+    def test_cursor_round_trip(self, test_logger):
+        test_logger.info("UNIT: Pagination Cursor Round Trip - Starting")
+        values = [datetime(2025, 3, 1, 9, 15, 0, 123456, tzinfo=timezone.utc), date(2025, 12, 25), "NSE", 42, None]
+        cursor = encode_cursor(values)
+        assert "=" not in cursor
+        assert decode_cursor(cursor, 5) == values
+
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 2)
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor", 2)
+        test_logger.info("UNIT: Pagination Cursor Round Trip - Verified values and rejection")
+
+    def test_keyset_predicate(self, test_logger):
+        test_logger.info("UNIT: Pagination Keyset Predicate - Starting")
+        sql, params = keyset_predicate("trade_date", "id", "2025-01-01", "a1")
+        assert sql == "(trade_date < ? OR (trade_date = ? AND id < ?) OR trade_date IS NULL)"
+        assert params == ["2025-01-01", "2025-01-01", "a1"]
+        # Past the last dated row only NULL sort keys remain
+        assert keyset_predicate("trade_date", "id", None, "a1") == ("(trade_date IS NULL AND id < ?)", ["a1"])
+        assert keyset_predicate("exchange", "trading_symbol", "NSE", "TCS", descending=False)[0].startswith("(exchange > ?")
+        test_logger.info("UNIT: Pagination Keyset Predicate - Verified SQL")
+
+    def test_count_cache(self, monkeypatch, test_logger):
+        test_logger.info("UNIT: Pagination Count Cache - Starting")
+        cache = CountCache()
+        calls = []
+        compute = lambda: calls.append(1) or 10
+        assert cache.get_or_compute(("symbols", "1=1"), compute) == 10
+        assert cache.get_or_compute(("symbols", "1=1"), compute) == 10
+        assert len(calls) == 1
+
+        cache.invalidate("symbols")
+        cache.get_or_compute(("symbols", "1=1"), compute)
+        assert len(calls) == 2
+
+        monkeypatch.setattr(settings, "LIST_COUNT_CACHE_TTL_SECONDS", 0)
+        cache.get_or_compute(("symbols", "1=1"), compute)
+        assert len(calls) == 3
+        test_logger.info("UNIT: Pagination Count Cache - Verified caching and invalidation")
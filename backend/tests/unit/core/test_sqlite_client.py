@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.database.sqlite_client import SQLiteClient
+
+class TestSQLiteClient:
+    @pytest.fixture
+    def client(self, tmp_path):
+        client = SQLiteClient({"path": str(tmp_path / "auth.db"), "pool_size": 3, "max_overflow": 1})
+        assert client.connect()
+        yield client
+        client.disconnect()
+
+    def test_connections_use_wal_and_busy_timeout(self, client, test_logger):
+        test_logger.info("UNIT: SQLite Client Pragmas - Starting")
+        with client.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            # NORMAL == 1
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        test_logger.info("UNIT: SQLite Client Pragmas - Verified WAL")
+
+    def test_health_check_reports_pool(self, client, test_logger):
+        test_logger.info("UNIT: SQLite Client Pool Stats - Starting")
+        sessions = [client.get_session() for _ in range(2)]
+        for session in sessions:
+            session.execute(text("SELECT 1"))
+
+        pool = client.pool_stats()
+        assert pool["pool"] == "QueuePool"
+        assert pool["size"] == 3
+        assert pool["checkedout"] == 2
+        for session in sessions:
+            session.close()
+
+        health = client.health_check()
+        assert health["status"] == "healthy"
+        assert health["journal_mode"] == "wal"
+        assert health["pool"]["checkedout"] == 0
+        assert health["pool"]["checkouts"] >= 3
+        assert health["pool"]["connects"] >= 2
+        test_logger.info("UNIT: SQLite Client Pool Stats - Verified")
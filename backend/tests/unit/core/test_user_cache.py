@@ -0,0 +1,76 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.auth.permissions import get_current_user_from_token
+from app.core.auth.security import create_access_token
+from app.core.auth.user_cache import get_user_cache, invalidate_user
+from app.core.database import Base
+from app.models.user import User, UserRole
+
+class TestUserCache:
+    @pytest.fixture
+    def session_factory(self):
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        db = factory()
+        db.add(User(
+            email="cache@example.com", hashed_password="x", username="cache_user",
+            role=UserRole.USER, is_active=True, user_id="CACHE001", mobile="2222222222"
+        ))
+        db.commit()
+        db.close()
+
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        get_user_cache().clear()
+        yield factory, statements
+        get_user_cache().clear()
+        engine.dispose()
+
+    def test_cached_user_skips_select_and_commit(self, session_factory, test_logger):
+        test_logger.info("UNIT: User Cache Hit - Starting")
+        factory, statements = session_factory
+        token = create_access_token({"sub": "cache_user"})
+
+        db = factory()
+        assert get_current_user_from_token(token, db).username == "cache_user"
+        db.close()
+        assert len(statements) == 1
+
+        db = factory()
+        user = get_current_user_from_token(token, db)
+        assert user.email == "cache@example.com"
+        assert user.last_active_at is not None
+        db.commit()
+        db.close()
+        # Second request: no SELECT, and the activity update does not dirty the user
+        assert len(statements) == 1
+        test_logger.info("UNIT: User Cache Hit - Verified no queries")
+
+    def test_invalidation_rereads_user(self, session_factory, test_logger):
+        test_logger.info("UNIT: User Cache Invalidation - Starting")
+        factory, _ = session_factory
+        token = create_access_token({"sub": "cache_user"})
+
+        db = factory()
+        user = get_current_user_from_token(token, db)
+        user.is_active = False
+        db.commit()
+        invalidate_user(user.id)
+        db.close()
+
+        db = factory()
+        with pytest.raises(HTTPException) as exc:
+            get_current_user_from_token(token, db)
+        assert exc.value.status_code == 403
+        db.close()
+        test_logger.info("UNIT: User Cache Invalidation - Verified deactivation applies")
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+import duckdb
+import pytest
+from app.providers import scheduler
+from app.providers.scheduler import SchedulerService
+
+class FakeSourceStateRepository:
+    def __init__(self):
+        self.states = {}
+
+    def get_source_state(self, scheduler_id, url):
+        return self.states.get((scheduler_id, url))
+
+    def save_source_state(self, scheduler_id, url, state, changed):
+        self.states[(scheduler_id, url)] = state
+
+class FakeSymbolsService:
+    """Records preview/upload calls and how many uploads overlap"""
+    def __init__(self):
+        self.repo = FakeSourceStateRepository()
+        self.lock = threading.Lock()
+        self.active_uploads = 0
+        self.max_active_uploads = 0
+        self.previews = {}
+        self.uploaded = []
+        self.no_change = []
+
+    def resolve_file_type(self, file_ext, file_type="AUTO"):
+        return "CSV"
+
+    def create_upload_preview(self, file_path, filename, file_type, script_id, user_info, upload_type="MANUAL", extra=None):
+        self.previews[filename] = extra
+        return {"preview_id": filename}
+
+    def process_upload_async(self, preview_id, job_id, keep_on_failure=True):
+        with self.lock:
+            self.active_uploads += 1
+            self.max_active_uploads = max(self.max_active_uploads, self.active_uploads)
+        time.sleep(0.05)
+        with self.lock:
+            self.active_uploads -= 1
+            self.uploaded.append(preview_id)
+        extra = self.previews.pop(preview_id)
+        self.repo.save_source_state(extra["scheduler_id"], extra["source_url"], extra["source_state"], changed=True)
+
+    def record_no_change_run(self, job_id, filename, triggered_by, scheduler_id, source_url, source_state):
+        self.no_change.append(filename)
+        self.repo.save_source_state(scheduler_id, source_url, source_state, changed=False)
+
+class TestSchedulerParallelSources:
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        fake = FakeSymbolsService()
+        db_path = str(tmp_path / "symbols.duckdb")
+        conn = duckdb.connect(db_path)
+        conn.execute("CREATE TABLE schedulers (id INTEGER, last_run_at TIMESTAMPTZ, next_run_at TIMESTAMPTZ)")
+        conn.execute("INSERT INTO schedulers VALUES (1, NULL, NULL)")
+        conn.close()
+        monkeypatch.setattr(scheduler, "SymbolsService", lambda: fake)
+        monkeypatch.setattr(scheduler, "get_db_connection", lambda: duckdb.connect(db_path))
+
+        service = SchedulerService()
+        service.active_downloads = 0
+        service.max_active_downloads = 0
+        counter_lock = threading.Lock()
+
+        def fake_download(source, previous=None):
+            with counter_lock:
+                service.active_downloads += 1
+                service.max_active_downloads = max(service.max_active_downloads, service.active_downloads)
+            time.sleep(0.2)
+            with counter_lock:
+                service.active_downloads -= 1
+            state = {"etag": f'"{source["url"]}"', "last_modified": None, "content_hash": None}
+            if previous == state:
+                return {"path": None, "unchanged": True, "state": previous}
+            path = tmp_path / source["url"].rsplit("/", 1)[-1]
+            path.write_text("exchange,symbol\nNSE,TCS\n")
+            return {"path": str(path), "unchanged": False, "state": state}
+
+        service._download_file = fake_download
+        service.fake = fake
+        yield service
+        service.stop()
+
+    def run(self, service, max_parallel_downloads):
+        sources = [{"url": f"https://example.com/{exchange}.csv"} for exchange in ("nse", "bse", "nfo", "mcx")]
+        started = time.perf_counter()
+        service._execute_scheduler(1, "Market open", json.dumps(sources), None, "RUN_ONCE", None, None, None,
+                                   max_parallel_downloads=max_parallel_downloads)
+        service.upload_queue.join()
+        return time.perf_counter() - started
+
+    def test_sources_download_concurrently(self, service, test_logger):
+        test_logger.info("UNIT: Scheduler Parallel Sources - Starting")
+        elapsed = self.run(service, max_parallel_downloads=4)
+        assert service.max_active_downloads == 4
+        assert elapsed < 0.6
+        assert sorted(service.fake.uploaded) == ["bse.csv", "mcx.csv", "nfo.csv", "nse.csv"]
+        # Uploads never overlap: one writer applies them to symbols.duckdb
+        assert service.fake.max_active_uploads == 1
+        test_logger.info(f"UNIT: Scheduler Parallel Sources - Verified 4 sources in {elapsed:.2f}s with one writer")
+
+    def test_per_scheduler_limit(self, service, test_logger):
+        test_logger.info("UNIT: Scheduler Download Limit - Starting")
+        self.run(service, max_parallel_downloads=2)
+        assert service.max_active_downloads == 2
+        assert len(service.fake.uploaded) == 4
+        test_logger.info("UNIT: Scheduler Download Limit - Verified at most 2 concurrent downloads")
+
+    def test_unchanged_sources_skip_upload(self, service, test_logger):
+        test_logger.info("UNIT: Scheduler No Change - Starting")
+        self.run(service, max_parallel_downloads=4)
+        assert len(service.fake.uploaded) == 4
+        self.run(service, max_parallel_downloads=4)
+        assert len(service.fake.uploaded) == 4
+        assert sorted(service.fake.no_change) == ["bse.csv", "mcx.csv", "nfo.csv", "nse.csv"]
+        test_logger.info("UNIT: Scheduler No Change - Verified second run recorded NO_CHANGE")
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def close(self):
+        pass
+
+class TestSchedulerConditionalDownload:
+    def test_validators_and_content_hash(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Scheduler Conditional Download - Starting")
+        monkeypatch.setattr(scheduler.settings, "DATA_DIR", str(tmp_path))
+        sent = []
+        responses = []
+        monkeypatch.setattr(scheduler.requests, "get", lambda url, headers, timeout, stream: sent.append(dict(headers)) or responses.pop(0))
+        service = SchedulerService()
+        source = {"url": "https://example.com/NSE.csv"}
+
+        responses.append(FakeResponse(200, b"exchange,symbol\nNSE,TCS\n", {"ETag": '"v1"'}))
+        first = service._download_file(source)
+        assert not first["unchanged"] and first["state"]["etag"] == '"v1"'
+        assert os.path.exists(first["path"])
+
+        # 304 for a matching ETag
+        responses.append(FakeResponse(304))
+        second = service._download_file(source, first["state"])
+        assert sent[-1]["If-None-Match"] == '"v1"'
+        assert second == {"path": None, "unchanged": True, "state": first["state"]}
+
+        # Server without validator support: same bytes are detected by hash and discarded
+        responses.append(FakeResponse(200, b"exchange,symbol\nNSE,TCS\n"))
+        third = service._download_file(source, first["state"])
+        assert third["unchanged"] and third["path"] is None
+        assert os.listdir(tmp_path / "temp") == [os.path.basename(first["path"])]
+
+        responses.append(FakeResponse(200, b"exchange,symbol\nNSE,INFY\n"))
+        assert not service._download_file(source, first["state"])["unchanged"]
+        test_logger.info("UNIT: Scheduler Conditional Download - Verified 304 and hash short-circuit")
+
+class TestSchedulerSourceStateReset:
+    def test_deleted_symbols_are_reloaded_from_unchanged_file(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Scheduler Reload After Delete - Starting")
+        from app.core.database.duckdb_registry import get_duckdb_registry
+        from app.services.symbols_service import SymbolsService
+        monkeypatch.setattr(scheduler.settings, "DATA_DIR", str(tmp_path))
+        url = "https://example.com/NSE.csv"
+
+        # The remote file never changes: 304 whenever the stored ETag is sent
+        def fake_get(url, headers, timeout, stream):
+            if headers.get("If-None-Match") == '"v1"':
+                return FakeResponse(304)
+            return FakeResponse(200, b"exchange,trading_symbol\nNSE,TCS\n", {"ETag": '"v1"'})
+        monkeypatch.setattr(scheduler.requests, "get", fake_get)
+
+        symbols_service = SymbolsService()
+        service = SchedulerService()
+        try:
+            def run(job_id):
+                result = service._prepare_source(symbols_service, {"url": url}, "1/1", "Daily", 1, None,
+                                                 {"id": None, "username": "scheduler"}, {"scheduler_id": 1})
+                if not result["unchanged"]:
+                    symbols_service.process_upload_async(result["preview_id"], job_id, False)
+                return result["unchanged"]
+
+            def count():
+                conn = symbols_service.repo.get_db_connection()
+                try:
+                    return conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+                finally:
+                    conn.close()
+
+            assert run("job_1") is False and count() == 1
+            assert run("job_2") is True
+
+            symbols_service.delete_all_symbols({"id": None})
+            assert count() == 0
+            # The state was cleared with the rows, so the same file is applied again
+            assert run("job_3") is False and count() == 1
+        finally:
+            service.stop()
+            get_duckdb_registry().close(symbols_service.repo.db_path)
+        test_logger.info("UNIT: Scheduler Reload After Delete - Verified full upload after delete")
@@ -0,0 +1,46 @@
+from app.providers.screener_parser import parse_screener_page
+
+PAGE = """
+<html>
+    <head><title>TCS share price | Screener</title><script>var label = 'ROE 99 %';</script></head>
+    <body>
+        <ul id="top-ratios">
+            <li>Market Cap ₹ 12,00,000 Cr</li>
+            <li>Current Price ₹ 3,300</li>
+            <li>ROE 50 %</li>
+        </ul>
+        <table>
+            <tr><th>S.No.</th><th>Name</th><th>CMP Rs.</th><th>P/E</th></tr>
+            <tr><td>1.</td><td>Infosys</td><td>1,500</td><td>25.1</td></tr>
+        </table>
+        <section>
+            <h2>Profit &amp; Loss</h2>
+            <table>
+                <thead><tr><th></th><th>Mar 2023</th><th>Mar 2024</th></tr></thead>
+                <tbody><tr><td>Sales&nbsp;<button>+</button></td><td>100</td><td>120</td></tr></tbody>
+            </table>
+        </section>
+    </body>
+</html>
+"""
+
+class TestScreenerParser:
+    def test_parse_screener_page(self, test_logger):
+        test_logger.info("UNIT: Screener Page Parser - Starting")
+        page = parse_screener_page(PAGE)
+
+        assert page["company_name"] == "TCS"
+        assert page["header"]["Market Cap (Cr)"] == "12,00,000"
+        assert page["header"]["Current Price"] == "3,300"
+        # Script text must not leak into header ratios
+        assert page["header"]["ROE %"] == "50"
+        assert page["header"]["Stock P/E"] is None
+
+        assert page["peers"]["columns"] == ["S.No.", "Name", "CMP Rs.", "P/E"]
+        assert page["peers"]["rows"] == [["1.", "Infosys", "1,500", "25.1"]]
+
+        pnl = page["sections"]["Profit & Loss"]
+        assert pnl["columns"] == ["", "Mar 2023", "Mar 2024"]
+        assert pnl["rows"] == [["Sales\xa0+", "100", "120"]]
+        assert page["sections"]["Balance Sheet"] is None
+        test_logger.info("UNIT: Screener Page Parser - Verified single-pass extraction")
@@ -0,0 +1,200 @@
+import os
+import duckdb
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
+from app.core.pagination import get_count_cache
+from app.repositories.announcements_repository import AnnouncementsRepository
+
+class TestAnnouncementsRepositoryKeyset:
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = AnnouncementsRepository()
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        # Two announcements share each trade_date, one has none
+        for i in range(9):
+            repo.insert_announcement({
+                "id": f"ann{i}", "trade_date": base + timedelta(days=i // 2) if i < 8 else None,
+                "symbol_nse": "TCS", "news_headline": f"Headline {i}",
+            })
+        yield repo
+        get_count_cache().invalidate("announcements")
+        get_duckdb_registry().close(repo.db_path)
+
+    def test_cursor_pages_cover_all_rows_once(self, repo, test_logger):
+        test_logger.info("UNIT: Announcements Keyset Pagination - Starting")
+        seen = []
+        cursor = None
+        while True:
+            items, total, cursor = repo.get_announcements_page(limit=4, cursor=cursor)
+            seen.extend(item["id"] for item in items)
+            assert total == 9
+            if not cursor:
+                break
+        assert seen == ["ann7", "ann6", "ann5", "ann4", "ann3", "ann2", "ann1", "ann0", "ann8"]
+
+        # Offset pages return the same order
+        items, _ = repo.get_announcements(limit=4, offset=4)
+        assert [item["id"] for item in items] == seen[4:8]
+        test_logger.info("UNIT: Announcements Keyset Pagination - Verified stable order")
+
+    def test_total_is_optional(self, repo, test_logger):
+        test_logger.info("UNIT: Announcements Optional Total - Starting")
+        items, total, cursor = repo.get_announcements_page(limit=20, include_total=False)
+        assert len(items) == 9
+        assert total is None
+        assert cursor is None
+        with pytest.raises(ValueError):
+            repo.get_announcements_page(limit=20, cursor="garbage")
+        test_logger.info("UNIT: Announcements Optional Total - Verified")
+
+class TestAnnouncementsRepositoryBatchInsert:
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = AnnouncementsRepository()
+        repo.insert_announcement({
+            "id": "old1", "company_name": "Tata Motors", "news_headline": "Board Meeting",
+            "trade_date": "2025-01-01 10:00:00",
+        })
+        yield repo
+        get_count_cache().invalidate("announcements")
+        get_duckdb_registry().close(repo.db_path)
+
+    def test_anti_join_skips_existing_and_batch_duplicates(self, repo, test_logger):
+        test_logger.info("UNIT: Announcements Batch Insert - Starting")
+        inserted = repo.insert_announcements([
+            {"id": "new1", "company_name": "Infosys", "news_headline": "Results", "script_code": 500209,
+             "trade_date": "2025-01-02 09:15:00", "descriptor_id": "12"},
+            {"id": "old1", "company_name": "Other", "news_headline": "Other"},               # existing id
+            {"id": "new2", "company_name": " tata motors ", "news_headline": "BOARD MEETING"},  # existing headline
+            {"id": "new3", "company_name": "Infosys", "news_headline": " results"},          # duplicate in batch
+            {"id": "new1", "company_name": "Infosys", "news_headline": "Again"},            # repeated id
+            {"id": "new4", "news_headline": "No company", "trade_date": "not a date"},
+            {"company_name": "No id"},
+        ])
+        assert inserted == ["new1", "new4"]
+
+        row = repo.get_announcement("new1")
+        assert row["script_code"] == 500209
+        assert row["descriptor_id"] == 12
+        assert row["trade_date"].startswith("2025-01-02")
+        assert repo.get_announcement("new4")["trade_date"] is None
+
+        # Re-running the same batch inserts nothing
+        assert repo.insert_announcements([{"id": "new1"}, {"id": "new4"}]) == []
+        items, total = repo.get_announcements()
+        assert total == 3
+        test_logger.info("UNIT: Announcements Batch Insert - Verified dedup")
+
+class TestAnnouncementsRepositoryDedupKey:
+    def test_migration_backfills_existing_database(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Announcements dedup_key Migration - Starting")
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        db_dir = tmp_path / "Company Fundamentals"
+        db_dir.mkdir()
+        # Database from before dedup_key, holding two rows that only differ in case/whitespace
+        conn = duckdb.connect(str(db_dir / "corporate_announcements.duckdb"))
+        conn.execute("""
+            CREATE TABLE corporate_announcements (
+                id VARCHAR PRIMARY KEY, trade_date TIMESTAMP WITH TIME ZONE, script_code INTEGER,
+                symbol_nse VARCHAR, symbol_bse VARCHAR, company_name VARCHAR, file_status VARCHAR,
+                news_headline VARCHAR, news_subhead VARCHAR, news_body TEXT, descriptor_id INTEGER,
+                announcement_type VARCHAR, meeting_type VARCHAR, date_of_meeting TIMESTAMP WITH TIME ZONE,
+                attachment_data BLOB, attachment_content_type VARCHAR,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("CREATE INDEX idx_company_name ON corporate_announcements(company_name)")
+        conn.execute("""
+            INSERT INTO corporate_announcements (id, company_name, news_headline, created_at) VALUES
+            ('a1', 'Wipro', 'Dividend', '2025-01-01'), ('a2', ' WIPRO', 'dividend ', '2025-01-02'),
+            ('a3', NULL, 'Dividend', '2025-01-03')
+        """)
+        conn.close()
+
+        repo = AnnouncementsRepository()
+        try:
+            conn = repo.get_connection()
+            keys = dict(conn.execute("SELECT id, dedup_key FROM corporate_announcements").fetchall())
+            assert keys["a1"] is not None
+            assert keys["a2"] is None and keys["a3"] is None
+            assert conn.execute(
+                "SELECT is_unique FROM duckdb_indexes() WHERE index_name = 'idx_dedup_key'"
+            ).fetchone()[0]
+            conn.close()
+
+            # Live path: duplicate headline or id is rejected by the indexes
+            assert not repo.insert_announcement({"id": "a9", "company_name": "wipro", "news_headline": "DIVIDEND"})
+            assert not repo.insert_announcement({"id": "a1", "company_name": "Other", "news_headline": "Other"})
+            assert repo.insert_announcement({"id": "a10", "company_name": "Wipro", "news_headline": "Bonus"})
+            assert repo.insert_announcements([{"id": "a11", "company_name": "WIPRO ", "news_headline": "bonus"}]) == []
+        finally:
+            get_duckdb_registry().close(repo.db_path)
+        test_logger.info("UNIT: Announcements dedup_key Migration - Verified backfill and index")
+
+
+class TestAnnouncementsRepositoryAttachments:
+    def test_attachments_are_stored_as_content_addressed_files(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Announcements Attachment Store - Starting")
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = AnnouncementsRepository()
+        try:
+            repo.insert_announcements([{"id": "f1", "news_headline": "One"}, {"id": "f2", "news_headline": "Two"}])
+            assert repo.get_attachment("f1") is None
+
+            repo.update_attachment("f1", b"%PDF-1 same", "application/pdf")
+            repo.update_attachment("f2", b"%PDF-1 same", "application/pdf")
+            first, second = repo.get_attachment("f1"), repo.get_attachment("f2")
+            assert first["path"] == second["path"]
+            assert first["path"].startswith(repo.attachments_dir)
+            assert first["size"] == 11 and first["content_type"] == "application/pdf"
+            with open(first["path"], "rb") as f:
+                assert f.read() == b"%PDF-1 same"
+
+            # A vanished file is reported as not stored, so it is fetched again
+            os.remove(first["path"])
+            assert repo.get_attachment("f1") is None
+        finally:
+            get_duckdb_registry().close(repo.db_path)
+        test_logger.info("UNIT: Announcements Attachment Store - Verified files and metadata")
+
+    def test_migration_moves_blobs_out_of_database(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Announcements Attachment Migration - Starting")
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        db_dir = tmp_path / "Company Fundamentals"
+        db_dir.mkdir()
+        conn = duckdb.connect(str(db_dir / "corporate_announcements.duckdb"))
+        conn.execute("""
+            CREATE TABLE corporate_announcements (
+                id VARCHAR PRIMARY KEY, company_name VARCHAR, news_headline VARCHAR,
+                attachment_data BLOB, attachment_content_type VARCHAR,
+                created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute("CREATE INDEX idx_company_name ON corporate_announcements(company_name)")
+        conn.execute("""
+            INSERT INTO corporate_announcements (id, news_headline, attachment_data, attachment_content_type) VALUES
+            ('b1', 'One', '\\x25PDF one'::BLOB, 'application/pdf'), ('b2', 'Two', NULL, NULL)
+        """)
+        conn.close()
+
+        repo = AnnouncementsRepository()
+        try:
+            attachment = repo.get_attachment("b1")
+            with open(attachment["path"], "rb") as f:
+                assert f.read() == b"%PDF one"
+            assert attachment["size"] == 8
+            assert repo.get_attachment("b2") is None
+            conn = repo.get_connection()
+            assert conn.execute(
+                "SELECT COUNT(*) FROM corporate_announcements WHERE attachment_data IS NOT NULL"
+            ).fetchone()[0] == 0
+            conn.close()
+        finally:
+            get_duckdb_registry().close(repo.db_path)
+        test_logger.info("UNIT: Announcements Attachment Migration - Verified BLOBs moved to files")
@@ -0,0 +1,216 @@
+import duckdb
+import pytest
+from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
+from app.repositories.screener_repository import ScreenerRepository
+
+def _row(metric_value, period_key="Mar 2024"):
+    return {
+        "entity_type": "COMPANY", "parent_company_symbol": None, "symbol": "TCS",
+        "exchange": "NSE", "period_type": "ANNUAL", "period_key": period_key,
+        "statement_group": "Profit & Loss", "metric_name": "Sales", "metric_value": metric_value,
+        "unit": "Cr", "consolidated_flag": None, "metadata": None,
+    }
+
+class TestScreenerRepositoryUpsert:
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = ScreenerRepository()
+        yield repo
+        get_duckdb_registry().close(repo.db_path)
+
+    def test_rescrape_updates_in_place(self, repo, monkeypatch, test_logger):
+        test_logger.info("UNIT: Screener Upsert - Starting")
+        monkeypatch.setattr(settings, "SCREENER_TRACK_VALUE_CHANGES", True)
+        conn = repo.get_db_connection()
+        try:
+            assert repo.insert_metrics_bulk(conn, [_row(100.0), _row(90.0, "Mar 2023")]) == 2
+            assert repo.insert_metrics_bulk(conn, [_row(100.0), _row(90.0, "Mar 2023")]) == 2
+            assert repo.insert_metrics_bulk(conn, [_row(105.0)]) == 1
+
+            rows = conn.execute("SELECT period_key, metric_value FROM screener_data ORDER BY period_key").fetchall()
+            assert rows == [("Mar 2023", 90.0), ("Mar 2024", 105.0)]
+
+            # Only the restated value is logged
+            changes = conn.execute("SELECT period_key, old_value, new_value FROM screener_data_changes").fetchall()
+            assert changes == [("Mar 2024", 100.0, 105.0)]
+        finally:
+            conn.close()
+        test_logger.info("UNIT: Screener Upsert - Verified one row per natural key")
+
+    def test_failed_batch_rolls_back_and_raises(self, repo, test_logger):
+        test_logger.info("UNIT: Screener Upsert Failure - Starting")
+        conn = repo.get_db_connection()
+        try:
+            # exchange is NOT NULL: one bad row fails the whole page, which is reported, not swallowed
+            with pytest.raises(duckdb.ConstraintException):
+                repo.insert_metrics_bulk(conn, [_row(100.0), {**_row(90.0, "Mar 2023"), "exchange": None}])
+            assert conn.execute("SELECT COUNT(*) FROM screener_data").fetchone()[0] == 0
+            assert repo.insert_metrics_bulk(conn, [_row(100.0)]) == 1
+        finally:
+            conn.close()
+        test_logger.info("UNIT: Screener Upsert Failure - Verified rollback and error")
+
+    def test_migrates_append_only_history(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Screener Natural Key Migration - Starting")
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        db_path = tmp_path / "Company Fundamentals" / "screener.duckdb"
+        db_path.parent.mkdir()
+
+        # Database written by the append-only scraper: one copy of the metric per run
+        legacy = duckdb.connect(str(db_path))
+        legacy.execute("""
+            CREATE TABLE screener_data (
+                id INTEGER PRIMARY KEY, entity_type VARCHAR NOT NULL, parent_company_symbol VARCHAR,
+                symbol VARCHAR NOT NULL, exchange VARCHAR NOT NULL, period_type VARCHAR NOT NULL,
+                period_key VARCHAR NOT NULL, statement_group VARCHAR NOT NULL, metric_name VARCHAR NOT NULL,
+                metric_value DOUBLE, unit VARCHAR, consolidated_flag VARCHAR DEFAULT 'CONSOLIDATED',
+                source VARCHAR DEFAULT 'screener.in', captured_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                metadata TEXT
+            )
+        """)
+        legacy.execute("CREATE SEQUENCE screener_data_id_seq START 4")
+        for run_id, value in [(1, 98.0), (2, 99.0), (3, 100.0)]:
+            legacy.execute(
+                "INSERT INTO screener_data (id, entity_type, symbol, exchange, period_type, period_key, statement_group, metric_name, metric_value) "
+                "VALUES (?, 'COMPANY', 'TCS', 'NSE', 'ANNUAL', 'Mar 2024', 'Profit & Loss', 'Sales', ?)",
+                [run_id, value]
+            )
+        legacy.close()
+
+        repo = ScreenerRepository()
+        conn = repo.get_db_connection()
+        try:
+            assert conn.execute("SELECT id, metric_value FROM screener_data").fetchall() == [(3, 100.0)]
+            repo.insert_metrics_bulk(conn, [_row(101.0)])
+            assert conn.execute("SELECT id, metric_value FROM screener_data").fetchall() == [(3, 101.0)]
+        finally:
+            conn.close()
+            get_duckdb_registry().close(repo.db_path)
+        test_logger.info("UNIT: Screener Natural Key Migration - Verified newest copy kept")
+
+    def test_peer_rows_are_kept_per_parent(self, repo, test_logger):
+        test_logger.info("UNIT: Screener Peer Key - Starting")
+        peer = {**_row(30.0, "2024-06-01"), "entity_type": "PEER", "symbol": "Infosys",
+                "period_type": "SNAPSHOT", "statement_group": "PEER", "metric_name": "P/E"}
+        conn = repo.get_db_connection()
+        try:
+            repo.insert_metrics_bulk(conn, [{**peer, "parent_company_symbol": "TCS"}])
+            repo.insert_metrics_bulk(conn, [{**peer, "parent_company_symbol": "WIPRO", "metric_value": 31.0}])
+            repo.insert_metrics_bulk(conn, [{**peer, "parent_company_symbol": "TCS", "metric_value": 32.0}])
+            rows = conn.execute(
+                "SELECT parent_company_symbol, metric_value FROM screener_data ORDER BY parent_company_symbol"
+            ).fetchall()
+            assert rows == [("TCS", 32.0), ("WIPRO", 31.0)]
+        finally:
+            conn.close()
+        test_logger.info("UNIT: Screener Peer Key - Verified one peer row per parent")
+
+    def test_rebuilds_index_without_parent_key(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Screener Parent Key Migration - Starting")
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        db_path = tmp_path / "Company Fundamentals" / "screener.duckdb"
+        db_path.parent.mkdir()
+
+        # Database keyed before parent_key existed
+        legacy = duckdb.connect(str(db_path))
+        legacy.execute("""
+            CREATE TABLE screener_data (
+                id INTEGER PRIMARY KEY, entity_type VARCHAR NOT NULL, parent_company_symbol VARCHAR,
+                symbol VARCHAR NOT NULL, exchange VARCHAR NOT NULL, period_type VARCHAR NOT NULL,
+                period_key VARCHAR NOT NULL, statement_group VARCHAR NOT NULL, metric_name VARCHAR NOT NULL,
+                metric_value DOUBLE, unit VARCHAR, consolidated_flag VARCHAR DEFAULT 'CONSOLIDATED',
+                source VARCHAR DEFAULT 'screener.in', captured_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+                metadata TEXT
+            )
+        """)
+        legacy.execute("CREATE SEQUENCE screener_data_id_seq START 2")
+        legacy.execute(
+            "CREATE UNIQUE INDEX uq_screener_data_natural_key "
+            "ON screener_data(symbol, period_type, period_key, statement_group, metric_name)"
+        )
+        legacy.execute(
+            "INSERT INTO screener_data (id, entity_type, parent_company_symbol, symbol, exchange, period_type, period_key, statement_group, metric_name, metric_value) "
+            "VALUES (1, 'PEER', 'TCS', 'Infosys', 'NSE', 'SNAPSHOT', '2024-06-01', 'PEER', 'P/E', 30.0)"
+        )
+        legacy.close()
+
+        repo = ScreenerRepository()
+        conn = repo.get_db_connection()
+        try:
+            assert conn.execute("SELECT parent_key FROM screener_data").fetchall() == [("TCS",)]
+            peer = {**_row(31.0, "2024-06-01"), "entity_type": "PEER", "parent_company_symbol": "WIPRO",
+                    "symbol": "Infosys", "period_type": "SNAPSHOT", "statement_group": "PEER", "metric_name": "P/E"}
+            repo.insert_metrics_bulk(conn, [peer])
+            assert conn.execute("SELECT COUNT(*) FROM screener_data").fetchone()[0] == 2
+        finally:
+            conn.close()
+            get_duckdb_registry().close(repo.db_path)
+        test_logger.info("UNIT: Screener Parent Key Migration - Verified index rebuilt")
+
+class TestScreenerRepositoryReads:
+    @pytest.fixture
+    def seeded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = ScreenerRepository()
+        conn = repo.get_db_connection()
+        rows = []
+        for symbol, base in [("TCS", 100.0), ("INFY", 50.0)]:
+            for offset, period_key in enumerate(["Mar 2023", "Mar 2024", "TTM"]):
+                for metric_name in ["Sales", "Net Profit"]:
+                    row = _row(base + offset, period_key)
+                    row.update(symbol=symbol, metric_name=metric_name)
+                    rows.append(row)
+        repo.insert_metrics_bulk(conn, rows)
+        yield repo, conn
+        conn.close()
+        get_duckdb_registry().close(repo.db_path)
+
+    def test_metric_matrix_is_pivoted(self, seeded, test_logger):
+        test_logger.info("UNIT: Screener Metric Matrix - Starting")
+        repo, conn = seeded
+        result = repo.get_metric_matrix(conn, ["TCS"], statement_group="Profit & Loss")
+        columns = [d[0] for d in result.description]
+        assert columns == ["symbol", "statement_group", "period_type", "period_key", "Net Profit", "Sales"]
+        rows = result.fetchall()
+        # Dated periods in calendar order, TTM last
+        assert [r[3] for r in rows] == ["Mar 2023", "Mar 2024", "TTM"]
+        assert rows[1][4:] == (101.0, 101.0)
+
+        assert repo.get_metric_matrix(conn, ["UNKNOWN"]) is None
+        test_logger.info("UNIT: Screener Metric Matrix - Verified wide output")
+
+    def test_cross_section_takes_latest_period(self, seeded, test_logger):
+        test_logger.info("UNIT: Screener Cross Section - Starting")
+        repo, conn = seeded
+        rows = repo.get_cross_section(conn, "Sales").fetchall()
+        assert [(r[0], r[4], r[5]) for r in rows] == [("INFY", "Mar 2024", 51.0), ("TCS", "Mar 2024", 101.0)]
+        test_logger.info("UNIT: Screener Cross Section - Verified latest values")
+
+class TestScreenerRepositoryDetailedLogs:
+    def test_batch_ids_continue_after_existing_rows(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Screener Detailed Logs Batch - Starting")
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = ScreenerRepository()
+        conn = repo.get_db_connection()
+        try:
+            # Rows written before the sequence existed used MAX(id) + 1
+            conn.execute("DROP SEQUENCE screener_detailed_logs_id_seq")
+            conn.execute("INSERT INTO screener_detailed_logs (id, job_id, action) VALUES (41, 'old_job', 'FETCH')")
+            repo._ensure_log_sequence(conn)
+
+            repo.write_detailed_log(conn, "job_1", 1, "conn", None, None, "START", "Started")
+            events = [
+                {"job_id": "job_1", "connection_id": 1, "symbol": f"SYM{i}", "action": "FETCH", "message": "Fetching"}
+                for i in range(3)
+            ]
+            assert repo.write_detailed_logs(conn, events) == 3
+
+            ids = [r[0] for r in conn.execute("SELECT id FROM screener_detailed_logs ORDER BY id").fetchall()]
+            assert ids == [41, 42, 43, 44, 45]
+            assert conn.execute("SELECT COUNT(*) FROM screener_detailed_logs WHERE timestamp IS NULL").fetchone()[0] == 0
+        finally:
+            conn.close()
+            get_duckdb_registry().close(repo.db_path)
+        test_logger.info("UNIT: Screener Detailed Logs Batch - Verified sequence ids")
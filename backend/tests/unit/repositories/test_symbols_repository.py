@@ -0,0 +1,243 @@
+import os
+import pandas as pd
+import pytest
+from datetime import datetime, timezone
+from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
+from app.repositories.symbols_repository import SymbolsRepository
+
+class TestSymbolsRepositoryUploadStaging:
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = SymbolsRepository()
+        yield repo
+        get_duckdb_registry().close(repo.db_path)
+
+    def test_staged_csv_is_upserted(self, repo, tmp_path, test_logger):
+        test_logger.info("UNIT: Symbols Upload Staging (CSV) - Starting")
+        csv_path = tmp_path / "symbols.csv"
+        csv_path.write_text(
+            "exchange,symbol,name,lot_size,strike_price,expiry_date\n"
+            "nse, tcs ,Tata Consultancy,1,,\n"
+            "NSE,INFY,Infosys,1.0,,\n"
+            "NSE,TCS,Duplicate row,5,,\n"
+            "NSE,,Missing symbol,1,,\n"
+            "NFO,NIFTY25DECFUT,Nifty Fut,75,abc,2025-12-25 00:00:00\n"
+        )
+        conn = repo.get_db_connection()
+        try:
+            assert repo.stage_upload_file(conn, str(csv_path)) == 5
+            counts = repo.apply_upload_staging(conn, datetime.now(timezone.utc))
+            assert counts == {"valid": 3, "inserted": 3, "updated": 0}
+
+            rows = conn.execute("SELECT id, exchange, trading_symbol, name, lot_size, strike_price, CAST(expiry_date AS VARCHAR) FROM symbols ORDER BY id").fetchall()
+            assert rows == [
+                (1, "NSE", "TCS", "Tata Consultancy", 1, None, None),
+                (2, "NSE", "INFY", "Infosys", 1, None, None),
+                (3, "NFO", "NIFTY25DECFUT", "Nifty Fut", 75, None, "2025-12-25"),
+            ]
+
+            # Re-upload updates existing rows in place and appends new ones after the current max id
+            repo.stage_upload_frame(conn, pd.DataFrame({"exchange": ["NSE", "BSE"], "trading_symbol": ["INFY", "INFY"], "name": ["Infosys Ltd", None]}))
+            counts = repo.apply_upload_staging(conn, datetime.now(timezone.utc))
+            assert counts == {"valid": 2, "inserted": 1, "updated": 1}
+            assert conn.execute("SELECT id, name FROM symbols WHERE trading_symbol = 'INFY' ORDER BY id").fetchall() == [(2, "Infosys Ltd"), (4, None)]
+        finally:
+            conn.close()
+        test_logger.info("UNIT: Symbols Upload Staging (CSV) - Verified inserted/updated counts")
+
+    def test_missing_key_columns_rejected(self, repo, test_logger):
+        test_logger.info("UNIT: Symbols Upload Staging (Missing Columns) - Starting")
+        conn = repo.get_db_connection()
+        try:
+            repo.stage_upload_frame(conn, pd.DataFrame({"name": ["Tata Consultancy"]}))
+            with pytest.raises(ValueError) as exc:
+                repo.apply_upload_staging(conn, datetime.now(timezone.utc))
+            assert "exchange" in str(exc.value)
+        finally:
+            conn.close()
+        test_logger.info("UNIT: Symbols Upload Staging (Missing Columns) - Verified ValueError")
+
+    def test_legacy_table_gets_unique_key(self, repo, test_logger):
+        test_logger.info("UNIT: Symbols Unique Key Migration - Starting")
+        conn = repo.get_db_connection()
+        try:
+            # Table created before (exchange, trading_symbol) was unique
+            conn.execute("DROP TABLE symbols")
+            conn.execute("""
+                CREATE TABLE symbols (
+                    id INTEGER PRIMARY KEY, exchange VARCHAR NOT NULL, trading_symbol VARCHAR NOT NULL,
+                    exchange_token VARCHAR, name VARCHAR, instrument_type VARCHAR, segment VARCHAR,
+                    series VARCHAR, isin VARCHAR, expiry_date DATE, strike_price DOUBLE, lot_size INTEGER,
+                    status VARCHAR DEFAULT 'ACTIVE', source VARCHAR DEFAULT 'MANUAL', created_at TIMESTAMP WITH TIME ZONE,
+                    updated_at TIMESTAMP WITH TIME ZONE, last_updated_at TIMESTAMP WITH TIME ZONE
+                )
+            """)
+            conn.execute("INSERT INTO symbols (id, exchange, trading_symbol, name) VALUES (1, 'NSE', 'TCS', 'first'), (2, 'NSE', 'TCS', 'copy')")
+
+            repo.stage_upload_frame(conn, pd.DataFrame({"exchange": ["NSE"], "trading_symbol": ["TCS"], "name": ["Tata Consultancy"]}))
+            counts = repo.apply_upload_staging(conn, datetime.now(timezone.utc))
+            assert counts == {"valid": 1, "inserted": 0, "updated": 1}
+            assert conn.execute("SELECT id, name FROM symbols").fetchall() == [(1, "Tata Consultancy")]
+        finally:
+            conn.close()
+        test_logger.info("UNIT: Symbols Unique Key Migration - Verified oldest row kept and updated")
+
+    def test_keyset_pages(self, repo, test_logger):
+        test_logger.info("UNIT: Symbols Keyset Pagination - Starting")
+        conn = repo.get_db_connection()
+        try:
+            repo.stage_upload_frame(conn, pd.DataFrame({
+                "exchange": ["NSE"] * 3 + ["BSE"] * 2,
+                "trading_symbol": ["TCS", "INFY", "WIPRO", "TCS", "INFY"],
+            }))
+            repo.apply_upload_staging(conn, datetime.now(timezone.utc))
+        finally:
+            conn.close()
+
+        keys, cursor = [], None
+        while True:
+            items, total, cursor = repo.get_symbols_paginated(limit=2, cursor=cursor)
+            keys.extend((i["exchange"], i["trading_symbol"]) for i in items)
+            if not cursor:
+                break
+        assert keys == [("BSE", "INFY"), ("BSE", "TCS"), ("NSE", "INFY"), ("NSE", "TCS"), ("NSE", "WIPRO")]
+        assert total == 5
+        assert repo.get_symbols_paginated(limit=2, include_total=False)[1] is None
+        test_logger.info("UNIT: Symbols Keyset Pagination - Verified page order")
+
+class TestSymbolsRepositorySeriesLookup:
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(SymbolsRepository, "_series_cache", {})
+        repo = SymbolsRepository()
+        yield repo
+        get_duckdb_registry().close(repo.db_path)
+
+    def test_expand_series_code(self, test_logger):
+        test_logger.info("UNIT: Series Code Expansion - Starting")
+        assert SymbolsRepository.expand_series_code("EQ") == ["EQ"]
+        assert SymbolsRepository.expand_series_code("N1-N3") == ["N1-N3"]
+        assert SymbolsRepository.expand_series_code("N1-N3/YA-YC") == ["N1", "N2", "N3", "YA", "YB", "YC", "N1-N3/YA-YC"]
+        test_logger.info("UNIT: Series Code Expansion - Verified digit and letter ranges")
+
+    def test_bulk_reload_and_cache(self, repo, test_logger):
+        test_logger.info("UNIT: Series Lookup Bulk Reload - Starting")
+        with open(os.path.join(os.path.dirname(repo.db_path), "Series.csv"), "w", encoding="utf-8") as f:
+            f.write(
+                "Series Code,Description\n"
+                "EQ,Equity\n"
+                "N1-N9/NA-NZ,Non-convertible debentures\n"
+                "BE,Book entry\n"
+                "EQ,Equity segment\n"
+            )
+        result = repo.reload_series_lookup(force=False)
+        assert result["reloaded"] is True
+        assert result["entries_count"] == 2 + 9 + 26 + 1
+
+        conn = repo.get_db_connection()
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM series_lookup").fetchone()[0] == 38
+            conn.execute("DELETE FROM series_lookup WHERE series_code = 'BE'")
+            repo.stage_upload_frame(conn, pd.DataFrame({
+                "exchange": ["NSE", "NSE", "NSE"], "trading_symbol": ["TCS", "GOI27", "XYZ"], "series": ["EQ", "N5", None],
+            }))
+            repo.apply_upload_staging(conn, datetime.now(timezone.utc))
+        finally:
+            conn.close()
+
+        # Descriptions come from the cached map, not the table
+        descriptions = repo.get_series_descriptions()
+        assert descriptions["EQ"] == "Equity segment"
+        assert descriptions["NQ"] == "Non-convertible debentures"
+        assert descriptions["BE"] == "Book entry"
+        items, _, _ = repo.get_symbols_paginated(limit=10)
+        assert {i["trading_symbol"]: i["series_description"] for i in items} == {
+            "GOI27": "Non-convertible debentures", "TCS": "Equity segment", "XYZ": None,
+        }
+
+        assert repo.reload_series_lookup(force=False)["reloaded"] is False
+        assert repo.reload_series_lookup(force=True)["entries_count"] == 38
+        test_logger.info("UNIT: Series Lookup Bulk Reload - Verified table, cache and enrichment")
+
+class TestSymbolsRepositorySourceState:
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = SymbolsRepository()
+        yield repo
+        get_duckdb_registry().close(repo.db_path)
+
+    def test_source_state_round_trip(self, repo, test_logger):
+        test_logger.info("UNIT: Scheduler Source State - Starting")
+        url = "https://example.com/NSE.csv"
+        assert repo.get_source_state(1, url) is None
+        repo.save_source_state(1, url, {"etag": '"v1"', "content_hash": "abc"}, changed=True)
+        repo.save_source_state(1, url, {"etag": '"v2"', "content_hash": "abc"}, changed=False)
+        assert repo.get_source_state(1, url) == {"etag": '"v2"', "last_modified": None, "content_hash": "abc"}
+
+        conn = repo.get_db_connection()
+        try:
+            # A no-change check keeps the time of the last real change
+            checked_at, changed_at = conn.execute("SELECT checked_at, changed_at FROM scheduler_source_state").fetchone()
+            assert changed_at is not None and checked_at >= changed_at
+            repo.clear_source_state(conn, 1)
+        finally:
+            conn.close()
+        assert repo.get_source_state(1, url) is None
+        test_logger.info("UNIT: Scheduler Source State - Verified upsert and clear")
+
+class TestSymbolsRepositoryScriptStats:
+    @pytest.fixture
+    def repo(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        repo = SymbolsRepository()
+        yield repo
+        get_duckdb_registry().close(repo.db_path)
+
+    def test_record_script_run(self, repo, test_logger):
+        test_logger.info("UNIT: Script Run Stats - Starting")
+        conn = repo.get_db_connection()
+        try:
+            conn.execute("INSERT INTO transformation_scripts (id, name, content) VALUES (1, 'double', 'final_df = df')")
+        finally:
+            conn.close()
+        assert repo.get_transformation_script(1) == ("double", "final_df = df", 1)
+
+        repo.record_script_run(1, 12.5)
+        repo.record_script_run(1, 7.5)
+        conn = repo.get_db_connection()
+        try:
+            row = conn.execute("SELECT run_count, total_run_ms, last_run_ms, max_run_ms, last_used_at FROM transformation_scripts WHERE id = 1").fetchone()
+        finally:
+            conn.close()
+        assert row[:4] == (2, 20.0, 7.5, 12.5)
+        assert row[4] is not None
+        test_logger.info("UNIT: Script Run Stats - Verified timing columns")
+
+class TestSymbolsRepositorySchemaUpgrade:
+    def test_existing_database_gets_new_columns(self, tmp_path, monkeypatch, test_logger):
+        test_logger.info("UNIT: Symbols Schema Upgrade - Starting")
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        db_path = os.path.join(str(tmp_path), "symbols", "symbols.duckdb")
+        os.makedirs(os.path.dirname(db_path))
+        # Database written by an older version
+        conn = get_duckdb_registry().get_connection(db_path)
+        conn.execute("CREATE TABLE schedulers (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, mode VARCHAR NOT NULL, sources TEXT NOT NULL)")
+        conn.execute("CREATE TABLE transformation_scripts (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, content TEXT NOT NULL)")
+        conn.close()
+
+        repo = SymbolsRepository()
+        conn = repo.get_db_connection()
+        try:
+            columns = [r[0] for r in conn.execute("SELECT column_name FROM duckdb_columns() WHERE table_name = 'schedulers'").fetchall()]
+            assert "max_parallel_downloads" in columns
+            assert conn.execute("SELECT COUNT(*) FROM scheduler_source_state").fetchone()[0] == 0
+            script_columns = [r[0] for r in conn.execute("SELECT column_name FROM duckdb_columns() WHERE table_name = 'transformation_scripts'").fetchall()]
+            assert {"run_count", "total_run_ms", "last_run_ms", "max_run_ms"} <= set(script_columns)
+        finally:
+            conn.close()
+            get_duckdb_registry().close(db_path)
+        test_logger.info("UNIT: Symbols Schema Upgrade - Verified migration on open")
@@ -1,5 +1,9 @@
 import pytest
 from unittest.mock import MagicMock
+from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
+from app.core.pagination import get_count_cache
+from app.services import announcements_service
 from app.services.announcements_service import AnnouncementsService
 from tests.mocks.mock_market_repositories import MockAnnouncementsRepository
 
@@ -39,3 +43,66 @@ class TestAnnouncementsService:
         assert item is not None
         assert item['title'] == "X"
         test_logger.info("UNIT: Get Announcement By ID - Verified item title")
+
+
+class TestAnnouncementsDescriptorMetadata:
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(announcements_service, "_descriptor_metadata", {})
+        service = AnnouncementsService()
+        yield service
+        get_duckdb_registry().close(service.repo.db_path)
+
+    def test_descriptors_served_from_memory(self, service, test_logger):
+        test_logger.info("UNIT: Descriptor Metadata Map - Starting")
+        written = service.cache_descriptor_metadata([
+            {"descriptor_id": 1, "descriptor_name": "Dividend", "descriptor_category": "Corporate Action"},
+            {"descriptor_id": 2, "descriptor_name": "Results"},
+            {"descriptor_id": 1, "descriptor_name": "Dividend Declared", "descriptor_category": "Corporate Action"},
+            {"descriptor_id": None, "descriptor_name": "No id"},
+        ])
+        assert written == 2
+        assert service.get_descriptor_metadata(1)["descriptor_name"] == "Dividend Declared"
+
+        # Lookups no longer touch the database
+        service.repo.get_connection = MagicMock(side_effect=AssertionError("database accessed"))
+        assert set(service.get_descriptor_metadata_batch([1, 2, 3])) == {1, 2}
+        assert service.get_descriptor_metadata(3) is None
+        test_logger.info("UNIT: Descriptor Metadata Map - Verified upsert and lookups")
+
+    def test_startup_load_reads_existing_descriptors(self, service, test_logger):
+        test_logger.info("UNIT: Descriptor Metadata Startup Load - Starting")
+        service.repo.cache_descriptor_metadata([{"descriptor_id": 7, "descriptor_name": "Board Meeting"}])
+        assert service.get_descriptor_metadata(7) is None
+        assert service.load_descriptor_metadata() == 1
+        assert service.get_descriptor_metadata(7)["descriptor_name"] == "Board Meeting"
+        test_logger.info("UNIT: Descriptor Metadata Startup Load - Verified load")
+
+
+class TestAnnouncementsPaging:
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        service = AnnouncementsService()
+        service.insert_announcements([{"id": f"a{i:02d}", "news_headline": f"Headline {i}"} for i in range(30)])
+        yield service
+        get_count_cache().invalidate("announcements")
+        get_duckdb_registry().close(service.repo.db_path)
+
+    def test_page_without_size_uses_default(self, service, test_logger):
+        test_logger.info("UNIT: Announcements Default Page Size - Starting")
+        first = service.get_announcements_page(page=1)
+        assert len(first["announcements"]) == 25
+        assert first["next_cursor"]
+
+        second = service.get_announcements_page(page=2)
+        assert len(second["announcements"]) == 5
+        assert (second["page"], second["page_size"], second["offset"], second["total_pages"]) == (2, 25, 25, 2)
+
+        by_cursor = service.get_announcements_page(cursor=first["next_cursor"])
+        assert [a["id"] for a in by_cursor["announcements"]] == [a["id"] for a in second["announcements"]]
+
+        # No paging parameters at all: every match
+        assert len(service.get_announcements_page()["announcements"]) == 30
+        test_logger.info("UNIT: Announcements Default Page Size - Verified page 2 holds the last 5 rows")
@@ -0,0 +1,86 @@
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.core.database.duckdb_registry import get_duckdb_registry
+from app.services.announcements_service import AnnouncementsService
+from app.services.attachment_prefetcher import AttachmentPrefetcher
+
+class FakeTrueDataAPI:
+    """Counts downloads; each one waits until `release` is set"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def get_announcement_attachment(self, announcement_id):
+        self.calls.append(announcement_id)
+        self.release.wait(5)
+        return SimpleNamespace(content=f"%PDF {announcement_id}".encode(), headers={"Content-Type": "application/pdf"})
+
+class TestAttachmentPrefetcher:
+    @pytest.fixture
+    def prefetcher(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        service = AnnouncementsService()
+        service.insert_announcements([{"id": f"p{i}", "news_headline": f"Headline {i}"} for i in range(3)])
+        api = FakeTrueDataAPI()
+        prefetcher = AttachmentPrefetcher(service_factory=lambda: service, api_factory=lambda connection_id: api)
+        yield prefetcher, service, api
+        prefetcher.stop()
+        get_duckdb_registry().close(service.repo.db_path)
+
+    def test_concurrent_requests_share_one_download(self, prefetcher, test_logger):
+        test_logger.info("UNIT: Attachment Singleflight - Starting")
+        prefetcher, service, api = prefetcher
+        futures = [prefetcher.fetch(1, "p0") for _ in range(5)]
+        assert all(f is futures[0] for f in futures)
+        api.release.set()
+
+        attachment = futures[0].result(timeout=5)
+        assert api.calls == ["p0"]
+        assert attachment["path"] == service.get_attachment("p0")["path"]
+        assert prefetcher.get_stats()["shared"] == 4
+
+        # Once stored, a new request is served from the store without downloading
+        assert prefetcher.fetch(1, "p0").result(timeout=5)["sha256"] == attachment["sha256"]
+        assert api.calls == ["p0"]
+        test_logger.info("UNIT: Attachment Singleflight - Verified one download")
+
+    def test_queued_announcements_are_prefetched(self, prefetcher, test_logger):
+        test_logger.info("UNIT: Attachment Prefetch Queue - Starting")
+        prefetcher, service, api = prefetcher
+        # Not started: nothing is queued
+        assert prefetcher.enqueue(1, ["p0"]) == 0
+
+        api.release.set()
+        prefetcher.start()
+        assert prefetcher.enqueue(1, ["p1", "p2"]) == 2
+        deadline = time.monotonic() + 5
+        while (not service.get_attachment("p1") or not service.get_attachment("p2")) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert sorted(api.calls) == ["p1", "p2"]
+        assert service.get_attachment("p0") is None
+        test_logger.info("UNIT: Attachment Prefetch Queue - Verified background downloads")
+
+    def test_waiter_giving_up_does_not_break_shared_download(self, prefetcher, test_logger):
+        test_logger.info("UNIT: Attachment Download Cancellation - Starting")
+        prefetcher, service, api = prefetcher
+        future = prefetcher.fetch(1, "p0")
+        # A waiter timing out cancels its view of the future, not the download
+        assert not future.cancel()
+        api.release.set()
+        assert future.result(timeout=5)["path"] == service.get_attachment("p0")["path"]
+        test_logger.info("UNIT: Attachment Download Cancellation - Verified download completes")
+
+    def test_fetch_after_shutdown_fails_instead_of_hanging(self, prefetcher, test_logger):
+        test_logger.info("UNIT: Attachment Fetch After Shutdown - Starting")
+        prefetcher, service, api = prefetcher
+        prefetcher._executor.shutdown()
+        future = prefetcher.fetch(1, "p1")
+        with pytest.raises(RuntimeError):
+            future.result(timeout=1)
+        assert prefetcher.get_stats()["in_flight"] == 0
+        test_logger.info("UNIT: Attachment Fetch After Shutdown - Verified failed future and cleanup")
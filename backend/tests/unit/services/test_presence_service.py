@@ -0,0 +1,114 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.user import User, UserRole
+from app.services.presence_service import PresenceService
+
+class TestPresenceService:
+    @pytest.fixture
+    def presence(self):
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        db = factory()
+        for i in range(3):
+            db.add(User(
+                email=f"p{i}@example.com", hashed_password="x", username=f"presence{i}",
+                role=UserRole.USER, is_active=True, user_id=f"PRES00{i}", mobile=f"300000000{i}"
+            ))
+        db.commit()
+        db.close()
+
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        yield PresenceService(session_factory=factory), factory, statements
+        engine.dispose()
+
+    def test_activity_flushed_in_one_update(self, presence, test_logger):
+        test_logger.info("UNIT: Presence Flush - Starting")
+        service, factory, statements = presence
+
+        for _ in range(5):
+            for user_id in (1, 2, 3):
+                service.record(user_id)
+        # Recording never touches the database
+        assert statements == []
+
+        assert service.flush() == 3
+        assert sum(1 for s in statements if s.startswith("UPDATE users")) == 1
+        assert service.flush() == 0
+
+        db = factory()
+        assert all(u.last_active_at is not None for u in db.query(User).all())
+        db.close()
+        test_logger.info("UNIT: Presence Flush - Verified single batched write")
+
+    def test_online_snapshot_and_expiry(self, presence, test_logger):
+        test_logger.info("UNIT: Presence Snapshot - Starting")
+        service, _, _ = presence
+        now = datetime.now(timezone.utc)
+
+        service.record(1, now)
+        service.record(2, now - timedelta(seconds=settings.PRESENCE_ONLINE_SECONDS + 10))
+        assert service.online_user_ids() == frozenset({1, 2})
+
+        service.expire(now)
+        assert service.online_user_ids() == frozenset({1})
+        assert service.is_online(1) and not service.is_online(2)
+        assert service.last_active(2) is None
+
+        service.forget(1)
+        assert not service.is_online(1)
+        assert service.flush() == 1  # user 2's activity is still written
+        test_logger.info("UNIT: Presence Snapshot - Verified expiry and forget")
+
+    def test_deactivated_user_is_not_recorded(self, presence, test_logger):
+        test_logger.info("UNIT: Presence Deactivation - Starting")
+        service, factory, _ = presence
+
+        service.record(1)
+        service.forget(1)
+        # A request that passed auth before the deactivation finishes afterwards
+        service.record(1)
+        assert not service.is_online(1)
+        assert service.last_active(1) is None
+        assert service.flush() == 0
+
+        service.restore(1)
+        service.record(1)
+        assert service.is_online(1)
+
+        db = factory()
+        db.query(User).filter(User.id == 1).update({"is_active": False})
+        db.commit()
+        db.close()
+        # Activity buffered before the deactivation is not written back
+        assert service.flush() == 1
+        db = factory()
+        assert db.query(User).filter(User.id == 1).one().last_active_at is None
+        db.close()
+        test_logger.info("UNIT: Presence Deactivation - Verified deactivated user stays offline")
+
+    def test_seed_restores_recent_users(self, presence, test_logger):
+        test_logger.info("UNIT: Presence Seed - Starting")
+        service, factory, _ = presence
+        db = factory()
+        user = db.query(User).filter(User.username == "presence0").one()
+        user.last_active_at = datetime.now(timezone.utc) - timedelta(seconds=30)
+        db.commit()
+        user_id = user.id
+        db.close()
+
+        service.seed()
+        assert service.online_user_ids() == frozenset({user_id})
+        test_logger.info("UNIT: Presence Seed - Verified recent users loaded")
@@ -1,7 +1,8 @@
 import pytest
 import threading
+import time
 from unittest.mock import MagicMock, patch
-from app.services.screener_service import ScreenerService
+from app.services.screener_service import ScreenerService, TokenBucketRateLimiter, DetailedLogBuffer
 from tests.mocks.mock_market_repositories import MockScreenerRepository
 
 class TestScreenerService:
@@ -122,3 +123,138 @@ class TestScreenerService:
         assert tcs_mcap['value'] == 1000000.0
         test_logger.info("UNIT: Scraping Flow Logic - Verified metric extraction (TCS Market Cap)")
 
+        # Per-symbol events reach the table through the buffer once the job ends
+        actions = [log["action"] for log in service.repo.detailed_logs]
+        assert actions.count("FETCH") == 2
+        assert actions.count("INSERT") == 2
+
+
+    @patch("app.services.screener_service.requests.Session")
+    def test_failed_bulk_write_counts_symbol_as_failed(self, mock_session, service, test_logger):
+        test_logger.info("UNIT: Scraping Failed Write - Starting")
+        mock_resp = MagicMock()
+        mock_resp.text = "<html><title>TCS share price</title><div id='top-ratios'>Current Price ₹ 3,000</div></html>"
+        mock_session.return_value.get.return_value = mock_resp
+        ScreenerService._session = None
+        service.repo.insert_metrics_bulk = MagicMock(side_effect=RuntimeError("constraint violated"))
+
+        service.process_scraping_async("job_write_fail", "test")
+
+        status = service._scraping_status_cache["job_write_fail"]
+        assert status["symbols_succeeded"] == 0 and status["symbols_failed"] == 2
+        assert status["status"] == "COMPLETED (Partial)"
+        assert any("constraint violated" in e for e in status["errors"])
+        actions = [log["action"] for log in service.repo.detailed_logs]
+        assert actions.count("ERROR") == 2 and "INSERT" not in actions
+        test_logger.info("UNIT: Scraping Failed Write - Verified failure is reported")
+
+    @patch("app.services.screener_service.requests.Session")
+    def test_scrape_symbol_single_bulk_insert(self, mock_session, service, test_logger):
+        test_logger.info("UNIT: Scrape Symbol Bulk Insert - Starting")
+        html_content = """
+        <html>
+            <title>TCS share price</title>
+            <div id="top-ratios">
+                Market Cap ₹ 10,00,000 Cr
+                Current Price ₹ 3,000
+            </div>
+            <h2>Profit & Loss</h2>
+            <table>
+                <tr><th></th><th>Mar 2023</th><th>Mar 2024</th></tr>
+                <tr><td>Sales</td><td>100</td><td>120</td></tr>
+            </table>
+        </html>
+        """
+        mock_resp = MagicMock()
+        mock_resp.text = html_content
+        mock_session.return_value.get.return_value = mock_resp
+        ScreenerService._session = None
+
+        with patch.object(service.repo, "insert_metrics_bulk", wraps=service.repo.insert_metrics_bulk) as bulk:
+            res = service.scrape_symbol_logic("TCS", "NSE", service.repo.get_db_connection())
+
+        assert bulk.call_count == 1
+        assert res["success"] is True
+        # 2 header metrics + 2 P&L cells
+        assert res["records_inserted"] == 4
+        assert any(m["metric"] == "Sales" and m["value"] == 120.0 for m in service.repo.metrics)
+        test_logger.info("UNIT: Scrape Symbol Bulk Insert - Verified one statement per page")
+
+    def test_token_bucket_rate_limiter(self, test_logger):
+        test_logger.info("UNIT: Token Bucket Rate Limiter - Starting")
+        limiter = TokenBucketRateLimiter(rate=20, capacity=2)
+
+        start = time.monotonic()
+        limiter.acquire()
+        limiter.acquire()
+        assert time.monotonic() - start < 0.05  # burst is immediate
+
+        limiter.acquire()
+        assert time.monotonic() - start >= 0.04  # third token waits ~1/rate
+        test_logger.info("UNIT: Token Bucket Rate Limiter - Verified burst and refill")
+
+    def test_scraping_stops_on_flag(self, service, test_logger):
+        test_logger.info("UNIT: Scraping Stop Flag - Starting")
+        conn_row = ["Screener.in Default", "WEBSITE_SCRAPING", None]
+
+        # process_scraping_async clears the flag at start; raise it again when START is logged
+        def log_and_stop(conn, job_id, conn_id, *args, **kwargs):
+            service._stop_flags[conn_id] = True
+
+        with patch.object(service.repo.MockDuckDBConnection, "fetchone", return_value=conn_row), \
+             patch.object(service.repo, "write_detailed_log", side_effect=log_and_stop), \
+             patch.object(service, "scrape_symbol_rows") as scrape:
+            service.process_scraping_async("job_stop", "test", connection_id=7)
+
+        scrape.assert_not_called()
+        assert service._scraping_status_cache["job_stop"]["status"] == "STOPPED"
+        service._stop_flags.pop(7, None)
+        test_logger.info("UNIT: Scraping Stop Flag - Verified STOPPED status")
+
+    @patch("app.services.screener_service.requests.Session")
+    def test_unchanged_page_skips_parse_and_write(self, mock_session, service, test_logger):
+        test_logger.info("UNIT: Page Cache Unchanged - Starting")
+        mock_resp = MagicMock()
+        mock_resp.text = "<html><title>TCS share price</title>Current Price ₹ 3,000</html>"
+        mock_resp.status_code = 200
+        mock_resp.headers = {"ETag": '"abc"'}
+        mock_session.return_value.get.return_value = mock_resp
+        ScreenerService._session = None
+        conn = service.repo.get_db_connection()
+
+        first = service.scrape_symbol_logic("TCS", "NSE", conn)
+        assert first["records_inserted"] == 1
+
+        with patch("app.services.screener_service.parse_screener_page") as parse:
+            second = service.scrape_symbol_logic("TCS", "NSE", conn)
+        parse.assert_not_called()
+        assert second["unchanged"] is True
+        assert len(service.repo.metrics) == 1
+
+        sent_headers = mock_session.return_value.get.call_args.kwargs["headers"]
+        assert sent_headers["If-None-Match"] == '"abc"'
+        test_logger.info("UNIT: Page Cache Unchanged - Verified conditional fetch skip")
+
+    def test_detailed_log_buffer_batches(self, service, test_logger):
+        test_logger.info("UNIT: Detailed Log Buffer - Starting")
+        repo = service.repo
+        with patch.object(repo, "write_detailed_logs", wraps=repo.write_detailed_logs) as write:
+            buffer = DetailedLogBuffer(repo, max_events=3, flush_interval_ms=60000)
+            for i in range(4):
+                buffer.log("job_buf", 1, "conn", f"SYM{i}", "NSE", "FETCH", "Fetching")
+            # Three events fill a batch; the fourth waits for the timer or close()
+            assert write.call_count == 1
+            assert len(repo.detailed_logs) == 3
+            buffer.close()
+
+        assert write.call_count == 2
+        assert [log["symbol"] for log in repo.detailed_logs] == ["SYM0", "SYM1", "SYM2", "SYM3"]
+
+        buffer = DetailedLogBuffer(repo, max_events=100, flush_interval_ms=20)
+        buffer.log("job_buf", 1, "conn", "SYM4", "NSE", "FETCH", "Fetching")
+        deadline = time.monotonic() + 2
+        while len(repo.detailed_logs) < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        buffer.close()
+        assert len(repo.detailed_logs) == 5
+        test_logger.info("UNIT: Detailed Log Buffer - Verified size and interval flushes")
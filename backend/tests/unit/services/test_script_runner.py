@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.services import script_runner
+from app.services.script_runner import ScriptRunner
+
+SCRIPT = "final_df = df.assign(C=df['A'] * 2)"
+
+class TestScriptRunner:
+    def test_compiled_once_per_version(self, test_logger):
+        test_logger.info("UNIT: Script Runner Compile Cache - Starting")
+        runner = ScriptRunner(max_workers=0)
+        df = pd.DataFrame({"A": [1, 2]})
+        result, run_ms = runner.run(df, SCRIPT, script_id=7, version=1)
+        assert result["C"].tolist() == [2, 4]
+        assert run_ms >= 0
+        code = script_runner._compiled[(7, 1)][1]
+        runner.run(df, SCRIPT, script_id=7, version=1)
+        assert script_runner._compiled[(7, 1)][1] is code
+
+        # Same key with different content (id reused after delete) is recompiled
+        result, _ = runner.run(df, "final_df = df.assign(C=df['A'] * 3)", script_id=7, version=1)
+        assert result["C"].tolist() == [3, 6]
+
+        runner.invalidate(7)
+        assert (7, 1) not in script_runner._compiled
+        test_logger.info("UNIT: Script Runner Compile Cache - Verified reuse and invalidation")
+
+    def test_runs_in_worker_process(self, test_logger):
+        test_logger.info("UNIT: Script Runner Process Pool - Starting")
+        runner = ScriptRunner(max_workers=1)
+        try:
+            df = pd.DataFrame({"A": [1, 2, 3]})
+            result, _ = runner.run(df, SCRIPT + "\nimport os\nfinal_df['pid'] = os.getpid()", script_id=1, version=1)
+            assert result["C"].tolist() == [2, 4, 6]
+            assert result["pid"].iloc[0] != __import__("os").getpid()
+
+            with pytest.raises(ValueError) as exc:
+                runner.run(df, "final_df = df['missing']", script_id=2, version=1)
+            assert "missing" in str(exc.value)
+        finally:
+            runner.shutdown()
+        test_logger.info("UNIT: Script Runner Process Pool - Verified isolated execution and errors")
+
+    def test_endless_script_times_out_and_pool_recovers(self, monkeypatch, test_logger):
+        test_logger.info("UNIT: Script Runner Timeout - Starting")
+        monkeypatch.setattr(settings, "SCRIPT_TIMEOUT_SECONDS", 2)
+        runner = ScriptRunner(max_workers=1)
+        try:
+            df = pd.DataFrame({"A": [1, 2]})
+            runner.run(df, SCRIPT, script_id=1, version=1)
+            workers = list(runner._pool._processes.values())
+            with pytest.raises(ValueError) as exc:
+                runner.run(df, "while True:\n    pass", script_id=3, version=1)
+            assert "timed out" in str(exc.value)
+            assert runner._pool is None
+            for worker in workers:
+                worker.join(timeout=5)
+                assert not worker.is_alive()
+
+            result, _ = runner.run(df, SCRIPT, script_id=1, version=1)
+            assert result["C"].tolist() == [2, 4]
+        finally:
+            runner.shutdown()
+        test_logger.info("UNIT: Script Runner Timeout - Verified worker terminated and pool recreated")
@@ -0,0 +1,101 @@
+import pytest
+from app.services import symbol_search
+from app.services.symbol_search import SymbolSearchIndex
+
+ROWS = [
+    (1, "NSE", "TCS", "Tata Consultancy Services", "ACTIVE"),
+    (2, "NSE", "TATAMOTORS", "Tata Motors Limited", "ACTIVE"),
+    (3, "BSE", "TATAMOTORS", "Tata Motors Limited", "INACTIVE"),
+    (4, "NSE", "RELIANCE", "Reliance Industries", "ACTIVE"),
+    (5, "NFO", "NIFTY25DECFUT", "Nifty Futures", "ACTIVE"),
+    (6, "NSE", "MOTHERSON", "Samvardhana Motherson", "ACTIVE"),
+    (7, "NSE", "TATA", "Tata Sons", "ACTIVE"),
+]
+
+class TestSymbolSearchIndex:
+    @pytest.fixture
+    def index(self):
+        index = SymbolSearchIndex(lambda: list(ROWS))
+        index.rebuild()
+        return index
+
+    def test_not_ready_falls_back(self, test_logger):
+        test_logger.info("UNIT: Symbol Search Not Ready - Starting")
+        index = SymbolSearchIndex(lambda: list(ROWS))
+        index._start_build = lambda: None
+        assert index.search("TCS") is None
+        test_logger.info("UNIT: Symbol Search Not Ready - Verified None before build")
+
+    def test_ranking_and_filters(self, index, test_logger):
+        test_logger.info("UNIT: Symbol Search Ranking - Starting")
+        # Exact symbol, then symbol prefix, then name word prefix
+        ids, total, estimated = index.search("tata")
+        assert ids == [7, 3, 2, 1]
+        assert (total, estimated) == (4, False)
+
+        # Substring in the symbol ranks above substring in the name
+        ids, total, _ = index.search("MOT")
+        assert ids == [6, 3, 2]
+
+        assert index.search("tata", exchange="nse", status="active")[0] == [7, 2, 1]
+        assert index.search("tata", limit=2, offset=1)[:2] == ([3, 2], 4)
+        test_logger.info("UNIT: Symbol Search Ranking - Verified rank order")
+
+    def test_short_and_fuzzy_queries(self, index, test_logger):
+        test_logger.info("UNIT: Symbol Search Short/Fuzzy - Starting")
+        # Prefix matches first, then any other symbol or name containing the letter
+        assert index.search("n")[0] == [5, 6, 4, 7, 1]
+        # Transposed letters still find the symbol
+        assert index.search("RELAINCE")[0] == [4]
+        assert index.search("XYZ") == ([], 0, False)
+        test_logger.info("UNIT: Symbol Search Short/Fuzzy - Verified short and fuzzy matches")
+
+    def test_large_counts_are_estimated(self, monkeypatch, test_logger):
+        test_logger.info("UNIT: Symbol Search Count Estimate - Starting")
+        monkeypatch.setattr(symbol_search, "EXACT_COUNT_LIMIT", 10)
+        monkeypatch.setattr(symbol_search, "COUNT_SAMPLE_SIZE", 5)
+        rows = [(i, "NFO", f"NIFTY{i}CE", "Nifty Option", "ACTIVE") for i in range(100)]
+        index = SymbolSearchIndex(lambda: rows)
+        index.rebuild()
+        ids, total, estimated = index.search("NIFTY", limit=3)
+        assert len(ids) == 3
+        assert (total, estimated) == (100, True)
+        test_logger.info("UNIT: Symbol Search Count Estimate - Verified sampled count")
+
+    def test_invalidate_drops_index(self, index, test_logger):
+        test_logger.info("UNIT: Symbol Search Invalidate - Starting")
+        index.invalidate(rebuild=False)
+        assert not index.ready
+        index.rebuild()
+        assert index.ready
+        test_logger.info("UNIT: Symbol Search Invalidate - Verified rebuild")
+
+class TestSymbolSearchMatchesSql:
+    @pytest.fixture
+    def service(self, tmp_path, monkeypatch):
+        from app.core.config import settings
+        from app.core.database.duckdb_registry import get_duckdb_registry
+        from app.services.symbols_service import SymbolsService
+        monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+        service = SymbolsService()
+        conn = service.repo.get_db_connection()
+        try:
+            conn.executemany("INSERT INTO symbols (id, exchange, trading_symbol, name, status) VALUES (?, ?, ?, ?, ?)", ROWS)
+        finally:
+            conn.close()
+        yield service, settings, monkeypatch
+        get_duckdb_registry().close(service.repo.db_path)
+
+    def test_index_and_fallback_agree(self, service, test_logger):
+        test_logger.info("UNIT: Symbol Search Index vs SQL - Starting")
+        service, settings, monkeypatch = service
+        service.search_index().rebuild()
+        for query in ("n", "ta", "MOT", " ba "):
+            monkeypatch.setattr(settings, "SYMBOL_SEARCH_INDEX_ENABLED", True)
+            indexed = service.get_symbols(query, None, None, None, None, 50, 1)
+            monkeypatch.setattr(settings, "SYMBOL_SEARCH_INDEX_ENABLED", False)
+            fallback = service.get_symbols(query, None, None, None, None, 50, 1)
+            # Ranking differs, the matched rows and totals don't
+            assert sorted(i["id"] for i in indexed["items"]) == sorted(i["id"] for i in fallback["items"]), query
+            assert indexed["total"] == fallback["total"], query
+        test_logger.info("UNIT: Symbol Search Index vs SQL - Verified same rows for short and long queries")
@@ -1,6 +1,9 @@
 import pytest
 import pandas as pd
 import io
+import os
+from unittest.mock import MagicMock
+from openpyxl import Workbook
 from app.services.symbols_service import SymbolsService
 from tests.mocks.mock_market_repositories import MockSymbolsRepository
 
@@ -46,8 +49,78 @@ final_df['C'] = final_df['A'] + final_df['B']
         preview_id = result["preview_id"]
         assert preview_id in service._preview_cache
         assert service._preview_cache[preview_id]["new_rows"] == 2
+        # Rows stay in the spooled file until the upload is confirmed
+        assert service._preview_cache[preview_id]["df"] is None
+        assert os.path.exists(service._preview_cache[preview_id]["file_path"])
+        os.remove(service._preview_cache.pop(preview_id)["file_path"])
         test_logger.info("UNIT: Process Manual Upload Preview - Verified preview cache and row count")
 
+    def test_process_manual_upload_preview_xlsx_stream(self, service, test_logger):
+        test_logger.info("UNIT: Process Manual Upload Preview (XLSX) - Starting")
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["exchange", "symbol", "lot_size"])
+        for i in range(25):
+            sheet.append(["NSE", f"SYM{i}", None if i % 2 else 50])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+
+        result = service.process_manual_upload_preview(buffer, "symbols.xlsx", None, {"id": 1, "username": "tester"})
+
+        assert result["headers"] == ["exchange", "symbol", "lot_size"]
+        assert result["total_rows"] == 25
+        assert len(result["rows"]) == 10
+        assert result["rows"][1] == {"exchange": "NSE", "symbol": "SYM1", "lot_size": None}
+        cached = service._preview_cache.pop(result["preview_id"])
+        # The workbook is converted to a CSV spool and the original spool removed
+        assert cached["file_path"].endswith(".csv")
+        os.remove(cached["file_path"])
+        test_logger.info("UNIT: Process Manual Upload Preview (XLSX) - Verified streamed conversion")
+
+    def test_failed_upload_keeps_preview_for_retry(self, service, test_logger):
+        test_logger.info("UNIT: Upload Retry After Failure - Starting")
+        service.repo.get_transformation_script = lambda x: None
+        preview_id = service.process_manual_upload_preview(b"symbol,exchange\nTCS,NSE", "test.csv", None, {"id": 1})["preview_id"]
+        file_path = service._preview_cache[preview_id]["file_path"]
+
+        attempts = []
+        def stage_upload_file(conn, path):
+            attempts.append(path)
+            if len(attempts) == 1:
+                raise IOError("disk full")
+            return 1
+        service.repo.get_db_connection = lambda: MagicMock()
+        service.repo.stage_upload_file = stage_upload_file
+        service.repo.apply_upload_staging = lambda conn, now: {"inserted": 1, "updated": 0, "valid": 1}
+        service.repo.save_upload_log = lambda *args: None
+        service._symbols_changed = lambda: None
+
+        service.process_upload_async(preview_id, "job_failed")
+        assert service.get_upload_status("job_failed")["status"] == "FAILED"
+        assert preview_id in service._preview_cache
+        assert os.path.exists(file_path)
+
+        service.process_upload_async(preview_id, "job_retry")
+        assert service.get_upload_status("job_retry")["status"] == "SUCCESS"
+        assert attempts == [file_path, file_path]
+        assert preview_id not in service._preview_cache
+        assert not os.path.exists(file_path)
+        test_logger.info("UNIT: Upload Retry After Failure - Verified preview kept until success")
+
+    def test_stale_previews_expire(self, service, test_logger):
+        test_logger.info("UNIT: Preview Expiry - Starting")
+        service.repo.get_transformation_script = lambda x: None
+        preview_id = service.process_manual_upload_preview(b"symbol,exchange\nTCS,NSE", "test.csv", None, {"id": 1})["preview_id"]
+        cached = service._preview_cache[preview_id]
+        cached["created_at"] -= service.SPOOL_MAX_AGE_SECONDS + 1
+
+        fresh_id = service.process_manual_upload_preview(b"symbol,exchange\nINFY,NSE", "test.csv", None, {"id": 1})["preview_id"]
+        assert preview_id not in service._preview_cache
+        assert not os.path.exists(cached["file_path"])
+        os.remove(service._preview_cache.pop(fresh_id)["file_path"])
+        test_logger.info("UNIT: Preview Expiry - Verified stale preview and spool removed")
+
     def test_apply_transformation_validation_error(self, service, test_logger):
         test_logger.info("UNIT: Apply Transformation Validation Error - Starting")
         df = pd.DataFrame({"A": [1]})
@@ -72,7 +72,7 @@ function SymbolsPageContent() {
             // Define active statuses (jobs that are currently running)
             const ACTIVE_STATUSES = ['QUEUED', 'RUNNING', 'PENDING']
             // Define terminal statuses (jobs that have finished)
-            const TERMINAL_STATUSES = ['SUCCESS', 'COMPLETED', 'FAILED', 'CRASHED', 'INTERRUPTED', 'CANCELLED', 'PARTIAL', 'COMPLETED_WITH_WARNINGS', 'STOPPED']
+            const TERMINAL_STATUSES = ['SUCCESS', 'COMPLETED', 'FAILED', 'CRASHED', 'INTERRUPTED', 'CANCELLED', 'PARTIAL', 'COMPLETED_WITH_WARNINGS', 'STOPPED', 'NO_CHANGE']
             
             // Find active jobs (running, queued, processing)
             const activeJobs = logs.filter((log: any) => {
@@ -139,6 +139,8 @@ function SymbolsPageContent() {
                     setCurrentStatus('Completed (with warnings)')
                 } else if (statusUpper === 'STOPPED') {
                     setCurrentStatus('Stopped')
+                } else if (statusUpper === 'NO_CHANGE') {
+                    setCurrentStatus('No change')
                 } else {
                     setCurrentStatus(jobToShow.status)
                 }